@@ -16,11 +16,20 @@ _pending_order_worker = None
 
 
 def get_trading_executor():
-    """Get the trading executor singleton."""
+    """
+    Get the trading executor singleton.
+
+    With STRATEGY_RUNTIME_MODE=external this is a StrategyRuntimeClient that forwards
+    start/stop to the standalone strategy runtime (run_strategy_runtime.py).
+    """
     global _trading_executor
     if _trading_executor is None:
-        from app.services.trading_executor import TradingExecutor
-        _trading_executor = TradingExecutor()
+        from app.services.strategy_runtime import StrategyRuntimeClient, is_external_runtime
+        if is_external_runtime():
+            _trading_executor = StrategyRuntimeClient()
+        else:
+            from app.services.trading_executor import TradingExecutor
+            _trading_executor = TradingExecutor()
     return _trading_executor
 
 
@@ -66,6 +75,30 @@ def start_portfolio_monitor():
         logger.error(f"Failed to start portfolio monitor: {e}")
 
 
+def start_position_marker():
+    """Start the background mark-to-market of strategy positions.
+
+    To disable it, set ENABLE_POSITION_MARKER=false.
+    """
+    import os
+    from app.services.position_marker import position_marker_enabled
+    if not position_marker_enabled():
+        logger.info("Position marker is disabled (positions are marked on read). Set ENABLE_POSITION_MARKER=true to enable.")
+        return
+
+    # Avoid running twice with Flask reloader
+    debug = os.getenv("PYTHON_API_DEBUG", "false").lower() == "true"
+    if debug:
+        if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+            return
+
+    try:
+        from app.services.position_marker import get_position_marker
+        get_position_marker().start()
+    except Exception as e:
+        logger.error(f"Failed to start position marker: {e}")
+
+
 def start_pending_order_worker():
     """Start the pending order worker (disabled by default in paper mode).
 
@@ -118,6 +151,10 @@ def restore_running_strategies():
     if os.getenv('DISABLE_RESTORE_RUNNING_STRATEGIES', 'false').lower() == 'true':
         logger.info("Startup strategy restore is disabled via DISABLE_RESTORE_RUNNING_STRATEGIES")
         return
+    from app.services.strategy_runtime import is_external_runtime
+    if is_external_runtime():
+        logger.info("Strategies run in the external strategy runtime; it restores running strategies itself.")
+        return
     try:
         from app.services.strategy import StrategyService
         
@@ -271,6 +308,7 @@ def create_app(config_name='default'):
     with app.app_context():
         start_pending_order_worker()
         start_portfolio_monitor()
+        start_position_marker()
         start_usdt_order_worker()
         start_polymarket_worker()
         restore_running_strategies()
@@ -83,6 +83,28 @@ class MetaCacheConfig(type):
     def PRICE_CACHE_TTL(cls):
         return 10
 
+    @property
+    def TOKEN_VERSION_CACHE_TTL(cls):
+        # login_required 校验 token_version 的缓存秒数；0 表示每次查库
+        return int(os.getenv('TOKEN_VERSION_CACHE_TTL', '10'))
+
+    @property
+    def ANALYSIS_INPUT_CACHE_ENABLED(cls):
+        return os.getenv('ANALYSIS_INPUT_CACHE_ENABLED', 'True').lower() == 'true'
+
+    @property
+    def ANALYSIS_INPUT_CACHE_TTL(cls):
+        # AI 分析输入数据按类型分级缓存（跨用户共享），键为 (market, symbol, kind)
+        return {
+            'price': 10,           # 实时价格 10秒
+            'kline': 60,           # K线 1分钟
+            'news': 300,           # 新闻 5分钟
+            'polymarket': 600,     # 预测市场 10分钟
+            'macro': 900,          # 宏观指标 15分钟
+            'fundamental': 21600,  # 基本面/财报/盈利 6小时
+            'company': 259200,     # 公司信息 3天
+        }
+
 
 class CacheConfig(metaclass=MetaCacheConfig):
     """缓存配置"""
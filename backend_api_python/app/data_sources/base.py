@@ -60,6 +60,30 @@ class BaseDataSource(ABC):
         Implementations may return a dict compatible with CCXT `fetch_ticker` shape (e.g. {'last': ...}).
         """
         raise NotImplementedError("get_ticker is not implemented for this data source")
+
+    def get_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latest tickers for multiple symbols (best-effort).
+
+        Default implementation calls `get_ticker` once per symbol. Sources with a native
+        batch endpoint (CCXT `fetch_tickers`, yfinance multi-download, Tiingo multi-ticker)
+        override this to fetch everything in one or two requests.
+
+        Returns:
+            {input_symbol: ticker_dict}. Symbols that failed map to {'last': 0, 'symbol': ...}.
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for symbol in symbols or []:
+            if symbol in result:
+                continue
+            try:
+                result[symbol] = self.get_ticker(symbol) or {'last': 0, 'symbol': symbol}
+            except NotImplementedError:
+                raise
+            except Exception as e:
+                logger.debug(f"{self.name}: get_ticker failed for {symbol}: {e}")
+                result[symbol] = {'last': 0, 'symbol': symbol}
+        return result
     
     def format_kline(
         self,
@@ -229,7 +229,40 @@ class CryptoDataSource(BaseDataSource):
             )
         
         return {'last': 0, 'symbol': symbol}
-    
+
+    def get_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latest tickers for multiple crypto symbols with a single CCXT `fetch_tickers` call.
+
+        Symbols the exchange did not return (or all symbols, if the exchange has no
+        `fetchTickers` support) fall back to per-symbol `get_ticker`.
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        pair_to_inputs: Dict[str, List[str]] = {}
+        for symbol in symbols or []:
+            if not symbol or not str(symbol).strip() or symbol in result:
+                continue
+            normalized = self._normalize_symbol_for_exchange(symbol)
+            if normalized:
+                pair_to_inputs.setdefault(normalized, []).append(symbol)
+            result[symbol] = {'last': 0, 'symbol': symbol}
+
+        if pair_to_inputs and self.exchange.has.get('fetchTickers'):
+            try:
+                tickers = self.exchange.fetch_tickers(list(pair_to_inputs.keys())) or {}
+                for pair, inputs in pair_to_inputs.items():
+                    ticker = tickers.get(pair)
+                    if ticker and isinstance(ticker, dict) and ticker.get('last'):
+                        for symbol in inputs:
+                            result[symbol] = ticker
+            except Exception as e:
+                logger.debug(f"CCXT fetch_tickers failed on {self.exchange.id}, falling back to per-symbol: {e}")
+
+        for symbol, ticker in result.items():
+            if not ticker.get('last'):
+                result[symbol] = self.get_ticker(symbol)
+        return result
+
     def get_kline(
         self,
         symbol: str,
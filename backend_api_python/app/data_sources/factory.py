@@ -125,3 +125,31 @@ class DataSourceFactory:
             logger.error(f"Failed to fetch ticker {market}:{symbol} - {str(e)}")
             return {'last': 0, 'symbol': symbol}
 
+
+    @classmethod
+    def get_tickers(cls, market: str, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取实时报价的便捷方法
+        
+        数据源支持原生批量接口时一次请求获取全部报价，否则逐个降级获取。
+        
+        Args:
+            market: 市场类型
+            symbols: 交易对/股票代码列表
+            
+        Returns:
+            {symbol: ticker}，获取失败的标的为 {'last': 0, 'symbol': symbol}
+        """
+        symbols = [s for s in dict.fromkeys(symbols or []) if s]
+        if not symbols:
+            return {}
+        try:
+            source = cls.get_source(market)
+            tickers = source.get_tickers(symbols) or {}
+        except NotImplementedError:
+            logger.warning(f"get_tickers not implemented for market: {market}")
+            tickers = {}
+        except Exception as e:
+            logger.error(f"Failed to fetch tickers {market}:{len(symbols)} symbols - {str(e)}")
+            tickers = {}
+        return {s: tickers.get(s) or {'last': 0, 'symbol': s} for s in symbols}
@@ -18,6 +18,7 @@ logger = get_logger(__name__)
 _forex_cache: Dict[str, Dict[str, Any]] = {}
 _forex_cache_lock = threading.Lock()
 _FOREX_CACHE_TTL = 60  # 外汇价格缓存 60 秒 (Tiingo 免费 API 限制严格)
+_FOREX_PREV_CLOSE_TTL = 3600  # 昨收价缓存 1 小时
 
 
 class ForexDataSource(BaseDataSource):
@@ -130,54 +131,7 @@ class ForexDataSource(BaseDataSource):
             data = response.json()
             
             if data and isinstance(data, list) and len(data) > 0:
-                item = data[0]
-                # Tiingo FX top returns: ticker, quoteTimestamp, bidPrice, bidSize, askPrice, askSize, midPrice
-                bid = float(item.get('bidPrice', 0) or 0)
-                ask = float(item.get('askPrice', 0) or 0)
-                mid = float(item.get('midPrice', 0) or 0)
-                
-                # 如果没有 midPrice，计算中间价
-                if not mid and bid and ask:
-                    mid = (bid + ask) / 2
-                
-                last_price = mid or bid or ask
-                
-                # 获取前一天收盘价来计算涨跌（需要额外请求日线数据）
-                prev_close = 0
-                change = 0
-                change_pct = 0
-                
-                try:
-                    # 获取昨日收盘价
-                    yesterday = (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d')
-                    today = datetime.now().strftime('%Y-%m-%d')
-                    price_url = f"{self.base_url}/fx/{tiingo_symbol}/prices"
-                    price_params = {
-                        'startDate': yesterday,
-                        'endDate': today,
-                        'resampleFreq': '1day',
-                        'token': api_key
-                    }
-                    price_resp = requests.get(price_url, params=price_params, timeout=TiingoConfig.TIMEOUT)
-                    if price_resp.status_code == 200:
-                        price_data = price_resp.json()
-                        if price_data and len(price_data) > 0:
-                            prev_close = float(price_data[-1].get('close', 0) or 0)
-                            if prev_close and last_price:
-                                change = last_price - prev_close
-                                change_pct = (change / prev_close) * 100
-                except Exception:
-                    pass  # 涨跌计算失败不影响主要功能
-                
-                result = {
-                    'last': round(last_price, 5),
-                    'bid': round(bid, 5),
-                    'ask': round(ask, 5),
-                    'change': round(change, 5),
-                    'changePercent': round(change_pct, 2),
-                    'previousClose': round(prev_close, 5) if prev_close else 0,
-                    '_cache_time': time.time()
-                }
+                result = self._build_ticker(data[0], tiingo_symbol, api_key)
                 
                 # 缓存结果
                 with _forex_cache_lock:
@@ -190,6 +144,124 @@ class ForexDataSource(BaseDataSource):
         
         return {'last': 0, 'symbol': symbol}
     
+    def get_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取外汇实时报价
+        
+        Tiingo FX Top-of-Book API 支持逗号分隔的多个 tickers，
+        未命中缓存的品种合并为一次请求；失败时降级为逐个 get_ticker。
+        """
+        api_key = APIKeys.TIINGO_API_KEY
+        if not api_key:
+            logger.warning("Tiingo API key not configured")
+            return {s: {'last': 0, 'symbol': s} for s in symbols or []}
+        
+        result: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, List[str]] = {}  # {tiingo_symbol: [input symbols]}
+        now = time.time()
+        with _forex_cache_lock:
+            for symbol in symbols or []:
+                if not symbol or symbol in result:
+                    continue
+                cached = _forex_cache.get(f"ticker_{symbol}")
+                if cached and now - cached.get('_cache_time', 0) < _FOREX_CACHE_TTL:
+                    result[symbol] = cached
+                    continue
+                tiingo_symbol = self.SYMBOL_MAP.get(symbol) or symbol.lower()
+                pending.setdefault(tiingo_symbol, []).append(symbol)
+                result[symbol] = {'last': 0, 'symbol': symbol}
+        
+        if len(pending) > 1:
+            try:
+                url = f"{self.base_url}/fx/top"
+                params = {
+                    'tickers': ','.join(pending.keys()),
+                    'token': api_key
+                }
+                response = requests.get(url, params=params, timeout=TiingoConfig.TIMEOUT)
+                if response.status_code == 200:
+                    for item in response.json() or []:
+                        tiingo_symbol = str(item.get('ticker') or '').lower()
+                        inputs = pending.get(tiingo_symbol)
+                        if not inputs:
+                            continue
+                        ticker = self._build_ticker(item, tiingo_symbol, api_key)
+                        with _forex_cache_lock:
+                            for symbol in inputs:
+                                _forex_cache[f"ticker_{symbol}"] = ticker
+                                result[symbol] = ticker
+                else:
+                    logger.warning(f"Tiingo batch ticker request failed: HTTP {response.status_code}")
+            except Exception as e:
+                logger.debug(f"Tiingo batch ticker request failed, falling back to per-symbol: {e}")
+        
+        for symbol, ticker in result.items():
+            if not ticker.get('last'):
+                result[symbol] = self.get_ticker(symbol)
+        return result
+    
+    def _build_ticker(self, item: Dict[str, Any], tiingo_symbol: str, api_key: str) -> Dict[str, Any]:
+        """将 Tiingo FX top 数据转换为统一 ticker 格式"""
+        # Tiingo FX top returns: ticker, quoteTimestamp, bidPrice, bidSize, askPrice, askSize, midPrice
+        bid = float(item.get('bidPrice', 0) or 0)
+        ask = float(item.get('askPrice', 0) or 0)
+        mid = float(item.get('midPrice', 0) or 0)
+        
+        # 如果没有 midPrice，计算中间价
+        if not mid and bid and ask:
+            mid = (bid + ask) / 2
+        
+        last_price = mid or bid or ask
+        
+        change = 0
+        change_pct = 0
+        prev_close = self._get_prev_close(tiingo_symbol, api_key)
+        if prev_close and last_price:
+            change = last_price - prev_close
+            change_pct = (change / prev_close) * 100
+        
+        return {
+            'last': round(last_price, 5),
+            'bid': round(bid, 5),
+            'ask': round(ask, 5),
+            'change': round(change, 5),
+            'changePercent': round(change_pct, 2),
+            'previousClose': round(prev_close, 5) if prev_close else 0,
+            '_cache_time': time.time()
+        }
+    
+    def _get_prev_close(self, tiingo_symbol: str, api_key: str) -> float:
+        """获取昨日收盘价（日线收盘价一天只变一次，单独缓存较长时间）"""
+        cache_key = f"prev_close_{tiingo_symbol}"
+        with _forex_cache_lock:
+            cached = _forex_cache.get(cache_key)
+            if cached and time.time() - cached.get('_cache_time', 0) < _FOREX_PREV_CLOSE_TTL:
+                return cached.get('close', 0)
+        
+        prev_close = 0
+        try:
+            yesterday = (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d')
+            today = datetime.now().strftime('%Y-%m-%d')
+            price_url = f"{self.base_url}/fx/{tiingo_symbol}/prices"
+            price_params = {
+                'startDate': yesterday,
+                'endDate': today,
+                'resampleFreq': '1day',
+                'token': api_key
+            }
+            price_resp = requests.get(price_url, params=price_params, timeout=TiingoConfig.TIMEOUT)
+            if price_resp.status_code == 200:
+                price_data = price_resp.json()
+                if price_data and len(price_data) > 0:
+                    prev_close = float(price_data[-1].get('close', 0) or 0)
+        except Exception:
+            pass  # 涨跌计算失败不影响主要功能
+        
+        if prev_close:
+            with _forex_cache_lock:
+                _forex_cache[cache_key] = {'close': prev_close, '_cache_time': time.time()}
+        return prev_close
+    
     def _get_timeframe_seconds(self, timeframe: str) -> int:
         """获取时间周期对应的秒数"""
         return TIMEFRAME_SECONDS.get(timeframe, 86400)
@@ -2,6 +2,7 @@
 Polymarket预测市场数据源
 从Polymarket获取预测市场数据
 """
+import re
 import time
 import requests
 import json
@@ -10,9 +11,12 @@ from datetime import datetime, timedelta
 
 from app.utils.logger import get_logger
 from app.utils.db import get_db_connection
+from app.utils.text_search import keyword_query, escape_like
 
 logger = get_logger(__name__)
 
+_SLUG_INVALID_CHARS = re.compile(r'[^a-zA-Z0-9\-]')
+
 
 class PolymarketDataSource:
     """Polymarket预测市场数据源"""
@@ -197,28 +201,19 @@ class PolymarketDataSource:
                             ORDER BY volume_24h DESC
                             LIMIT %s
                         """, (keyword, limit))
-                    elif has_hyphens:
-                        # 如果包含连字符，可能是slug，优先匹配slug
-                        cur.execute("""
-                            SELECT market_id, question, category, current_probability, 
-                                   volume_24h, liquidity, end_date_iso, status, slug
-                            FROM qd_polymarket_markets
-                            WHERE (slug ILIKE %s OR question ILIKE %s) AND status = 'active'
-                            ORDER BY 
-                                CASE WHEN slug ILIKE %s THEN 1 ELSE 2 END,
-                                volume_24h DESC
-                            LIMIT %s
-                        """, (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%", limit))
                     else:
-                        # 普通文本搜索
-                        cur.execute("""
+                        # 文本/slug搜索：trigram 索引过滤 + 相关度排序；含连字符时 slug 匹配优先
+                        q = keyword_query(["question", "slug"], keyword)
+                        slug_first = "CASE WHEN slug ILIKE ? THEN 1 ELSE 2 END, " if has_hyphens else ""
+                        slug_params = [f"%{escape_like(keyword)}%"] if has_hyphens else []
+                        cur.execute(f"""
                             SELECT market_id, question, category, current_probability, 
                                    volume_24h, liquidity, end_date_iso, status, slug
                             FROM qd_polymarket_markets
-                            WHERE (question ILIKE %s OR slug ILIKE %s) AND status = 'active'
-                            ORDER BY volume_24h DESC
-                            LIMIT %s
-                        """, (f"%{keyword}%", f"%{keyword}%", limit))
+                            WHERE {q.where_sql} AND status = 'active'
+                            ORDER BY {slug_first}{q.rank_sql} DESC, volume_24h DESC
+                            LIMIT ?
+                        """, (*q.where_params, *slug_params, *q.rank_params, limit))
                     
                     rows = cur.fetchall()
                     cur.close()
@@ -242,7 +237,6 @@ class PolymarketDataSource:
             logger.info(f"Fetching from API for keyword '{keyword}' (use_cache={use_cache})...")
             
             # 优化：如果关键词看起来像slug，先尝试直接查询（避免全量获取）
-            import re
             keyword_lower = keyword.lower().strip()
             is_slug_like = '-' in keyword_lower and not keyword_lower.isdigit()
             
@@ -937,15 +931,9 @@ class PolymarketDataSource:
         Returns:
             Polymarket URL字符串
         """
-        if slug:
-            slug_str = str(slug).strip()
-            # 检查slug是否有效（不是数字，且包含字母或连字符）
-            if slug_str and not slug_str.isdigit() and ('-' in slug_str or any(c.isalpha() for c in slug_str)):
-                import re
-                slug_clean = re.sub(r'[^a-zA-Z0-9\-]', '-', slug_str)
-                slug_clean = slug_clean.strip('-')
-                if slug_clean:
-                    return f"https://polymarket.com/event/{slug_clean}"
+        slug_clean = self._clean_slug(slug)
+        if slug_clean:
+            return f"https://polymarket.com/event/{slug_clean}"
         
         # 如果没有有效slug，尝试通过API获取slug
         if market_id:
@@ -953,29 +941,17 @@ class PolymarketDataSource:
                 detail_market = self._fetch_market_detail_by_id(market_id)
                 if detail_market:
                     # 尝试从detail中获取slug
-                    event_slug = detail_market.get('slug')
-                    if event_slug:
-                        slug_str = str(event_slug).strip()
-                        if slug_str and not slug_str.isdigit() and ('-' in slug_str or any(c.isalpha() for c in slug_str)):
-                            import re
-                            slug_clean = re.sub(r'[^a-zA-Z0-9\-]', '-', slug_str)
-                            slug_clean = slug_clean.strip('-')
-                            if slug_clean:
-                                return f"https://polymarket.com/event/{slug_clean}"
+                    slug_clean = self._clean_slug(detail_market.get('slug'))
+                    if slug_clean:
+                        return f"https://polymarket.com/event/{slug_clean}"
                     
                     # 如果event没有slug，尝试从markets中获取
                     markets = detail_market.get('markets', [])
                     if markets:
                         for m in markets:
-                            market_slug = m.get('slug')
-                            if market_slug:
-                                slug_str = str(market_slug).strip()
-                                if slug_str and not slug_str.isdigit() and ('-' in slug_str or any(c.isalpha() for c in slug_str)):
-                                    import re
-                                    slug_clean = re.sub(r'[^a-zA-Z0-9\-]', '-', slug_str)
-                                    slug_clean = slug_clean.strip('-')
-                                    if slug_clean:
-                                        return f"https://polymarket.com/event/{slug_clean}"
+                            slug_clean = self._clean_slug(m.get('slug'))
+                            if slug_clean:
+                                return f"https://polymarket.com/event/{slug_clean}"
             except Exception as e:
                 logger.debug(f"Failed to fetch slug for market {market_id}: {e}")
         
@@ -1163,54 +1139,60 @@ class PolymarketDataSource:
             logger.error(f"Failed to fetch market {market_id}: {e}", exc_info=True)
             return None
     
+    @staticmethod
+    def _clean_slug(slug) -> Optional[str]:
+        """清理slug，只保留字母数字和连字符；数字、空值或不含字母/连字符的值不是有效的slug，返回None"""
+        slug = str(slug or '').strip()
+        if not slug or slug.isdigit() or not ('-' in slug or any(c.isalpha() for c in slug)):
+            return None
+        slug = _SLUG_INVALID_CHARS.sub('-', slug).strip('-')
+        if not slug or slug.isdigit():
+            return None
+        return slug
+
     def _save_markets_to_db(self, markets: List[Dict]):
-        """保存市场数据到数据库"""
+        """保存市场数据到数据库（单条多行 upsert，按 market_id 去重）"""
+        rows = {}
+        for market in markets or []:
+            market_id = market.get('market_id')
+            if not market_id:
+                continue
+            # 同一语句内 ON CONFLICT 不能更新同一行两次，保留最后一条
+            rows[market_id] = (
+                market_id,
+                market.get('question'),
+                market.get('category', 'other'),
+                market.get('current_probability', 50.0),
+                market.get('volume_24h', 0),
+                market.get('liquidity', 0),
+                market.get('end_date_iso'),
+                market.get('status', 'active'),
+                json.dumps(market.get('outcome_tokens', {})),
+                self._clean_slug(market.get('slug')),
+            )
+        if not rows:
+            return
+
         try:
             with get_db_connection() as db:
                 cur = db.cursor()
-                for market in markets:
-                    # 获取slug，但如果是数字则不要使用（数字不是有效的slug）
-                    slug = market.get('slug') or None
-                    # 如果slug是数字，说明不是有效的slug，设置为None
-                    if slug and str(slug).isdigit():
-                        slug = None
-                    # 清理slug，只保留字母数字和连字符
-                    import re
-                    if slug:
-                        slug = re.sub(r'[^a-zA-Z0-9\-]', '-', str(slug))
-                        slug = slug.strip('-')
-                        # 如果清理后为空或仍然是数字，设置为None
-                        if not slug or slug.isdigit():
-                            slug = None
-                    
-                    cur.execute("""
-                        INSERT INTO qd_polymarket_markets
-                        (market_id, question, category, current_probability, volume_24h,
-                         liquidity, end_date_iso, status, outcome_tokens, slug, updated_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                        ON CONFLICT (market_id) DO UPDATE SET
-                            question = EXCLUDED.question,
-                            category = EXCLUDED.category,
-                            current_probability = EXCLUDED.current_probability,
-                            volume_24h = EXCLUDED.volume_24h,
-                            liquidity = EXCLUDED.liquidity,
-                            end_date_iso = EXCLUDED.end_date_iso,
-                            status = EXCLUDED.status,
-                            outcome_tokens = EXCLUDED.outcome_tokens,
-                            slug = EXCLUDED.slug,
-                            updated_at = NOW()
-                    """, (
-                        market.get('market_id'),
-                        market.get('question'),
-                        market.get('category', 'other'),
-                        market.get('current_probability', 50.0),
-                        market.get('volume_24h', 0),
-                        market.get('liquidity', 0),
-                        market.get('end_date_iso'),
-                        market.get('status', 'active'),
-                        json.dumps(market.get('outcome_tokens', {})),
-                        slug
-                    ))
+                cur.execute_values("""
+                    INSERT INTO qd_polymarket_markets
+                    (market_id, question, category, current_probability, volume_24h,
+                     liquidity, end_date_iso, status, outcome_tokens, slug, updated_at)
+                    VALUES %s
+                    ON CONFLICT (market_id) DO UPDATE SET
+                        question = EXCLUDED.question,
+                        category = EXCLUDED.category,
+                        current_probability = EXCLUDED.current_probability,
+                        volume_24h = EXCLUDED.volume_24h,
+                        liquidity = EXCLUDED.liquidity,
+                        end_date_iso = EXCLUDED.end_date_iso,
+                        status = EXCLUDED.status,
+                        outcome_tokens = EXCLUDED.outcome_tokens,
+                        slug = EXCLUDED.slug,
+                        updated_at = NOW()
+                """, list(rows.values()), template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())")
                 db.commit()
                 cur.close()
         except Exception as e:
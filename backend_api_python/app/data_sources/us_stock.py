@@ -161,7 +161,76 @@ class USStockDataSource(BaseDataSource):
             logger.error(f"Failed to get ticker for {symbol}: {e}")
         
         return {'last': 0, 'symbol': symbol}
-    
+
+    def get_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取美股报价
+
+        使用 yfinance 多标的下载（一次请求获取最近几个交易日的日线），
+        未返回数据的标的降级为逐个 get_ticker。
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        yf_symbols = {}
+        for symbol in symbols or []:
+            sym = (symbol or '').strip().upper()
+            if not sym or symbol in result:
+                continue
+            yf_symbols.setdefault(sym, []).append(symbol)
+            result[symbol] = {'last': 0, 'symbol': symbol}
+
+        if len(yf_symbols) > 1:
+            try:
+                df = yf.download(
+                    tickers=list(yf_symbols.keys()),
+                    period='5d',
+                    interval='1d',
+                    group_by='ticker',
+                    auto_adjust=False,
+                    threads=True,
+                    progress=False
+                )
+                if df is not None and not df.empty:
+                    for sym, inputs in yf_symbols.items():
+                        ticker = self._ticker_from_daily_frame(df, sym)
+                        if ticker:
+                            for symbol in inputs:
+                                result[symbol] = ticker
+            except Exception as e:
+                logger.debug(f"yfinance batch download failed, falling back to per-symbol: {e}")
+
+        for symbol, ticker in result.items():
+            if not ticker.get('last'):
+                result[symbol] = self.get_ticker(symbol)
+        return result
+
+    def _ticker_from_daily_frame(self, df, sym: str) -> Optional[Dict[str, Any]]:
+        """从 yf.download(group_by='ticker') 的结果中提取单个标的的报价"""
+        try:
+            if hasattr(df.columns, 'levels') and sym in df.columns.get_level_values(0):
+                sub = df[sym]
+            else:
+                return None
+            sub = sub.dropna(subset=['Close'])
+            if sub.empty:
+                return None
+            last_row = sub.iloc[-1]
+            last_price = float(last_row['Close'])
+            prev_close = float(sub.iloc[-2]['Close']) if len(sub) > 1 else float(last_row['Open'])
+            change = last_price - prev_close if prev_close else 0
+            change_pct = (change / prev_close * 100) if prev_close else 0
+            return {
+                'last': last_price,
+                'change': round(change, 4),
+                'changePercent': round(change_pct, 2),
+                'high': float(last_row['High']),
+                'low': float(last_row['Low']),
+                'open': float(last_row['Open']),
+                'previousClose': prev_close
+            }
+        except Exception as e:
+            logger.debug(f"Failed to parse yfinance batch row for {sym}: {e}")
+            return None
+
     def get_kline(
         self,
         symbol: str,
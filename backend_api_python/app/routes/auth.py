@@ -8,7 +8,7 @@ import os
 from flask import Blueprint, request, jsonify, g, redirect
 from urllib.parse import urlencode
 from app.config.settings import Config
-from app.utils.auth import generate_token, login_required, authenticate_legacy
+from app.utils.auth import generate_token, login_required, authenticate_legacy, verify_token
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -763,7 +763,8 @@ def reset_password():
             return jsonify({'code': 0, 'msg': 'User not found', 'data': None}), 404
         
         # Update password
-        success = user_service.update_password(user['id'], new_password)
+        # Forgot-password flow: also revoke any existing sessions
+        success = user_service.update_password(user['id'], new_password, revoke_sessions=True)
         if not success:
             return jsonify({'code': 0, 'msg': 'Failed to reset password', 'data': None}), 500
         
@@ -1025,7 +1026,20 @@ def oauth_github_callback():
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
-    """Logout (client removes token; server is stateless)."""
+    """
+    Logout. The client removes its token; if a valid token is presented,
+    token_version is bumped so that token is rejected server-side as well.
+    """
+    auth_header = request.headers.get('Authorization') or ''
+    parts = auth_header.split()
+    if len(parts) == 2 and parts[0].lower() == 'bearer':
+        payload = verify_token(parts[1])
+        if payload and payload.get('user_id'):
+            try:
+                from app.services.user_service import get_user_service
+                get_user_service().increment_token_version(payload['user_id'])
+            except Exception as e:
+                logger.warning(f"Failed to revoke token on logout: {e}")
     return jsonify({'code': 1, 'msg': 'Logout successful', 'data': None})
 
 
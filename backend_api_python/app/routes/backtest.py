@@ -1,17 +1,28 @@
 """
 Backtest API routes
 """
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g
 from datetime import datetime
 import traceback
+import hashlib
 import json
+import threading
 import time
 import os
+from collections import OrderedDict
 
 from app.services.backtest import BacktestService
+from app.services.backtest_jobs import BacktestQueueFull, get_backtest_job_manager
+from app.services.backtest_store import (
+    METRIC_COLUMNS,
+    ensure_backtest_run_schema,
+    load_result,
+    metrics_from_row,
+)
 from app.utils.logger import get_logger
 from app.utils.db import get_db_connection
 from app.utils.auth import login_required
+from app.utils.json_stream import stream_json
 import requests
 
 logger = get_logger(__name__)
@@ -122,12 +133,205 @@ def get_precision_info():
         return jsonify({'code': 0, 'msg': str(e)}), 400
 
 
+def _parse_backtest_request(data: dict, user_id: int) -> dict:
+    """
+    Validate a backtest request body and return normalized job params.
+
+    Raises:
+        ValueError: missing/invalid parameters
+    """
+    indicator_code = data.get('indicatorCode', '')
+    indicator_id = data.get('indicatorId')
+    symbol = data.get('symbol', '')
+    market = data.get('market', '')
+    timeframe = data.get('timeframe', '1D')
+    start_date_str = data.get('startDate', '')
+    end_date_str = data.get('endDate', '')
+    # 多时间框架回测开关（默认开启，仅加密货币市场有效）
+    enable_mtf = data.get('enableMtf', True)
+    if isinstance(enable_mtf, str):
+        enable_mtf = enable_mtf.lower() in ['true', '1', 'yes']
+
+    # If frontend only provides indicatorId, load code from local DB.
+    if (not indicator_code or not str(indicator_code).strip()) and indicator_id:
+        try:
+            iid = int(indicator_id)
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute("SELECT code FROM qd_indicator_codes WHERE id = ?", (iid,))
+                row = cur.fetchone()
+                cur.close()
+            if row and row.get('code'):
+                indicator_code = row.get('code')
+        except Exception:
+            pass
+
+    # 参数验证
+    if not all([indicator_code, symbol, market, timeframe, start_date_str, end_date_str]):
+        raise ValueError('Missing required parameters')
+
+    # 转换日期（开始日期 00:00:00，结束日期 23:59:59）
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+
+    # 验证时间范围限制
+    days_diff = (end_date - start_date).days
+
+    # 根据周期设置不同的时间限制
+    if timeframe == '1m':
+        max_days = 30  # 1分钟K线最多1个月
+        max_range_text = '1 month'
+    elif timeframe == '5m':
+        max_days = 180  # 5分钟K线最多6个月
+        max_range_text = '6 months'
+    elif timeframe in ['15m', '30m']:
+        max_days = 365  # 15分钟和30分钟K线最多1年
+        max_range_text = '1 year'
+    else:  # 1H, 4H, 1D, 1W
+        max_days = 1095  # 1小时及以上最多3年
+        max_range_text = '3 years'
+
+    if days_diff > max_days:
+        raise ValueError(
+            f'Backtest range exceeds limit: timeframe {timeframe} supports up to {max_range_text} '
+            f'({max_days} days), but you selected {days_diff} days'
+        )
+
+    return {
+        'user_id': user_id,
+        'indicator_id': int(indicator_id) if indicator_id not in (None, '') else None,
+        'indicator_code': indicator_code,
+        'market': market,
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'start_date': start_date_str,
+        'end_date': end_date_str,
+        'initial_capital': float(data.get('initialCapital', 10000)),
+        'commission': float(data.get('commission', 0.001)),
+        'slippage': float(data.get('slippage', 0.0)),
+        'leverage': int(data.get('leverage', 1)),
+        'trade_direction': data.get('tradeDirection', 'long'),  # long, short, both
+        'strategy_config': data.get('strategyConfig') or {},
+        'enable_mtf': bool(enable_mtf),
+    }
+
+
+def _job_to_dict(job: dict) -> dict:
+    try:
+        params = json.loads(job.get('params_json') or '{}')
+    except Exception:
+        params = {}
+    try:
+        # {phase, processed, total, trades, equity} of the latest progress report
+        detail = json.loads(job.get('progress_detail') or '{}')
+    except Exception:
+        detail = {}
+    try:
+        # Robustness jobs keep their (small) result in the job row
+        result = json.loads(job.get('result_json') or 'null')
+    except Exception:
+        result = None
+    return {
+        'jobId': job.get('id'),
+        'kind': job.get('kind') or 'backtest',
+        'status': job.get('status'),
+        'progress': int(job.get('progress') or 0),
+        'message': job.get('message') or '',
+        'progressDetail': detail,
+        'cancelRequested': bool(job.get('cancel_requested')),
+        'runId': job.get('run_id'),
+        'errorType': job.get('error_type') or '',
+        'error': job.get('error_message') or '',
+        'params': params,
+        'result': result,
+        'createdAt': job.get('created_at'),
+        'startedAt': job.get('started_at'),
+        'finishedAt': job.get('finished_at'),
+    }
+
+
+def _load_run_result(run_id: int, user_id: int):
+    ensure_backtest_run_schema()
+    with get_db_connection() as db:
+        cur = db.cursor()
+        cur.execute(
+            """
+            SELECT result_json, result_summary, result_detail
+            FROM qd_backtest_runs
+            WHERE id = ? AND user_id = ?
+            """,
+            (run_id, user_id),
+        )
+        row = cur.fetchone()
+        cur.close()
+    return load_result(row, include_detail=True) if row else None
+
+
+# Decoded trade lists of recently paged runs: {(user_id, run_id): (loaded_at, trades)}.
+# A run's trades are stored inside its compressed result, so without this every page of
+# /backtest/trades would decompress and parse the whole result again.
+_TRADES_CACHE_SIZE = max(0, int(os.getenv('BACKTEST_TRADES_CACHE_RUNS', '4')))
+_TRADES_CACHE_TTL_SEC = float(os.getenv('BACKTEST_TRADES_CACHE_TTL_SEC', '120'))
+_trades_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_trades_cache_lock = threading.Lock()
+
+
+def _load_run_trades(run_id: int, user_id: int):
+    """Trades of a run (None if not found), cached per process for a paging session."""
+    key = (int(user_id), int(run_id))
+    now = time.time()
+    with _trades_cache_lock:
+        item = _trades_cache.get(key)
+        if item and now - item[0] <= _TRADES_CACHE_TTL_SEC:
+            _trades_cache.move_to_end(key)
+            return item[1]
+    result = _load_run_result(run_id, user_id)
+    if result is None:
+        return None
+    trades = result.get('trades') or []
+    if _TRADES_CACHE_SIZE:
+        with _trades_cache_lock:
+            _trades_cache[key] = (now, trades)
+            _trades_cache.move_to_end(key)
+            while len(_trades_cache) > _TRADES_CACHE_SIZE:
+                _trades_cache.popitem(last=False)
+    return trades
+
+
+def _page_trades(result: dict, cursor: int, limit: int) -> dict:
+    """
+    Slice result['trades'] in place to one page (cursor = index of the first trade).
+
+    Adds tradesTotal / tradesNextCursor; the trades keep their chronological order.
+    """
+    trades = result.get('trades') or []
+    start = max(0, int(cursor or 0))
+    end = start + limit
+    result['trades'] = trades[start:end]
+    result['tradesTotal'] = len(trades)
+    result['tradesNextCursor'] = end if end < len(trades) else None
+    return result
+
+
+def _trades_page_args():
+    """(cursor, limit) from tradesCursor / tradesLimit; limit None = all trades."""
+    limit = request.args.get('tradesLimit', type=int)
+    cursor = request.args.get('tradesCursor', type=int)
+    if not limit and cursor is None:
+        return 0, None
+    return max(0, cursor or 0), max(1, min(int(limit or 1000), 10000))
+
+
 @backtest_bp.route('/backtest', methods=['POST'])
 @login_required
 def run_backtest():
     """
     Run indicator backtest for the current user.
-    
+
+    The backtest runs in the backtest job pool (separate processes). With async=true the job id is
+    returned immediately (poll /backtest/jobs/<jobId>); otherwise the request waits for the job
+    and responds with the result as before.
+
     Params:
         indicatorId: Indicator ID (optional)
         indicatorCode: Indicator Python code
@@ -139,6 +343,7 @@ def run_backtest():
         initialCapital: Initial capital (default 10000)
         commission: Commission rate (default 0.001)
         enableMtf: Enable multi-timeframe backtest (default true, only for crypto)
+        async: Return the job id without waiting (default false)
     """
     try:
         data = request.get_json()
@@ -148,171 +353,53 @@ def run_backtest():
                 'msg': 'Request body is required',
                 'data': None
             }), 400
-        
-        # Extract params - use current user's ID
+
+        # Use current user's ID
         user_id = g.user_id
-        indicator_code = data.get('indicatorCode', '')
-        indicator_id = data.get('indicatorId')
-        symbol = data.get('symbol', '')
-        market = data.get('market', '')
-        timeframe = data.get('timeframe', '1D')
-        start_date_str = data.get('startDate', '')
-        end_date_str = data.get('endDate', '')
-        initial_capital = float(data.get('initialCapital', 10000))
-        commission = float(data.get('commission', 0.001))
-        slippage = float(data.get('slippage', 0.0))
-        leverage = int(data.get('leverage', 1))
-        trade_direction = data.get('tradeDirection', 'long')  # long, short, both
-        strategy_config = data.get('strategyConfig') or {}
-        # 多时间框架回测开关（默认开启，仅加密货币市场有效）
-        enable_mtf = data.get('enableMtf', True)
-        if isinstance(enable_mtf, str):
-            enable_mtf = enable_mtf.lower() in ['true', '1', 'yes']
-        
-        # (Debug) log received params if needed
-        
-        # If frontend only provides indicatorId, load code from local DB.
-        if (not indicator_code or not str(indicator_code).strip()) and indicator_id:
-            try:
-                iid = int(indicator_id)
-                with get_db_connection() as db:
-                    cur = db.cursor()
-                    cur.execute("SELECT code FROM qd_indicator_codes WHERE id = ?", (iid,))
-                    row = cur.fetchone()
-                    cur.close()
-                if row and row.get('code'):
-                    indicator_code = row.get('code')
-            except Exception:
-                pass
+        params = _parse_backtest_request(data, user_id)
+        run_async = data.get('async', False)
+        if isinstance(run_async, str):
+            run_async = run_async.lower() in ['true', '1', 'yes']
 
-        # 参数验证
-        if not all([indicator_code, symbol, market, timeframe, start_date_str, end_date_str]):
-            return jsonify({
-                'code': 0,
-                'msg': 'Missing required parameters',
-                'data': None
-            }), 400
-        
-        # 转换日期
-        # 开始日期：当天的 00:00:00
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        # 结束日期：当天的 23:59:59，确保包含整天的数据
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-        
-        # 验证时间范围限制
-        days_diff = (end_date - start_date).days
-        
-        # 根据周期设置不同的时间限制
-        if timeframe == '1m':
-            max_days = 30  # 1分钟K线最多1个月
-            max_range_text = '1 month'
-        elif timeframe == '5m':
-            max_days = 180  # 5分钟K线最多6个月
-            max_range_text = '6 months'
-        elif timeframe in ['15m', '30m']:
-            max_days = 365  # 15分钟和30分钟K线最多1年
-            max_range_text = '1 year'
-        else:  # 1H, 4H, 1D, 1W
-            max_days = 1095  # 1小时及以上最多3年
-            max_range_text = '3 years'
-        
-        if days_diff > max_days:
+        manager = get_backtest_job_manager()
+        job_id, deduplicated = manager.submit(params)
+
+        if run_async:
             return jsonify({
-                'code': 0,
-                'msg': f'Backtest range exceeds limit: timeframe {timeframe} supports up to {max_range_text} ({max_days} days), but you selected {days_diff} days',
-                'data': None
-            }), 400
-        
-        
-        # 执行回测（支持多时间框架高精度回测）
-        # 加密货币市场且启用MTF时，使用多时间框架回测
-        if enable_mtf and market.lower() in ['crypto', 'cryptocurrency']:
-            result = backtest_service.run_multi_timeframe(
-                indicator_code=indicator_code,
-                market=market,
-                symbol=symbol,
-                timeframe=timeframe,
-                start_date=start_date,
-                end_date=end_date,
-                initial_capital=initial_capital,
-                commission=commission,
-                slippage=slippage,
-                leverage=leverage,
-                trade_direction=trade_direction,
-                strategy_config=strategy_config,
-                enable_mtf=True
-            )
-        else:
-            result = backtest_service.run(
-                indicator_code=indicator_code,
-                market=market,
-                symbol=symbol,
-                timeframe=timeframe,
-                start_date=start_date,
-                end_date=end_date,
-                initial_capital=initial_capital,
-                commission=commission,
-                slippage=slippage,
-                leverage=leverage,
-                trade_direction=trade_direction,
-                strategy_config=strategy_config
-            )
-            # 添加标准回测的精度信息
-            result['precision_info'] = {
-                'enabled': False,
-                'timeframe': timeframe,
-                'precision': 'standard',
-                'message': '使用标准K线回测'
-            }
+                'code': 1,
+                'msg': 'Backtest submitted',
+                'data': {'jobId': job_id, 'status': 'queued', 'deduplicated': deduplicated}
+            })
 
-        # Persist backtest run for AI optimization / history
-        run_id = None
-        try:
-            with get_db_connection() as db:
-                cur = db.cursor()
-                cur.execute(
-                    """
-                    INSERT INTO qd_backtest_runs
-                    (user_id, indicator_id, market, symbol, timeframe, start_date, end_date,
-                     initial_capital, commission, slippage, leverage, trade_direction,
-                     strategy_config, status, error_message, result_json, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW())
-                    """,
-                    (
-                        user_id,
-                        int(indicator_id) if indicator_id is not None else None,
-                        market,
-                        symbol,
-                        timeframe,
-                        start_date_str,
-                        end_date_str,
-                        initial_capital,
-                        commission,
-                        slippage,
-                        leverage,
-                        trade_direction,
-                        json.dumps(strategy_config or {}, ensure_ascii=False),
-                        'success',
-                        '',
-                        json.dumps(result or {}, ensure_ascii=False)
-                    )
-                )
-                run_id = cur.lastrowid
-                db.commit()
-                cur.close()
-        except Exception:
-            # Do not break the main backtest response if persistence fails.
-            logger.warning("Failed to persist backtest run", exc_info=True)
-        
+        # Legacy synchronous mode: wait for the job (CPU work stays in the job pool)
+        job = manager.wait(job_id, user_id, timeout_sec=float(os.getenv('BACKTEST_SYNC_WAIT_SEC', '590')))
+        status = (job or {}).get('status')
+        if status == 'success':
+            run_id = job.get('run_id')
+            return stream_json({
+                'code': 1,
+                'msg': 'Backtest succeeded',
+                'data': {
+                    'runId': run_id,
+                    'result': _load_run_result(int(run_id), user_id) if run_id else None
+                }
+            })
+        if status == 'failed':
+            err = job.get('error_message') or 'failed'
+            if job.get('error_type') == 'invalid':
+                return jsonify({'code': 0, 'msg': err, 'data': None}), 400
+            return jsonify({'code': 0, 'msg': f'Backtest failed: {err}', 'data': None}), 500
+        if status == 'cancelled':
+            return jsonify({'code': 0, 'msg': 'Backtest cancelled', 'data': {'jobId': job_id, 'status': status}}), 409
+        # Still running: let the client poll instead of holding the worker
         return jsonify({
-            'code': 1,
-            'msg': 'Backtest succeeded',
-            'data': {
-                'runId': run_id,
-                'result': result
-            }
-        })
-        
+            'code': 0,
+            'msg': 'Backtest is still running',
+            'data': {'jobId': job_id, 'status': status}
+        }), 202
+
+    except BacktestQueueFull as e:
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 429
     except ValueError as e:
         logger.warning(f"Invalid backtest parameters: {str(e)}")
         return jsonify({
@@ -323,44 +410,6 @@ def run_backtest():
     except Exception as e:
         logger.error(f"Backtest failed: {str(e)}")
         logger.error(traceback.format_exc())
-        # Best-effort persist failed run (if we have enough context)
-        try:
-            data = data if isinstance(data, dict) else {}
-            user_id = g.user_id
-            indicator_id = data.get('indicatorId')
-            with get_db_connection() as db:
-                cur = db.cursor()
-                cur.execute(
-                    """
-                    INSERT INTO qd_backtest_runs
-                    (user_id, indicator_id, market, symbol, timeframe, start_date, end_date,
-                     initial_capital, commission, slippage, leverage, trade_direction,
-                     strategy_config, status, error_message, result_json, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW())
-                    """,
-                    (
-                        user_id,
-                        int(indicator_id) if indicator_id is not None else None,
-                        str(data.get('market', '') or ''),
-                        str(data.get('symbol', '') or ''),
-                        str(data.get('timeframe', '') or ''),
-                        str(data.get('startDate', '') or ''),
-                        str(data.get('endDate', '') or ''),
-                        float(data.get('initialCapital', 0) or 0),
-                        float(data.get('commission', 0) or 0),
-                        float(data.get('slippage', 0) or 0),
-                        int(data.get('leverage', 1) or 1),
-                        str(data.get('tradeDirection', 'long') or 'long'),
-                        json.dumps(data.get('strategyConfig') or {}, ensure_ascii=False),
-                        'failed',
-                        str(e),
-                        ''
-                    )
-                )
-                db.commit()
-                cur.close()
-        except Exception:
-            pass
         return jsonify({
             'code': 0,
             'msg': f'Backtest failed: {str(e)}',
@@ -368,6 +417,244 @@ def run_backtest():
         }), 500
 
 
+@backtest_bp.route('/backtest/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_backtest_job(job_id: int):
+    """
+    Poll a backtest job of the current user.
+
+    Params (Query String):
+        includeResult: Include the full result once the job succeeded (default false)
+    """
+    try:
+        user_id = g.user_id
+        job = get_backtest_job_manager().get_job(job_id, user_id)
+        if not job:
+            return jsonify({'code': 0, 'msg': 'Job not found', 'data': None}), 404
+        out = _job_to_dict(job)
+        include_result = str(request.args.get('includeResult') or '').lower() in ['true', '1', 'yes']
+        if include_result and out['kind'] == 'backtest' and job.get('status') == 'success' and job.get('run_id'):
+            out['result'] = _load_run_result(int(job['run_id']), user_id)
+        return jsonify({'code': 1, 'msg': 'OK', 'data': out})
+    except Exception as e:
+        logger.error(f"get_backtest_job failed: {e}")
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
+@backtest_bp.route('/backtest/jobs/<int:job_id>/stream', methods=['GET'])
+@login_required
+def stream_backtest_job(job_id: int):
+    """
+    SSE stream of a backtest job's progress.
+
+    Sends `id: <snapshot>` + `data: {job}` whenever the job row changes. Each connection is
+    held for at most BACKTEST_SSE_MAX_SEC (a sync gunicorn worker is pinned meanwhile); the
+    stream then ends without [DONE] and EventSource reconnects after `retry`, sending
+    Last-Event-ID so an unchanged job is not sent again. `data: [DONE]` follows once the job
+    finished (success/failed/cancelled). Clients that cannot reconnect should poll
+    GET /backtest/jobs/<jobId> instead.
+    """
+    user_id = g.user_id
+    manager = get_backtest_job_manager()
+    if not manager.get_job(job_id, user_id):
+        return jsonify({'code': 0, 'msg': 'Job not found', 'data': None}), 404
+    max_sec = float(os.getenv('BACKTEST_SSE_MAX_SEC', '45'))
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or None
+
+    def stream():
+        deadline = time.time() + max_sec
+        last = last_event_id
+        yield "retry: 1000\n\n"
+        while True:
+            job = manager.get_job(job_id, user_id)
+            if not job:
+                break
+            out = _job_to_dict(job)
+            snapshot = json.dumps(
+                [out['status'], out['progress'], out['message'], out['progressDetail']],
+                sort_keys=True, default=str,
+            )
+            event_id = hashlib.sha1(snapshot.encode('utf-8')).hexdigest()[:16]
+            if event_id != last:
+                last = event_id
+                yield f"id: {event_id}\ndata: " + json.dumps(out, ensure_ascii=False, default=str) + "\n\n"
+            if out['status'] in ('success', 'failed', 'cancelled'):
+                break
+            if time.time() >= deadline:
+                # Release the worker; the client reconnects with Last-Event-ID
+                return
+            time.sleep(1.0)
+        yield "data: [DONE]\n\n"
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@backtest_bp.route('/backtest/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_backtest_job(job_id: int):
+    """
+    Cancel a backtest job of the current user.
+
+    A queued job is cancelled at once; a running job stops at the next progress check
+    (within ~1% of the simulation).
+    """
+    try:
+        job = get_backtest_job_manager().cancel(job_id, g.user_id)
+        if not job:
+            return jsonify({'code': 0, 'msg': 'Job not found', 'data': None}), 404
+        return jsonify({'code': 1, 'msg': 'OK', 'data': _job_to_dict(job)})
+    except Exception as e:
+        logger.error(f"cancel_backtest_job failed: {e}")
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
+@backtest_bp.route('/backtest/jobs', methods=['GET'])
+@login_required
+def list_backtest_jobs():
+    """
+    List recent backtest jobs of the current user.
+
+    Params (Query String):
+        limit: Page size (default 20, max 100)
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit') or 20), 100))
+        jobs = get_backtest_job_manager().list_jobs(g.user_id, limit=limit)
+        return jsonify({'code': 1, 'msg': 'OK', 'data': [_job_to_dict(j) for j in jobs]})
+    except Exception as e:
+        logger.error(f"list_backtest_jobs failed: {e}")
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
+def _as_bool(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() in ['true', '1', 'yes']
+    return bool(value)
+
+
+@backtest_bp.route('/backtest/robustness', methods=['POST'])
+@login_required
+def submit_robustness_analysis():
+    """
+    Robustness analysis of a completed backtest run (async job; poll /backtest/jobs/<jobId>,
+    the job's `result` holds the distributions).
+
+    Body:
+        runId: Backtest run id (required)
+        indicatorCode: Indicator code (optional; default: current code of the run's indicator)
+        monteCarlo: {enabled (default true), simulations (default 1000), method: bootstrap|shuffle, seed}
+            Resamples the run's closing-trade PnLs into alternative equity paths
+        walkForward: {enabled (default true), windows, windowDays, stepDays}
+            Re-runs the strategy on date windows. Without windowDays: `windows` (default 6)
+            consecutive windows splitting the range. With windowDays: a window every stepDays
+            (default windowDays; smaller = overlapping), at most `windows` of them (default: as
+            many as fit, capped by BACKTEST_WALK_FORWARD_MAX_WINDOWS). Windows without candle
+            data or with invalid input are reported with `error` and excluded from the
+            distributions.
+        enableMtf: Multi-timeframe backtest for the windows (default: as the original run)
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = g.user_id
+        run_id = int(data.get('runId') or 0)
+        if not run_id:
+            return jsonify({'code': 0, 'msg': 'runId is required', 'data': None}), 400
+
+        ensure_backtest_run_schema()
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT id, indicator_id, market, symbol, timeframe, start_date, end_date,
+                       initial_capital, commission, slippage, leverage, trade_direction,
+                       strategy_config, status, result_json, result_summary, result_detail
+                FROM qd_backtest_runs
+                WHERE id = ? AND user_id = ?
+                """,
+                (run_id, user_id),
+            )
+            row = cur.fetchone()
+            indicator_code = data.get('indicatorCode') or ''
+            if row and not str(indicator_code).strip() and row.get('indicator_id'):
+                cur.execute("SELECT code FROM qd_indicator_codes WHERE id = ?", (int(row['indicator_id']),))
+                code_row = cur.fetchone() or {}
+                indicator_code = code_row.get('code') or ''
+            cur.close()
+
+        if not row:
+            return jsonify({'code': 0, 'msg': 'run not found', 'data': None}), 404
+        if row.get('status') != 'success':
+            return jsonify({'code': 0, 'msg': 'Only successful runs can be analyzed', 'data': None}), 400
+        if not str(indicator_code).strip():
+            return jsonify({'code': 0, 'msg': 'indicatorCode is required', 'data': None}), 400
+
+        result = load_result(row, include_detail=True)
+        try:
+            strategy_config = json.loads(row.get('strategy_config') or '{}')
+        except Exception:
+            strategy_config = {}
+        precision = result.get('precision_info') or {}
+        params = {
+            'user_id': user_id,
+            'indicator_id': row.get('indicator_id'),
+            'indicator_code': indicator_code,
+            'market': row['market'],
+            'symbol': row['symbol'],
+            'timeframe': row['timeframe'],
+            'start_date': str(row['start_date'])[:10],
+            'end_date': str(row['end_date'])[:10],
+            'initial_capital': float(row.get('initial_capital') or 10000),
+            'commission': float(row.get('commission') or 0),
+            'slippage': float(row.get('slippage') or 0),
+            'leverage': int(row.get('leverage') or 1),
+            'trade_direction': row.get('trade_direction') or 'long',
+            'strategy_config': strategy_config,
+            'enable_mtf': _as_bool(data.get('enableMtf'), bool(precision.get('enabled', True))),
+        }
+
+        mc = data.get('monteCarlo') or {}
+        wf = data.get('walkForward') or {}
+        options = {
+            'run_id': run_id,
+            'monte_carlo': {
+                'simulations': int(mc.get('simulations') or 1000),
+                'method': mc.get('method') or 'bootstrap',
+                'seed': int(mc['seed']) if mc.get('seed') not in (None, '') else None,
+            } if _as_bool(mc.get('enabled'), True) else None,
+            'walk_forward': {
+                'windows': int(wf['windows']) if wf.get('windows') else None,
+                'window_days': int(wf['windowDays']) if wf.get('windowDays') else None,
+                'step_days': int(wf['stepDays']) if wf.get('stepDays') else None,
+            } if _as_bool(wf.get('enabled'), True) else None,
+        }
+        profits = [float(t.get('profit') or 0) for t in (result.get('trades') or [])]
+        original = {k: result.get(k) for k in ('totalReturn', 'maxDrawdown', 'sharpeRatio', 'winRate', 'totalTrades')}
+
+        job_id, deduplicated = get_backtest_job_manager().submit_robustness(params, profits, options, original)
+        return jsonify({
+            'code': 1,
+            'msg': 'Robustness analysis submitted',
+            'data': {'jobId': job_id, 'status': 'queued', 'deduplicated': deduplicated}
+        })
+    except BacktestQueueFull as e:
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 429
+    except ValueError as e:
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 400
+    except Exception as e:
+        logger.error(f"submit_robustness_analysis failed: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
 @backtest_bp.route('/backtest/history', methods=['GET'])
 @login_required
 def get_backtest_history():
@@ -413,6 +700,8 @@ def get_backtest_history():
             where.append("timeframe = ?")
             params.append(timeframe)
         where_sql = " AND ".join(where)
+        metric_cols = ", ".join(METRIC_COLUMNS.keys())
+        ensure_backtest_run_schema()
 
         with get_db_connection() as db:
             cur = db.cursor()
@@ -421,7 +710,7 @@ def get_backtest_history():
                 SELECT id, user_id, indicator_id, market, symbol, timeframe,
                        start_date, end_date, initial_capital, commission, slippage,
                        leverage, trade_direction, strategy_config, status, error_message,
-                       created_at
+                       {metric_cols}, created_at
                 FROM qd_backtest_runs
                 WHERE {where_sql}
                 ORDER BY id DESC
@@ -432,12 +721,13 @@ def get_backtest_history():
             rows = cur.fetchall() or []
             cur.close()
 
-        # Parse strategy_config JSON best-effort
+        # Parse strategy_config JSON best-effort; expose headline metrics (camelCase)
         for r in rows:
             try:
                 r['strategy_config'] = json.loads(r.get('strategy_config') or '{}')
             except Exception:
                 pass
+            r['metrics'] = metrics_from_row(r)
 
         return jsonify({'code': 1, 'msg': 'OK', 'data': rows})
     except Exception as e:
@@ -454,6 +744,7 @@ def get_backtest_run():
 
     Params (Query String):
         runId: Backtest run id (required)
+        tradesLimit / tradesCursor: return one page of result.trades (see /backtest/trades)
     """
     try:
         user_id = g.user_id
@@ -461,6 +752,7 @@ def get_backtest_run():
         if not run_id:
             return jsonify({'code': 0, 'msg': 'runId is required', 'data': None}), 400
 
+        ensure_backtest_run_schema()
         with get_db_connection() as db:
             cur = db.cursor()
             cur.execute(
@@ -468,7 +760,7 @@ def get_backtest_run():
                 SELECT id, user_id, indicator_id, market, symbol, timeframe,
                        start_date, end_date, initial_capital, commission, slippage,
                        leverage, trade_direction, strategy_config, status, error_message,
-                       result_json, created_at
+                       result_json, result_summary, result_detail, created_at
                 FROM qd_backtest_runs
                 WHERE id = ? AND user_id = ?
                 """,
@@ -484,19 +776,60 @@ def get_backtest_run():
             row['strategy_config'] = json.loads(row.get('strategy_config') or '{}')
         except Exception:
             pass
-        try:
-            row['result'] = json.loads(row.get('result_json') or '{}')
-        except Exception:
-            row['result'] = {}
-        row.pop('result_json', None)
+        row['result'] = load_result(row, include_detail=True)
+        cursor, limit = _trades_page_args()
+        if limit:
+            _page_trades(row['result'], cursor, limit)
 
-        return jsonify({'code': 1, 'msg': 'OK', 'data': row})
+        return stream_json({'code': 1, 'msg': 'OK', 'data': row})
     except Exception as e:
         logger.error(f"get_backtest_run failed: {e}")
         logger.error(traceback.format_exc())
         return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
 
 
+@backtest_bp.route('/backtest/trades', methods=['GET'])
+@login_required
+def get_backtest_trades():
+    """
+    Page through the trades of a backtest run.
+
+    The trades live inside the run's compressed result, so the cursor is a plain offset into
+    the fully decoded list; that list is cached per process (BACKTEST_TRADES_CACHE_RUNS runs
+    for BACKTEST_TRADES_CACHE_TTL_SEC) so following pages do not decode the result again.
+
+    Params (Query String):
+        runId: Backtest run id (required)
+        cursor: index of the first trade (default 0; use nextCursor of the previous page)
+        limit: page size (default 1000, max 10000)
+    """
+    try:
+        user_id = g.user_id
+        run_id = int(request.args.get('runId') or 0)
+        if not run_id:
+            return jsonify({'code': 0, 'msg': 'runId is required', 'data': None}), 400
+        cursor = max(0, request.args.get('cursor', 0, type=int) or 0)
+        limit = max(1, min(request.args.get('limit', 1000, type=int) or 1000, 10000))
+
+        trades = _load_run_trades(run_id, user_id)
+        if trades is None:
+            return jsonify({'code': 0, 'msg': 'run not found', 'data': None}), 404
+        result = _page_trades({'trades': trades}, cursor, limit)
+        return stream_json({
+            'code': 1,
+            'msg': 'OK',
+            'data': {
+                'trades': result['trades'],
+                'total': result['tradesTotal'],
+                'nextCursor': result['tradesNextCursor'],
+            }
+        })
+    except Exception as e:
+        logger.error(f"get_backtest_trades failed: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
 def _heuristic_ai_advice(runs: list[dict], lang: str) -> str:
     """
     Heuristic fallback when no model key is configured.
@@ -736,6 +1069,7 @@ def ai_analyze_backtest_runs():
             return jsonify({'code': 0, 'msg': 'runIds is required', 'data': None}), 400
 
         placeholders = ",".join(["?"] * len(run_ids))
+        ensure_backtest_run_schema()
         with get_db_connection() as db:
             cur = db.cursor()
             cur.execute(
@@ -743,7 +1077,7 @@ def ai_analyze_backtest_runs():
                 SELECT id, user_id, indicator_id, market, symbol, timeframe,
                        start_date, end_date, initial_capital, commission, slippage,
                        leverage, trade_direction, strategy_config, status, error_message,
-                       result_json, created_at
+                       result_json, result_summary, created_at
                 FROM qd_backtest_runs
                 WHERE user_id = ? AND id IN ({placeholders})
                 ORDER BY id DESC
@@ -759,11 +1093,8 @@ def ai_analyze_backtest_runs():
                 r['strategy_config'] = json.loads(r.get('strategy_config') or '{}')
             except Exception:
                 r['strategy_config'] = {}
-            try:
-                r['result'] = json.loads(r.get('result_json') or '{}')
-            except Exception:
-                r['result'] = {}
-            r.pop('result_json', None)
+            # Metrics summary only: equity curve / trade list are not needed for tuning advice
+            r['result'] = load_result(r, include_detail=False)
             runs.append(r)
 
         if not runs:
@@ -100,11 +100,13 @@ def _fetch_crypto_prices_ccxt() -> List[Dict[str, Any]]:
             "LINK/USDT", "LTC/USDT", "UNI/USDT", "ATOM/USDT", "XLM/USDT"
         ]
         
+        tickers = crypto_source.get_tickers(symbols)
+        
         result = []
         for symbol in symbols:
             try:
-                ticker = crypto_source.get_ticker(symbol)
-                if ticker:
+                ticker = tickers.get(symbol)
+                if ticker and ticker.get("last"):
                     base = symbol.split("/")[0]
                     result.append({
                         "symbol": base,
@@ -1,9 +1,19 @@
 """
 健康检查路由
 """
-from flask import Blueprint, jsonify
+import json
+
+from flask import Blueprint, jsonify, request
 from datetime import datetime
 
+from app.utils import latency
+from app.utils.auth import login_required, admin_required
+from app.utils.db import get_db_connection
+from app.utils.db_postgres import get_pool_stats, get_query_stats, reset_query_stats
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 health_bp = Blueprint('health', __name__)
 
 
@@ -31,3 +41,87 @@ def health_check():
 def api_health_check():
     """兼容路径：用于容器健康检查/反代探针等场景。"""
     return health_check()
+
+
+@health_bp.route('/api/metrics/latency', methods=['GET'])
+@login_required
+@admin_required
+def latency_metrics():
+    """
+    交易链路各阶段耗时（仅管理员）。
+
+    - process: 当前进程内的直方图（fetch_price / kline_refresh / indicator_exec / queue_wait / dispatch / exchange_rtt / fill_wait ...）
+    - orders: 最近 N 条 pending_orders.latency_json 的汇总（跨进程）
+
+    Query params:
+        limit: int (default 500, max 5000)
+    """
+    limit = max(1, min(request.args.get('limit', 500, type=int) or 500, 5000))
+    orders = {}
+    order_count = 0
+    try:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT latency_json FROM pending_orders
+                WHERE latency_json IS NOT NULL AND latency_json != ''
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (limit,)
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        traces = []
+        for r in rows:
+            try:
+                traces.append(json.loads(r.get('latency_json') or '{}'))
+            except Exception:
+                continue
+        order_count = len(traces)
+        orders = latency.summarize_traces(traces)
+    except Exception as e:
+        logger.warning(f"latency_metrics: order traces unavailable: {e}")
+
+    return jsonify({
+        'code': 1,
+        'msg': 'success',
+        'data': {
+            'process': latency.snapshot(),
+            'orders': {'count': order_count, 'stages': orders},
+        }
+    })
+
+
+@health_bp.route('/api/metrics/queries', methods=['GET'])
+@login_required
+@admin_required
+def query_metrics():
+    """
+    当前进程的 SQL 语句耗时画像（仅管理员）。
+
+    Query params:
+        limit: int (default 50, max 500)
+        order: total | count | avg | max (default total)
+        reset: 1 to clear the counters after reading
+    """
+    limit = max(1, min(request.args.get('limit', 50, type=int) or 50, 500))
+    order = (request.args.get('order') or 'total').strip().lower()
+    data = get_query_stats(limit=limit, order_by=order)
+    if str(request.args.get('reset') or '').lower() in ('1', 'true', 'yes'):
+        reset_query_stats()
+    return jsonify({'code': 1, 'msg': 'success', 'data': data})
+
+
+@health_bp.route('/api/metrics/db_pool', methods=['GET'])
+@login_required
+@admin_required
+def db_pool_metrics():
+    """
+    当前进程数据库连接池的占用情况（仅管理员）。
+
+    每个连接池（default / orders）返回：使用率、峰值、获取超时次数、失效/回收连接数，
+    以及按调用模块统计的等待时间（wait）和占用时间（hold）直方图。
+    """
+    return jsonify({'code': 1, 'msg': 'success', 'data': get_pool_stats()})
@@ -315,6 +315,27 @@ def get_single_price(market: str, symbol: str) -> dict:
         }
 
 
+def get_market_prices(market: str, symbols: list) -> list:
+    """批量获取同一市场多个标的的价格数据（一次批量 ticker 请求）"""
+    if len(symbols) == 1:
+        return [get_single_price(market, symbols[0])]
+    try:
+        prices = kline_service.get_realtime_prices(market, symbols)
+    except Exception as e:
+        logger.error(f"Failed to fetch batch prices {market} - {str(e)}")
+        prices = {}
+    return [
+        {
+            'market': market,
+            'symbol': symbol,
+            'price': (prices.get(symbol) or {}).get('price', 0),
+            'change': (prices.get(symbol) or {}).get('change', 0),
+            'changePercent': (prices.get(symbol) or {}).get('changePercent', 0)
+        }
+        for symbol in symbols
+    ]
+
+
 @market_bp.route('/watchlist/prices', methods=['GET'])
 def get_watchlist_prices():
     """
@@ -342,15 +363,21 @@ def get_watchlist_prices():
         
         results = []
         
-        # 使用线程池并行获取价格
-        futures = {}
+        # 按市场分组，每个市场一次批量请求，不同市场之间并行
+        symbols_by_market = {}
         for item in watchlist:
             market = item.get('market', '')
             symbol = item.get('symbol', '')
             
             if market and symbol:
-                future = executor.submit(get_single_price, market, symbol)
-                futures[future] = (market, symbol)
+                symbols_by_market.setdefault(market, [])
+                if symbol not in symbols_by_market[market]:
+                    symbols_by_market[market].append(symbol)
+        
+        futures = {
+            executor.submit(get_market_prices, market, symbols): (market, symbols)
+            for market, symbols in symbols_by_market.items()
+        }
         
         # 收集结果（带超时保护）
         completed_futures = set()
@@ -358,31 +385,30 @@ def get_watchlist_prices():
             for future in as_completed(futures, timeout=30):
                 completed_futures.add(future)
                 try:
-                    result = future.result()
-                    results.append(result)
+                    results.extend(future.result())
                 except Exception as e:
-                    market, symbol = futures[future]
-                    logger.warning(f"Price fetch failed: {market}:{symbol} - {str(e)}")
-                    results.append({
+                    market, symbols = futures[future]
+                    logger.warning(f"Price fetch failed: {market}:{','.join(symbols)} - {str(e)}")
+                    results.extend({
                         'market': market,
                         'symbol': symbol,
                         'price': 0,
                         'change': 0,
                         'changePercent': 0
-                    })
+                    } for symbol in symbols)
         except TimeoutError:
             # 超时时，为未完成的任务添加默认结果
-            for future, (market, symbol) in futures.items():
+            for future, (market, symbols) in futures.items():
                 if future not in completed_futures:
-                    logger.warning(f"Price fetch timed out: {market}:{symbol}")
-                    results.append({
+                    logger.warning(f"Price fetch timed out: {market}:{','.join(symbols)}")
+                    results.extend({
                         'market': market,
                         'symbol': symbol,
                         'price': 0,
                         'change': 0,
                         'changePercent': 0,
                         'error': 'timeout'
-                    })
+                    } for symbol in symbols)
         
         success_count = sum(1 for r in results if r.get('price', 0) > 0)
         logger.info(f"Watchlist prices: {success_count}/{len(results)} successful")
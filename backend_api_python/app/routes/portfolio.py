@@ -105,6 +105,52 @@ def _get_single_price(market: str, symbol: str, force_refresh: bool = False) ->
         }
 
 
+def _get_prices_batch(pairs, force_refresh: bool = False) -> dict:
+    """
+    Get price data for many (market, symbol) pairs.
+
+    Symbols are grouped by market and each market is fetched with one batch ticker call
+    (markets run in parallel on the shared executor), so a portfolio of N positions costs
+    roughly one request per market instead of N.
+
+    Returns:
+        {"market:symbol": price dict in the same shape as _get_single_price}
+    """
+    by_market = {}
+    for market, symbol in pairs:
+        if market and symbol:
+            by_market.setdefault(market, [])
+            if symbol not in by_market[market]:
+                by_market[market].append(symbol)
+
+    def _fetch_market(market, symbols):
+        if len(symbols) == 1:
+            return {symbols[0]: _get_single_price(market, symbols[0], force_refresh)}
+        prices = kline_service.get_realtime_prices(market, symbols, force_refresh=force_refresh)
+        return {
+            symbol: {
+                'market': market,
+                'symbol': symbol,
+                'price': (prices.get(symbol) or {}).get('price', 0),
+                'change': (prices.get(symbol) or {}).get('change', 0),
+                'changePercent': (prices.get(symbol) or {}).get('changePercent', 0),
+                'source': (prices.get(symbol) or {}).get('source', 'unknown')
+            }
+            for symbol in symbols
+        }
+
+    futures = {market: executor.submit(_fetch_market, market, symbols) for market, symbols in by_market.items()}
+
+    price_map = {}
+    for market, future in futures.items():
+        try:
+            for symbol, price_data in (future.result(timeout=30) or {}).items():
+                price_map[f"{market}:{symbol}"] = price_data
+        except Exception as e:
+            logger.warning(f"Batch price fetch failed for {market}: {e}")
+    return price_map
+
+
 # ==================== Position CRUD ====================
 
 @portfolio_bp.route('/positions', methods=['GET'])
@@ -131,7 +177,6 @@ def get_positions():
             cur.close()
 
         positions = []
-        price_futures = {}
         
         # Prepare positions and submit price fetch tasks
         for row in rows:
@@ -159,24 +204,12 @@ def get_positions():
                 'pnl_percent': 0
             }
             positions.append(pos)
-            
-            # Submit price fetch task (with force_refresh support)
-            market = row.get('market')
-            symbol = row.get('symbol')
-            if market and symbol:
-                key = f"{market}:{symbol}"
-                if key not in price_futures:
-                    future = executor.submit(_get_single_price, market, symbol, force_refresh)
-                    price_futures[key] = future
-
-        # Collect price results
-        price_map = {}
-        for key, future in price_futures.items():
-            try:
-                result = future.result(timeout=10)
-                price_map[key] = result
-            except Exception as e:
-                logger.warning(f"Price fetch failed for {key}: {e}")
+
+        # Fetch prices in one batch per market (with force_refresh support)
+        price_map = _get_prices_batch(
+            [(pos['market'], pos['symbol']) for pos in positions],
+            force_refresh
+        )
 
         # Calculate PnL for each position
         for pos in positions:
@@ -405,23 +438,11 @@ def get_portfolio_summary():
                 }
             })
 
-        # Fetch prices in parallel (with force_refresh support)
-        price_futures = {}
-        for row in rows:
-            market = row.get('market')
-            symbol = row.get('symbol')
-            key = f"{market}:{symbol}"
-            if key not in price_futures:
-                future = executor.submit(_get_single_price, market, symbol, force_refresh)
-                price_futures[key] = future
-
-        price_map = {}
-        for key, future in price_futures.items():
-            try:
-                result = future.result(timeout=10)
-                price_map[key] = result
-            except Exception:
-                pass
+        # Fetch prices in one batch per market (with force_refresh support)
+        price_map = _get_prices_batch(
+            [(row.get('market'), row.get('symbol')) for row in rows],
+            force_refresh
+        )
 
         # Calculate totals
         total_cost = 0
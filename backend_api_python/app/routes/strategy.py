@@ -11,8 +11,14 @@ from app.services.backtest import BacktestService
 from app import get_trading_executor
 from app.utils.logger import get_logger
 from app.utils.db import get_db_connection
-from app.utils.auth import login_required
-from app.data_sources import DataSourceFactory
+from app.utils.auth import login_required, admin_required
+from app.utils.json_stream import stream_json
+from app.services.position_marker import (
+    calc_pnl_percent,
+    calc_unrealized_pnl,
+    get_position_marker,
+    position_marker_enabled,
+)
 
 logger = get_logger(__name__)
 
@@ -291,7 +297,14 @@ def delete_strategy():
 @strategy_bp.route('/strategies/trades', methods=['GET'])
 @login_required
 def get_trades():
-    """Get trade records for the current user's strategy."""
+    """
+    Get trade records for the current user's strategy (newest first).
+
+    Query params:
+        id: strategy id (required)
+        limit: page size (max 1000); without limit/cursor all trades are returned
+        cursor: nextCursor of the previous page (trades with id < cursor)
+    """
     try:
         user_id = g.user_id
         strategy_id = request.args.get('id', type=int)
@@ -303,19 +316,36 @@ def get_trades():
         if not st:
             return jsonify({'code': 0, 'msg': 'Strategy not found', 'data': {'trades': [], 'items': []}}), 404
         
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor', type=int)
+        paginated = bool(limit) or bool(cursor)
+        if paginated:
+            limit = max(1, min(int(limit or 100), 1000))
+
+        sql = """
+            SELECT id, strategy_id, symbol, type, price, amount, value, commission, commission_ccy, profit, created_at
+            FROM qd_strategy_trades
+            WHERE strategy_id = ?
+        """
+        params = [strategy_id]
+        if cursor:
+            sql += " AND id < ?"
+            params.append(cursor)
+        sql += " ORDER BY id DESC"
+        if paginated:
+            # One extra row tells whether another page exists
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
         with get_db_connection() as db:
             cur = db.cursor()
-            cur.execute(
-                """
-                SELECT id, strategy_id, symbol, type, price, amount, value, commission, commission_ccy, profit, created_at
-                FROM qd_strategy_trades
-                WHERE strategy_id = ?
-                ORDER BY id DESC
-                """,
-                (strategy_id,)
-            )
+            cur.execute(sql, tuple(params))
             rows = cur.fetchall() or []
             cur.close()
+
+        has_more = paginated and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
         
         # Convert created_at to UTC timestamp (seconds) for frontend
         # This ensures consistent timezone handling
@@ -338,7 +368,11 @@ def get_trades():
             processed_rows.append(trade)
         
         # Frontend expects data.trades; keep data.items for compatibility with list-style components.
-        return jsonify({'code': 1, 'msg': 'success', 'data': {'trades': processed_rows, 'items': processed_rows}})
+        data = {'trades': processed_rows, 'items': processed_rows}
+        if paginated:
+            data['hasMore'] = has_more
+            data['nextCursor'] = int(processed_rows[-1]['id']) if has_more else None
+        return stream_json({'code': 1, 'msg': 'success', 'data': data})
     except Exception as e:
         logger.error(f"get_trades failed: {str(e)}")
         logger.error(traceback.format_exc())
@@ -359,13 +393,20 @@ def get_positions():
         st = get_strategy_service().get_strategy(strategy_id, user_id=user_id)
         if not st:
             return jsonify({'code': 0, 'msg': 'Strategy not found', 'data': {'positions': [], 'items': []}}), 404
-        
+
+        if not position_marker_enabled():
+            # No background marker: mark this strategy's positions on read (quotes reused within the interval)
+            try:
+                get_position_marker().mark_once(strategy_id)
+            except Exception as e:
+                logger.warning(f"get_positions: mark on read failed for strategy {strategy_id}: {e}")
+
         with get_db_connection() as db:
             cur = db.cursor()
             cur.execute(
                 """
                 SELECT id, strategy_id, symbol, side, size, entry_price, current_price, highest_price,
-                       unrealized_pnl, pnl_percent, equity, updated_at
+                       unrealized_pnl, pnl_percent, equity, updated_at, marked_at
                 FROM qd_strategy_positions
                 WHERE strategy_id = ?
                 ORDER BY id DESC
@@ -375,82 +416,23 @@ def get_positions():
             rows = cur.fetchall() or []
             cur.close()
 
-        # Sync current price and PnL on read (frontend polls every few seconds).
-        def _calc_unrealized_pnl(side: str, entry_price: float, current_price: float, size: float) -> float:
-            ep = float(entry_price or 0.0)
-            cp = float(current_price or 0.0)
-            sz = float(size or 0.0)
-            if ep <= 0 or cp <= 0 or sz <= 0:
-                return 0.0
-            s = (side or "").strip().lower()
-            if s == "short":
-                return (ep - cp) * sz
-            return (cp - ep) * sz
-
-        def _calc_pnl_percent(entry_price: float, size: float, pnl: float) -> float:
-            ep = float(entry_price or 0.0)
-            sz = float(size or 0.0)
-            denom = ep * sz
-            if denom <= 0:
-                return 0.0
-            return float(pnl) / denom * 100.0
-
-        now = int(time.time())
-        # Fetch prices once per symbol to reduce API calls.
-        sym_to_price: dict[str, float] = {}
-        ds = DataSourceFactory.get_source("Crypto")
-        for r in rows:
-            sym = (r.get("symbol") or "").strip()
-            if not sym:
-                continue
-            if sym in sym_to_price:
-                continue
-            try:
-                t = ds.get_ticker(sym) or {}
-                px = float(t.get("last") or t.get("close") or 0.0)
-                if px > 0:
-                    sym_to_price[sym] = px
-            except Exception:
-                continue
-
-        # Apply to rows and persist best-effort
+        # current_price / PnL are marked by PositionMarker (background job, or above when disabled).
         out = []
-        with get_db_connection() as db:
-            cur = db.cursor()
-            for r in rows:
-                sym = (r.get("symbol") or "").strip()
-                side = (r.get("side") or "").strip().lower()
-                entry = float(r.get("entry_price") or 0.0)
-                size = float(r.get("size") or 0.0)
-                cp = float(sym_to_price.get(sym) or r.get("current_price") or 0.0)
-                pnl = _calc_unrealized_pnl(side, entry, cp, size)
-                pct = _calc_pnl_percent(entry, size, pnl)
-
-                rr = dict(r)
-                # 确保 entry_price 有值（如果数据库中是 NULL，使用计算出的 entry 值）
-                if not rr.get("entry_price") or float(rr.get("entry_price") or 0.0) <= 0:
-                    rr["entry_price"] = float(entry or 0.0)
-                else:
-                    rr["entry_price"] = float(rr.get("entry_price") or 0.0)
-                rr["current_price"] = float(cp or 0.0)
-                rr["unrealized_pnl"] = float(pnl)
-                rr["pnl_percent"] = float(pct)
-                rr["updated_at"] = now
-                out.append(rr)
-
-                try:
-                    cur.execute(
-                        """
-                        UPDATE qd_strategy_positions
-                        SET current_price = ?, unrealized_pnl = ?, pnl_percent = ?, updated_at = NOW()
-                        WHERE id = ?
-                        """,
-                        (float(cp or 0.0), float(pnl), float(pct), int(rr.get("id"))),
-                    )
-                except Exception:
-                    pass
-            db.commit()
-            cur.close()
+        for r in rows:
+            side = (r.get("side") or "").strip().lower()
+            entry = float(r.get("entry_price") or 0.0)
+            size = float(r.get("size") or 0.0)
+            cp = float(r.get("current_price") or 0.0)
+            pnl = calc_unrealized_pnl(side, entry, cp, size)
+
+            rr = dict(r)
+            marked_at = rr.pop("marked_at", None) or rr.get("updated_at")
+            rr["entry_price"] = entry
+            rr["current_price"] = cp
+            rr["unrealized_pnl"] = float(pnl)
+            rr["pnl_percent"] = float(calc_pnl_percent(entry, size, pnl))
+            rr["updated_at"] = int(marked_at.timestamp()) if hasattr(marked_at, "timestamp") else int(time.time())
+            out.append(rr)
 
         return jsonify({'code': 1, 'msg': 'success', 'data': {'positions': out, 'items': out}})
     except Exception as e:
@@ -633,6 +615,30 @@ def start_strategy():
         }), 500
 
 
+@strategy_bp.route('/strategies/runtime', methods=['GET'])
+@login_required
+@admin_required
+def get_strategy_runtime_status():
+    """
+    Strategy runtime status (admin).
+
+    In-process mode: strategies running in this API process.
+    External mode: shard heartbeats of the standalone runtime and the strategies each shard runs.
+    """
+    try:
+        executor = get_trading_executor()
+        if hasattr(executor, 'get_status'):
+            data = executor.get_status()
+        else:
+            with executor.lock:
+                running = sorted(int(sid) for sid, th in executor.running_strategies.items() if th.is_alive())
+            data = {'mode': 'inprocess', 'shards': [], 'pendingCommands': 0, 'runningCount': len(running), 'running': running}
+        return jsonify({'code': 1, 'msg': 'success', 'data': data})
+    except Exception as e:
+        logger.error(f"get_strategy_runtime_status failed: {str(e)}")
+        return jsonify({'code': 0, 'msg': str(e), 'data': None}), 500
+
+
 @strategy_bp.route('/strategies/test-connection', methods=['POST'])
 @login_required
 def test_connection():
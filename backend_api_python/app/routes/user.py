@@ -182,7 +182,7 @@ def reset_user_password():
         if len(new_password) < 6:
             return jsonify({'code': 0, 'msg': 'Password must be at least 6 characters', 'data': None}), 400
         
-        success = get_user_service().reset_password(user_id, new_password)
+        success = get_user_service().reset_password(user_id, new_password, revoke_sessions=True)
         
         if success:
             return jsonify({'code': 1, 'msg': 'Password reset successfully', 'data': None})
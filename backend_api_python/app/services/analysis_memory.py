@@ -8,16 +8,39 @@ Features:
 3. Track decision outcomes for learning
 """
 import json
+import math
 import time
 import hashlib
+import threading
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
 
 from app.utils.logger import get_logger
 from app.utils.db import get_db_connection
 
 logger = get_logger(__name__)
 
+# Feature vector layout (keep in sync with _build_feature_vector).
+# Bump FEATURE_VERSION when the layout changes; stale stored vectors are recomputed from indicators_snapshot.
+FEATURE_VERSION = 1
+FEATURE_NAMES = [
+    "rsi", "macd_signal", "macd_hist", "ma_trend", "price_vs_ma20",
+    "price_position", "volatility", "volume_ratio", "bollinger_position", "risk_reward",
+]
+# Per-feature weights for the distance metric (RSI/MACD/trend dominate, like the old rule-based matcher)
+FEATURE_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.5, 1.0, 1.0, 0.8, 0.5, 0.8, 0.4], dtype=np.float32)
+
+_MA_TREND_SCORES = {
+    "strong_uptrend": 1.0,
+    "uptrend": 0.5,
+    "sideways": 0.0,
+    "downtrend": -0.5,
+    "strong_downtrend": -1.0,
+}
+_MACD_SIGNAL_SCORES = {"bullish": 1.0, "bearish": -1.0, "neutral": 0.0}
+
 
 def _safe_json_parse(val, default=None):
     """安全解析 JSON - 处理已是 Python 对象或字符串的情况"""
@@ -33,12 +56,199 @@ def _safe_json_parse(val, default=None):
     return default
 
 
+def _num(val, default: float = 0.0) -> float:
+    try:
+        f = float(val)
+        return f if math.isfinite(f) else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _build_feature_vector(indicators: Dict[str, Any]) -> Optional[List[float]]:
+    """
+    Build a scale-free numeric feature vector from an indicators snapshot
+    (the dict produced by MarketDataCollector._calculate_indicators).
+
+    Every component is squashed into roughly [-1, 1] so vectors are comparable across symbols.
+    Returns None when the snapshot has no usable technical data.
+    """
+    if not indicators or not isinstance(indicators, dict):
+        return None
+    rsi = indicators.get("rsi") or {}
+    macd = indicators.get("macd") or {}
+    mas = indicators.get("moving_averages") or {}
+    if not rsi and not macd and not mas:
+        return None
+
+    price = _num(indicators.get("current_price"))
+    ma20 = _num(mas.get("ma20"))
+    bb = indicators.get("bollinger") or {}
+    bb_upper, bb_lower = _num(bb.get("BB_upper")), _num(bb.get("BB_lower"))
+    volume_ratio = _num(indicators.get("volume_ratio"), 1.0)
+
+    vec = [
+        (_num(rsi.get("value"), 50.0) - 50.0) / 50.0,
+        _MACD_SIGNAL_SCORES.get(macd.get("signal"), 0.0),
+        math.tanh(_num(macd.get("histogram")) / price * 100) if price > 0 else 0.0,
+        _MA_TREND_SCORES.get(mas.get("trend") or indicators.get("trend"), 0.0),
+        math.tanh((price / ma20 - 1) * 10) if price > 0 and ma20 > 0 else 0.0,
+        _num(indicators.get("price_position"), 50.0) / 50.0 - 1.0,
+        math.tanh(_num((indicators.get("volatility") or {}).get("pct")) / 5.0),
+        math.tanh(math.log(volume_ratio)) if volume_ratio > 0 else 0.0,
+        max(-1.0, min(1.0, (price - bb_lower) / (bb_upper - bb_lower) * 2 - 1)) if price > 0 and bb_upper > bb_lower else 0.0,
+        math.tanh(_num((indicators.get("trading_levels") or {}).get("risk_reward_ratio")) / 3.0),
+    ]
+    return [round(v, 6) for v in vec]
+
+
+class PatternIndex:
+    """
+    In-memory nearest-neighbour index over validated analyses.
+
+    Vectors are persisted in qd_analysis_memory.feature_vector; the index is loaded lazily,
+    refreshed incrementally (rows validated since the last refresh) and fully rebuilt
+    periodically so deletions are eventually reflected. Queries are a weighted Euclidean
+    brute-force scan in NumPy, which stays in the millisecond range for ~10^5 rows.
+    """
+
+    REFRESH_INTERVAL_SEC = 300
+    REBUILD_INTERVAL_SEC = 3600
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+        self._rows: List[Dict[str, Any]] = []
+        self._id_pos: Dict[int, int] = {}
+        self._last_validated_at = None
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+
+    def _load(self, since=None) -> List[Dict[str, Any]]:
+        where = "validated_at IS NOT NULL AND was_correct IS NOT NULL"
+        params = ()
+        if since is not None:
+            where += " AND validated_at > %s"
+            params = (since,)
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(f"""
+                SELECT id, market, symbol, decision, confidence, price_at_analysis, summary,
+                       was_correct, actual_return_pct, validated_at, created_at,
+                       feature_vector, indicators_snapshot
+                FROM qd_analysis_memory
+                WHERE {where}
+                ORDER BY validated_at ASC
+            """, params or None)
+            rows = cur.fetchall() or []
+
+            # Backfill vectors for rows stored before feature vectors existed
+            backfill = []
+            for row in rows:
+                stored = _safe_json_parse(row.get('feature_vector'), None)
+                if isinstance(stored, dict) and stored.get("v") == FEATURE_VERSION:
+                    row['_vec'] = stored.get("x")
+                else:
+                    row['_vec'] = _build_feature_vector(_safe_json_parse(row.get('indicators_snapshot'), {}))
+                    if row['_vec'] is not None:
+                        backfill.append((json.dumps({"v": FEATURE_VERSION, "x": row['_vec']}), row['id']))
+            if backfill:
+                cur.executemany("UPDATE qd_analysis_memory SET feature_vector = %s WHERE id = %s", backfill)
+                db.commit()
+            cur.close()
+        return [r for r in rows if r.get('_vec') and len(r['_vec']) == len(FEATURE_NAMES)]
+
+    def _add_rows(self, rows: List[Dict[str, Any]]):
+        new_vecs = []
+        for row in rows:
+            item = {
+                "id": row['id'],
+                "market": row['market'],
+                "symbol": row['symbol'],
+                "decision": row['decision'],
+                "confidence": row['confidence'],
+                "price": float(row['price_at_analysis']) if row['price_at_analysis'] else None,
+                "summary": row['summary'],
+                "was_correct": row['was_correct'],
+                "actual_return_pct": float(row['actual_return_pct']) if row['actual_return_pct'] is not None else None,
+                "created_at": row['created_at'].isoformat() if row.get('created_at') else None,
+            }
+            pos = self._id_pos.get(row['id'])
+            if pos is not None:
+                self._rows[pos] = item
+                self._matrix[pos] = row['_vec']
+            else:
+                self._id_pos[row['id']] = len(self._rows)
+                self._rows.append(item)
+                new_vecs.append(row['_vec'])
+            if row.get('validated_at') and (self._last_validated_at is None or row['validated_at'] > self._last_validated_at):
+                self._last_validated_at = row['validated_at']
+        if new_vecs:
+            self._matrix = np.vstack([self._matrix, np.asarray(new_vecs, dtype=np.float32)])
+
+    def refresh(self, force: bool = False):
+        """Load newly validated analyses (or rebuild the whole index when due)."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_refresh < self.REFRESH_INTERVAL_SEC:
+                return
+            try:
+                if force or now - self._last_rebuild >= self.REBUILD_INTERVAL_SEC:
+                    rows = self._load()
+                    self._matrix = np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+                    self._rows, self._id_pos, self._last_validated_at = [], {}, None
+                    self._add_rows(rows)
+                    self._last_rebuild = now
+                    logger.info(f"Pattern index rebuilt with {len(self._rows)} validated analyses")
+                else:
+                    self._add_rows(self._load(since=self._last_validated_at))
+            except Exception as e:
+                logger.warning(f"Pattern index refresh failed: {e}")
+            self._last_refresh = now
+
+    def query(self, vector: List[float], k: int = 3, market: str = None, symbol: str = None,
+              same_symbol_only: bool = False) -> List[Dict[str, Any]]:
+        """Return the k nearest validated analyses with a similarity score in (0, 1]."""
+        self.refresh()
+        with self._lock:
+            if not self._rows:
+                return []
+            q = np.asarray(vector, dtype=np.float32)
+            dist = np.sqrt((((self._matrix - q) ** 2) * FEATURE_WEIGHTS).sum(axis=1))
+            if market or symbol:
+                same = np.fromiter(
+                    (r['market'] == market and r['symbol'] == symbol for r in self._rows),
+                    dtype=bool, count=len(self._rows)
+                )
+                if same_symbol_only:
+                    dist = np.where(same, dist, np.inf)
+                else:
+                    # Slight preference for the same instrument at equal technical distance
+                    dist = np.where(same, dist * 0.9, dist)
+            k = min(k, len(self._rows))
+            top = np.argpartition(dist, k - 1)[:k]
+            top = top[np.argsort(dist[top])]
+            results = []
+            for i in top:
+                if not np.isfinite(dist[i]):
+                    continue
+                item = dict(self._rows[i])
+                item["similarity"] = {"score": round(float(1.0 / (1.0 + dist[i])), 4), "distance": round(float(dist[i]), 4)}
+                results.append(item)
+            return results
+
+
+_pattern_index = PatternIndex()
+
+
 class AnalysisMemory:
     """
     Simple but effective memory system for AI analysis.
     Uses PostgreSQL for persistence.
     """
     
+    # Validation runs that may fail to resolve an outcome price before a row is given up
+    VALIDATION_MAX_ATTEMPTS = 5
+    
     def __init__(self):
         self._ensure_table()
     
@@ -66,6 +276,7 @@ class AnalysisMemory:
                         risks JSONB,
                         scores JSONB,
                         indicators_snapshot JSONB,
+                        feature_vector JSONB,
                         raw_result JSONB,
                         created_at TIMESTAMP DEFAULT NOW(),
                         validated_at TIMESTAMP,
@@ -73,7 +284,9 @@ class AnalysisMemory:
                         actual_return_pct DECIMAL(10, 4),
                         was_correct BOOLEAN,
                         user_feedback VARCHAR(20),
-                        feedback_at TIMESTAMP
+                        feedback_at TIMESTAMP,
+                        validation_attempts INT DEFAULT 0,
+                        validation_attempted_at TIMESTAMP
                     );
                 """)
                 
@@ -96,8 +309,19 @@ class AnalysisMemory:
                         ) THEN
                             ALTER TABLE qd_analysis_memory ADD COLUMN raw_result JSONB;
                         END IF;
+                        
+                        -- 添加 feature_vector 列（用于相似模式检索）
+                        IF NOT EXISTS (
+                            SELECT 1 FROM information_schema.columns 
+                            WHERE table_name = 'qd_analysis_memory' AND column_name = 'feature_vector'
+                        ) THEN
+                            ALTER TABLE qd_analysis_memory ADD COLUMN feature_vector JSONB;
+                        END IF;
                     END $$;
                 """)
+                # 验证重试计数（无法获取结果价格的记录不会无限占用批次）
+                cur.execute("ALTER TABLE qd_analysis_memory ADD COLUMN IF NOT EXISTS validation_attempts INT DEFAULT 0")
+                cur.execute("ALTER TABLE qd_analysis_memory ADD COLUMN IF NOT EXISTS validation_attempted_at TIMESTAMP")
                 
                 # 创建索引
                 cur.execute("""
@@ -149,17 +373,19 @@ class AnalysisMemory:
                 risks = json.dumps(analysis_result.get("risks", []))
                 scores = json.dumps(analysis_result.get("scores", {}))
                 indicators = json.dumps(analysis_result.get("indicators", {}))
+                vec = _build_feature_vector(analysis_result.get("indicators", {}))
+                feature_vector = json.dumps({"v": FEATURE_VERSION, "x": vec}) if vec else None
                 raw = json.dumps(analysis_result)
                 
                 cur.execute("""
                     INSERT INTO qd_analysis_memory (
                         user_id, market, symbol, decision, confidence,
                         price_at_analysis, entry_price, stop_loss, take_profit,
-                        summary, reasons, risks, scores, indicators_snapshot, raw_result
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        summary, reasons, risks, scores, indicators_snapshot, feature_vector, raw_result
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """, (user_id, market, symbol, decision, confidence, price, entry, stop, take, 
-                      summary, reasons, risks, scores, indicators, raw))
+                      summary, reasons, risks, scores, indicators, feature_vector, raw))
                 
                 # 使用 lastrowid 属性获取 ID（execute 内部已经处理了 RETURNING）
                 memory_id = cur.lastrowid
@@ -326,73 +552,23 @@ class AnalysisMemory:
             return False
     
     def get_similar_patterns(self, market: str, symbol: str, 
-                             current_indicators: Dict, limit: int = 3) -> List[Dict]:
+                             current_indicators: Dict, limit: int = 3,
+                             same_symbol_only: bool = False) -> List[Dict]:
         """
-        Find historical analyses with similar technical patterns.
+        Find historical analyses with similar technical setups.
         
-        This is a simplified version - can be enhanced with vector similarity later.
-        Currently matches based on:
-        - Same symbol
-        - Similar RSI range (±10)
-        - Same MACD signal direction
-        - Validated outcomes preferred
+        The current indicators are turned into a feature vector (RSI, MACD, trend,
+        price vs MA/Bollinger, volatility, volume, risk/reward) and matched against
+        an in-memory nearest-neighbour index of all validated analyses, across symbols
+        (same symbol slightly preferred) unless same_symbol_only is set.
         """
         try:
-            rsi = current_indicators.get("rsi", {}).get("value", 50)
-            macd_signal = current_indicators.get("macd", {}).get("signal", "neutral")
-            
-            with get_db_connection() as db:
-                cur = db.cursor()
-                
-                # Simple pattern matching query
-                cur.execute("""
-                    SELECT 
-                        id, decision, confidence, price_at_analysis,
-                        summary, reasons, indicators_snapshot,
-                        created_at, was_correct, actual_return_pct
-                    FROM qd_analysis_memory
-                    WHERE market = %s AND symbol = %s
-                    AND validated_at IS NOT NULL
-                    AND was_correct IS NOT NULL
-                    ORDER BY 
-                        CASE WHEN was_correct = true THEN 0 ELSE 1 END,
-                        created_at DESC
-                    LIMIT %s
-                """, (market, symbol, limit * 2))  # Get more for filtering
-                
-                rows = cur.fetchall() or []
-                cur.close()
-                
-                results = []
-                for row in rows:
-                    indicators = _safe_json_parse(row['indicators_snapshot'], {})
-                    hist_rsi = indicators.get("rsi", {}).get("value", 50)
-                    hist_macd = indicators.get("macd", {}).get("signal", "neutral")
-                    
-                    # Simple similarity check
-                    rsi_similar = abs(hist_rsi - rsi) <= 15
-                    macd_similar = hist_macd == macd_signal
-                    
-                    if rsi_similar or macd_similar:
-                        results.append({
-                            "id": row['id'],
-                            "decision": row['decision'],
-                            "confidence": row['confidence'],
-                            "price": float(row['price_at_analysis']) if row['price_at_analysis'] else None,
-                            "summary": row['summary'],
-                            "was_correct": row['was_correct'],
-                            "actual_return_pct": float(row['actual_return_pct']) if row['actual_return_pct'] else None,
-                            "similarity": {
-                                "rsi_match": rsi_similar,
-                                "macd_match": macd_similar,
-                            }
-                        })
-                        
-                        if len(results) >= limit:
-                            break
-                
-                return results
-                
+            vec = _build_feature_vector(current_indicators)
+            if vec is None:
+                return []
+            return _pattern_index.query(
+                vec, k=limit, market=market, symbol=symbol, same_symbol_only=same_symbol_only
+            )
         except Exception as e:
             logger.error(f"Failed to get similar patterns: {e}")
             return []
@@ -420,17 +596,27 @@ class AnalysisMemory:
             logger.error(f"Failed to record feedback: {e}")
             return False
     
-    def validate_past_decisions(self, days_ago: int = 7) -> Dict[str, Any]:
+    def validate_past_decisions(self, days_ago: int = 7, batch_size: int = 2000) -> Dict[str, Any]:
         """
         Validate historical decisions by comparing with actual price movements.
         Run this periodically (e.g., daily) to build learning data.
         
+        All pending analyses older than the horizon are processed (never-attempted first, then
+        least recently attempted; up to batch_size per run), grouped by symbol so each symbol
+        costs one daily K-line fetch. The outcome price is the close at the validation horizon
+        (created_at + days_ago, created_at taken as UTC like the K-line times), falling back to
+        the current price when no candle covers it. Results are written with a single batched
+        UPDATE. Rows whose outcome price cannot be resolved are retried on later runs and
+        marked actual_outcome = 'unresolved' after VALIDATION_MAX_ATTEMPTS attempts.
+        
         Args:
-            days_ago: Validate decisions from N days ago
+            days_ago: Validation horizon in days
+            batch_size: Max pending analyses processed per run
         
         Returns:
             Validation statistics
         """
+        from app.data_sources import DataSourceFactory
         from app.services.market_data_collector import MarketDataCollector
         collector = MarketDataCollector()
         
@@ -439,67 +625,94 @@ class AnalysisMemory:
             "correct": 0,
             "incorrect": 0,
             "errors": 0,
+            "symbols": 0,
         }
         
         try:
             with get_db_connection() as db:
                 cur = db.cursor()
                 
-                # Get unvalidated decisions from N days ago
+                # All unvalidated decisions that have reached the horizon
                 cur.execute(f"""
-                    SELECT id, market, symbol, decision, price_at_analysis
+                    SELECT id, market, symbol, decision, price_at_analysis, created_at
                     FROM qd_analysis_memory
                     WHERE validated_at IS NULL
                     AND created_at < NOW() - INTERVAL '{int(days_ago)} days'
-                    AND created_at > NOW() - INTERVAL '{int(days_ago + 1)} days'
-                    LIMIT 50
-                """)
-                
+                    AND price_at_analysis > 0
+                    AND COALESCE(validation_attempts, 0) < %s
+                    ORDER BY validation_attempted_at ASC NULLS FIRST, created_at ASC
+                    LIMIT %s
+                """, (self.VALIDATION_MAX_ATTEMPTS, int(batch_size)))
                 rows = cur.fetchall() or []
                 
+                by_symbol: Dict[tuple, List[Dict]] = {}
                 for row in rows:
+                    by_symbol.setdefault((row['market'], row['symbol']), []).append(row)
+                stats["symbols"] = len(by_symbol)
+                
+                updates = []
+                unresolved = []
+                now = datetime.now(timezone.utc)
+                for (market, symbol), group in by_symbol.items():
                     try:
-                        # Get current price using MarketDataCollector
-                        current_price = collector._get_price(row['market'], row['symbol'])
-                        if not current_price or current_price <= 0:
-                            continue
-                        analysis_price = float(row['price_at_analysis'])
-                        
-                        if analysis_price <= 0:
-                            continue
+                        # One daily K-line fetch covers every horizon in the group
+                        oldest = min(self._as_utc(r['created_at']) for r in group)
+                        span_days = (now - oldest).days + 3
+                        klines = DataSourceFactory.get_kline(market, symbol, '1D', max(span_days, days_ago + 3))
                         
-                        # Calculate return
-                        return_pct = ((current_price - analysis_price) / analysis_price) * 100
-                        
-                        # Determine if decision was correct
-                        decision = row['decision']
-                        was_correct = False
-                        
-                        if decision == 'BUY' and return_pct > 2:  # 2% threshold
-                            was_correct = True
-                        elif decision == 'SELL' and return_pct < -2:
-                            was_correct = True
-                        elif decision == 'HOLD' and abs(return_pct) <= 5:
-                            was_correct = True
-                        
-                        # Update record
-                        cur.execute("""
-                            UPDATE qd_analysis_memory
-                            SET validated_at = NOW(),
-                                actual_return_pct = %s,
-                                was_correct = %s
-                            WHERE id = %s
-                        """, (return_pct, was_correct, row['id']))
-                        
-                        stats["validated"] += 1
-                        if was_correct:
-                            stats["correct"] += 1
-                        else:
-                            stats["incorrect"] += 1
+                        current_price = None
+                        for row in group:
+                            horizon_ts = (self._as_utc(row['created_at']) + timedelta(days=days_ago)).timestamp()
+                            outcome_price = self._close_at(klines, horizon_ts)
+                            if not outcome_price:
+                                if current_price is None:
+                                    price_data = collector._get_price(market, symbol) or {}
+                                    current_price = float(price_data.get('price') or 0)
+                                outcome_price = current_price
+                            if not outcome_price or outcome_price <= 0:
+                                stats["errors"] += 1
+                                unresolved.append((row['id'],))
+                                continue
+                            
+                            analysis_price = float(row['price_at_analysis'])
+                            return_pct = ((outcome_price - analysis_price) / analysis_price) * 100
+                            was_correct = self._is_decision_correct(row['decision'], return_pct)
+                            updates.append((row['id'], round(return_pct, 4), was_correct))
                             
+                            stats["validated"] += 1
+                            if was_correct:
+                                stats["correct"] += 1
+                            else:
+                                stats["incorrect"] += 1
                     except Exception as e:
-                        logger.warning(f"Failed to validate memory {row['id']}: {e}")
-                        stats["errors"] += 1
+                        logger.warning(f"Failed to validate memories for {market}:{symbol}: {e}")
+                        stats["errors"] += len(group)
+                        unresolved.extend((r['id'],) for r in group if r['id'] not in {u[0] for u in updates})
+                
+                if updates:
+                    cur.execute_values("""
+                        UPDATE qd_analysis_memory AS m
+                        SET validated_at = NOW(),
+                            actual_return_pct = v.return_pct,
+                            was_correct = v.was_correct
+                        FROM (VALUES %s) AS v(id, return_pct, was_correct)
+                        WHERE m.id = v.id
+                    """, updates, template="(%s::int, %s::numeric, %s::boolean)")
+                
+                if unresolved:
+                    # Count the attempt; give up after VALIDATION_MAX_ATTEMPTS so these rows
+                    # stop filling the batch ahead of newer analyses
+                    cur.execute_values(f"""
+                        UPDATE qd_analysis_memory AS m
+                        SET validation_attempts = COALESCE(m.validation_attempts, 0) + 1,
+                            validation_attempted_at = NOW(),
+                            actual_outcome = CASE
+                                WHEN COALESCE(m.validation_attempts, 0) + 1 >= {int(self.VALIDATION_MAX_ATTEMPTS)}
+                                THEN 'unresolved' ELSE m.actual_outcome END
+                        FROM (VALUES %s) AS v(id)
+                        WHERE m.id = v.id
+                    """, unresolved, template="(%s::int)")
+                    stats["unresolved"] = len(unresolved)
                 
                 db.commit()
                 cur.close()
@@ -513,6 +726,33 @@ class AnalysisMemory:
         logger.info(f"Validation completed: {stats}")
         return stats
     
+    @staticmethod
+    def _as_utc(dt: datetime) -> datetime:
+        """created_at is a naive TIMESTAMP written by NOW() in the (UTC) database session."""
+        return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+    
+    @staticmethod
+    def _close_at(klines: List[Dict], ts: float) -> Optional[float]:
+        """Close of the last daily candle at or before ts (None if ts is not covered yet)."""
+        if not klines or ts > time.time() or ts < klines[0]['time']:
+            return None
+        close = None
+        for k in klines:
+            if k['time'] > ts:
+                break
+            close = k.get('close')
+        return float(close) if close else None
+    
+    @staticmethod
+    def _is_decision_correct(decision: str, return_pct: float) -> bool:
+        if decision == 'BUY':
+            return return_pct > 2  # 2% threshold
+        if decision == 'SELL':
+            return return_pct < -2
+        if decision == 'HOLD':
+            return abs(return_pct) <= 5
+        return False
+    
     def get_performance_stats(self, market: str = None, symbol: str = None, 
                               days: int = 30) -> Dict[str, Any]:
         """
@@ -4,7 +4,7 @@ Backtest Service
 import math
 import traceback
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
 import pandas as pd
 import numpy as np
@@ -12,10 +12,16 @@ import numpy as np
 from app.data_sources import DataSourceFactory
 from app.utils.logger import get_logger
 from app.services.indicator_params import IndicatorParamsParser, IndicatorCaller
+from app.services import backtest_metrics
+from app.services.backtest_equity import EquityCurve
 
 logger = get_logger(__name__)
 
 
+class BacktestCancelled(Exception):
+    """Raised from a progress callback to stop a running backtest."""
+
+
 class BacktestService:
     """Backtest Service"""
     
@@ -35,6 +41,27 @@ class BacktestService:
         'fallback_exec_tf': '5m', # Fallback execution timeframe
     }
     
+    def __init__(self, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            progress_callback: Optional hook receiving progress dicts
+                {phase, processed, total, trades, equity}; it may raise BacktestCancelled
+                to stop the run (checked between candles).
+        """
+        self.progress_callback = progress_callback
+    
+    def _report_progress(self, phase: str, processed: int = 0, total: int = 0,
+                         trades: int = 0, equity: Optional[float] = None):
+        if self.progress_callback is None:
+            return
+        self.progress_callback({
+            'phase': phase,
+            'processed': int(processed),
+            'total': int(total),
+            'trades': int(trades),
+            'equity': round(float(equity), 2) if equity is not None else None,
+        })
+    
     @staticmethod
     def _infer_candle_path(open_: float, high: float, low: float, close: float) -> List[float]:
         """
@@ -180,6 +207,7 @@ class BacktestService:
         logger.info(f"Multi-timeframe backtest: strategy_tf={timeframe}, exec_tf={exec_tf}, range={start_date} ~ {end_date}")
         
         # 1. Fetch strategy timeframe candles (for signal generation)
+        self._report_progress('fetch_data')
         df_signal = self._fetch_kline_data(market, symbol, timeframe, start_date, end_date)
         if df_signal.empty:
             raise ValueError("No candle data available in the backtest date range")
@@ -191,10 +219,12 @@ class BacktestService:
             'commission': commission,
             'trade_direction': trade_direction
         }
+        self._report_progress('indicator')
         signals = self._execute_indicator(indicator_code, df_signal, backtest_params)
         logger.info(f"Signals generated: {list(signals.keys()) if isinstance(signals, dict) else type(signals)}")
         
         # 3. Fetch execution timeframe candles (for precise trade simulation)
+        self._report_progress('fetch_exec_data')
         logger.info(f"Fetching execution timeframe data: {exec_tf} for {market}:{symbol}")
         df_exec = self._fetch_kline_data(market, symbol, exec_tf, start_date, end_date)
         logger.info(f"Execution timeframe data fetched: {len(df_exec)} candles")
@@ -240,6 +270,8 @@ class BacktestService:
                 exec_timeframe=exec_tf
             )
             logger.info(f"MTF simulation completed: {len(trades)} trades executed")
+        except BacktestCancelled:
+            raise
         except Exception as e:
             logger.error(f"MTF simulation failed: {str(e)}")
             logger.error(traceback.format_exc())
@@ -296,7 +328,7 @@ class BacktestService:
         except Exception as e:
             logger.error(f"Error in _simulate_trading_mtf entry logging: {e}")
         
-        equity_curve = []
+        equity_curve = EquityCurve()
         trades = []
         total_commission_paid = 0.0
         is_liquidated = False
@@ -534,14 +566,18 @@ class BacktestService:
         # Progress logging for large datasets
         total_exec_candles = len(df_exec)
         progress_log_interval = max(1000, total_exec_candles // 10)  # Log every 10% or every 1000 candles
+        progress_report_interval = max(200, total_exec_candles // 100)  # Progress callback every 1%
         
         logger.info(f"Starting execution loop: {total_exec_candles} candles to process, {len(signal_queue)} signals in queue")
         
         for i, (timestamp, row) in enumerate(df_exec.iterrows()):
-            # Progress logging
+            # Progress logging / reporting (the callback may cancel the run)
             if i > 0 and i % progress_log_interval == 0:
                 progress_pct = (i / total_exec_candles) * 100
                 logger.info(f"Execution progress: {i}/{total_exec_candles} ({progress_pct:.1f}%), trades={executed_trades_count}, position={position}")
+            if i > 0 and i % progress_report_interval == 0:
+                self._report_progress('simulate', i, total_exec_candles, len(trades),
+                                      equity_curve.last_value(capital))
             # 爆仓后直接停止回测，输出结果
             if is_liquidated:
                 break
@@ -549,7 +585,7 @@ class BacktestService:
             if position == 0 and capital < min_capital_to_trade:
                 is_liquidated = True
                 capital = 0
-                equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                equity_curve.add(timestamp, 0)
                 continue
             
             open_ = row['open']
@@ -1005,10 +1041,10 @@ class BacktestService:
             else:
                 current_equity = capital
             
-            equity_curve.append({
-                'time': timestamp.strftime('%Y-%m-%d %H:%M'),
-                'value': round(max(0, current_equity), 2)
-            })
+            equity_curve.add(timestamp, round(max(0, current_equity), 2))
+        
+        self._report_progress('simulate', total_exec_candles, total_exec_candles, len(trades),
+                              equity_curve.last_value(capital))
         
         # Summary log
         logger.info(f"MTF simulation complete: executed_trades={executed_trades_count}, total_trades_recorded={len(trades)}, final_capital={capital:.2f}, final_position={position}")
@@ -1122,12 +1158,14 @@ class BacktestService:
         """
         
         # 1. Fetch candle data
+        self._report_progress('fetch_data')
         df = self._fetch_kline_data(market, symbol, timeframe, start_date, end_date)
         if df.empty:
             raise ValueError("No candle data available in the backtest date range")
         
         
         # 2. Execute indicator code to get signals (pass backtest params)
+        self._report_progress('indicator')
         backtest_params = {
             'leverage': leverage,
             'initial_capital': initial_capital,
@@ -1548,7 +1586,7 @@ import pandas as pd
         Args:
             trade_direction: Trade direction ('long', 'short', 'both')
         """
-        equity_curve = []
+        equity_curve = EquityCurve()
         trades = []
         total_commission_paid = 0
         is_liquidated = False
@@ -1709,7 +1747,11 @@ import pandas as pd
         add_long_price_arr = signals.get('add_long_price', pd.Series([0.0] * len(df))).values
         add_short_price_arr = signals.get('add_short_price', pd.Series([0.0] * len(df))).values
         
+        progress_report_interval = max(200, len(df) // 100)  # Progress callback every 1%
         for i, (timestamp, row) in enumerate(df.iterrows()):
+            if i > 0 and i % progress_report_interval == 0:
+                self._report_progress('simulate', i, len(df), len(trades),
+                                      equity_curve.last_value(capital))
             # 爆仓后直接停止回测，输出结果
             if is_liquidated:
                 break
@@ -1726,7 +1768,7 @@ import pandas as pd
                     'profit': round(-initial_capital, 2),
                     'balance': 0
                 })
-                equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                equity_curve.add(timestamp, 0)
                 break  # 直接停止
             
             # Use OHLC to evaluate triggers.
@@ -1809,7 +1851,7 @@ import pandas as pd
                         trend_add_times = dca_add_times = trend_reduce_times = adverse_reduce_times = 0
                         last_trend_add_anchor = last_dca_add_anchor = last_trend_reduce_anchor = last_adverse_reduce_anchor = None
 
-                        equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                        equity_curve.add(timestamp, round(capital, 2))
                         continue
 
                 if position_type == 'short' and position < 0:
@@ -1855,7 +1897,7 @@ import pandas as pd
                             position = 0
                             position_type = None
                             liquidation_price = 0
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                            equity_curve.add(timestamp, 0)
                             continue
 
                         capital += profit
@@ -1878,7 +1920,7 @@ import pandas as pd
                         trend_add_times = dca_add_times = trend_reduce_times = adverse_reduce_times = 0
                         last_trend_add_anchor = last_dca_add_anchor = last_trend_reduce_anchor = last_adverse_reduce_anchor = None
 
-                        equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                        equity_curve.add(timestamp, round(capital, 2))
                         continue
             
             # Handle exit signals (priority, SL/TP)
@@ -1955,7 +1997,7 @@ import pandas as pd
                     })
                     position = 0
                     position_type = None
-                    equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                    equity_curve.add(timestamp, 0)
                     continue
                 
                 capital += profit
@@ -2382,7 +2424,7 @@ import pandas as pd
                         if capital < min_capital_to_trade:
                             is_liquidated = True
                             capital = 0
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                            equity_curve.add(timestamp, 0)
                             continue
                     
                     # Now open long (position is guaranteed to be 0 here)
@@ -2473,7 +2515,7 @@ import pandas as pd
                             liquidation_price = 0
                             highest_since_entry = None
                             lowest_since_entry = None
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                            equity_curve.add(timestamp, round(capital, 2))
                             continue
             
             # open_short: can execute when position==0, OR when both_mode and position>0 (auto-close long first)
@@ -2506,7 +2548,7 @@ import pandas as pd
                         if capital < min_capital_to_trade:
                             is_liquidated = True
                             capital = 0
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                            equity_curve.add(timestamp, 0)
                             continue
                     
                     # Now open short (position is guaranteed to be 0 here)
@@ -2596,7 +2638,7 @@ import pandas as pd
                             liquidation_price = 0
                             highest_since_entry = None
                             lowest_since_entry = None
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                            equity_curve.add(timestamp, round(capital, 2))
                             continue
             
             # Check if liquidation hit (safety net)
@@ -2642,7 +2684,7 @@ import pandas as pd
                     
                     position = 0
                     position_type = None
-                    equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': capital})
+                    equity_curve.add(timestamp, capital)
                     continue
                     
                 elif position_type == 'short' and high >= liquidation_price:
@@ -2688,7 +2730,7 @@ import pandas as pd
                     
                     position = 0
                     position_type = None
-                    equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': capital})
+                    equity_curve.add(timestamp, capital)
                     continue
             
             # Record equity (unrealized PnL from close)
@@ -2705,10 +2747,7 @@ import pandas as pd
             if total_value < 0:
                 total_value = 0
             
-            equity_curve.append({
-                'time': timestamp.strftime('%Y-%m-%d %H:%M'),
-                'value': round(total_value, 2)
-            })
+            equity_curve.add(timestamp, round(total_value, 2))
         
         # Force exit at backtest end
         if position != 0:
@@ -2761,7 +2800,7 @@ import pandas as pd
                     })
             
             if equity_curve:
-                equity_curve[-1]['value'] = round(capital, 2)
+                equity_curve.set_last_value(round(capital, 2))
         
         return equity_curve, trades, total_commission_paid
     
@@ -2779,7 +2818,7 @@ import pandas as pd
         """
         使用旧格式信号进行交易模拟（保持兼容性）
         """
-        equity_curve = []
+        equity_curve = EquityCurve()
         trades = []
         total_commission_paid = 0  # Accumulated commission
         is_liquidated = False  # Liquidation flag
@@ -2874,7 +2913,11 @@ import pandas as pd
             except Exception:
                 signals_exec = signals
 
+        progress_report_interval = max(200, len(df) // 100)  # Progress callback every 1%
         for i, (timestamp, row) in enumerate(df.iterrows()):
+            if i > 0 and i % progress_report_interval == 0:
+                self._report_progress('simulate', i, len(df), len(trades),
+                                      equity_curve.last_value(capital))
             # 爆仓后直接停止回测，输出结果
             if is_liquidated:
                 break
@@ -2891,7 +2934,7 @@ import pandas as pd
                     'profit': round(-initial_capital, 2),
                     'balance': 0
                 })
-                equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                equity_curve.add(timestamp, 0)
                 continue
             
             signal = signals_exec.iloc[i] if i < len(signals_exec) else 0
@@ -2946,7 +2989,7 @@ import pandas as pd
                         liquidation_price = 0
                         highest_since_entry = None
                         lowest_since_entry = None
-                        equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                        equity_curve.add(timestamp, round(capital, 2))
                         continue
 
                 if position_type == 'short' and position < 0:
@@ -2993,7 +3036,7 @@ import pandas as pd
                             position = 0
                             position_type = None
                             liquidation_price = 0
-                            equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': 0})
+                            equity_curve.add(timestamp, 0)
                             continue
                         capital += profit
                         total_commission_paid += commission_fee
@@ -3010,7 +3053,7 @@ import pandas as pd
                         liquidation_price = 0
                         highest_since_entry = None
                         lowest_since_entry = None
-                        equity_curve.append({'time': timestamp.strftime('%Y-%m-%d %H:%M'), 'value': round(capital, 2)})
+                        equity_curve.add(timestamp, round(capital, 2))
                         continue
             
             # --- Parameterized scaling rules (also for old-format strategies) ---
@@ -3718,10 +3761,7 @@ import pandas as pd
                         })
                         position = 0
                         position_type = None
-                        equity_curve.append({
-                            'time': timestamp.strftime('%Y-%m-%d %H:%M'),
-                            'value': 0
-                        })
+                        equity_curve.add(timestamp, 0)
                         continue
                 elif position_type == 'short':
                     # Short爆仓：价格涨破爆仓线
@@ -3739,10 +3779,7 @@ import pandas as pd
                         })
                         position = 0
                         position_type = None
-                        equity_curve.append({
-                            'time': timestamp.strftime('%Y-%m-%d %H:%M'),
-                            'value': 0
-                        })
+                        equity_curve.add(timestamp, 0)
                         continue
             
             # Record equity
@@ -3764,10 +3801,7 @@ import pandas as pd
             if total_value < 0:
                 total_value = 0
             
-            equity_curve.append({
-                'time': timestamp.strftime('%Y-%m-%d %H:%M'),
-                'value': round(total_value, 2)
-            })
+            equity_curve.add(timestamp, round(total_value, 2))
         
         # Force exit at backtest end
         if position != 0:
@@ -3825,13 +3859,13 @@ import pandas as pd
             
             # Update last equity curve value with capital after forced exit
             if equity_curve:
-                equity_curve[-1]['value'] = round(capital, 2)
+                equity_curve.set_last_value(round(capital, 2))
         
         return equity_curve, trades, total_commission_paid
     
     def _calculate_metrics(
         self,
-        equity_curve: List,
+        equity_curve: EquityCurve,
         trades: List,
         initial_capital: float,
         timeframe: str,
@@ -3839,75 +3873,16 @@ import pandas as pd
         end_date: datetime,
         total_commission: float = 0
     ) -> Dict:
-        """计算回测指标"""
-        if not equity_curve:
-            return {}
-        
-        final_value = equity_curve[-1]['value']
-        total_return = (final_value - initial_capital) / initial_capital * 100
-        
-        # Calculate annualized return: simple, not compound
-        # For high-return strategies, compound annualization produces unrealistic numbers
-        actual_days = (end_date - start_date).total_seconds() / 86400
-        years = actual_days / 365.0
-        
-        # Simple annualization: annualized return = total return / years
-        if years > 0:
-            annual_return = total_return / years
-        else:
-            annual_return = 0
-        
-        # Calculate max drawdown
-        values = [e['value'] for e in equity_curve]
-        max_drawdown = self._calculate_max_drawdown(values)
-        
-        # Calculate Sharpe ratio
-        sharpe = self._calculate_sharpe(values, timeframe)
-        
-        # Calculate total PnL: final equity - initial capital (most accurate)
-        total_profit = final_value - initial_capital
-        
-        # Calculate win rate (all exit trades)
-        # Exit trades: trades with profit != 0
-        closing_trades = [t for t in trades if t.get('profit', 0) != 0]
-        win_trades = [t for t in closing_trades if t['profit'] > 0]
-        loss_trades = [t for t in closing_trades if t['profit'] < 0]
-        total_trades = len(closing_trades)
-        win_rate = len(win_trades) / total_trades * 100 if total_trades > 0 else 0
-        
-        # Calculate profit factor (= total profit / total loss)
-        total_wins = sum(t['profit'] for t in win_trades)
-        total_losses = abs(sum(t['profit'] for t in loss_trades))
-        profit_factor = total_wins / total_losses if total_losses > 0 else (total_wins if total_wins > 0 else 0)
-        
-        return {
-            'totalReturn': round(total_return, 2),
-            'annualReturn': round(annual_return, 2),
-            'maxDrawdown': round(max_drawdown, 2),
-            'sharpeRatio': round(sharpe, 2),
-            'winRate': round(win_rate, 2),
-            'profitFactor': round(profit_factor, 2),
-            'totalTrades': total_trades,
-            'totalProfit': round(total_profit, 2),
-            'totalCommission': round(total_commission, 2)
-        }
+        """计算回测指标（基于全分辨率权益曲线，见 backtest_metrics）"""
+        if isinstance(equity_curve, list):
+            equity_curve = EquityCurve.from_points(equity_curve)
+        return backtest_metrics.compute_metrics(
+            equity_curve, trades, initial_capital, timeframe, start_date, end_date, total_commission
+        )
     
     def _calculate_max_drawdown(self, values: List[float]) -> float:
         """计算最大回撤"""
-        if not values:
-            return 0
-        
-        peak = values[0]
-        max_dd = 0
-        
-        for value in values:
-            if value > peak:
-                peak = value
-            dd = (peak - value) / peak * 100
-            if dd > max_dd:
-                max_dd = dd
-        
-        return -max_dd
+        return backtest_metrics.max_drawdown(values)
     
     def _calculate_sharpe(self, values: List[float], timeframe: str = '1D', risk_free_rate: float = 0.02) -> float:
         """
@@ -3918,63 +3893,20 @@ import pandas as pd
             timeframe: 时间周期
             risk_free_rate: 无风险收益率（年化）
         """
-        if len(values) < 2:
-            return 0
-        
-        # Filter out zero values (post-liquidation data), avoid division by 0
-        valid_values = [v for v in values if v > 0]
-        if len(valid_values) < 2:
-            return 0
-        
-        # Determine annualization factor by timeframe
-        annualization_factor = {
-            '1m': 252 * 24 * 60,      # 1m candle: ~362,880
-            '5m': 252 * 24 * 12,      # 5分钟K：约72,576
-            '15m': 252 * 24 * 4,      # 15分钟K：约24,192
-            '30m': 252 * 24 * 2,      # 30分钟K：约12,096
-            '1H': 252 * 24,           # 1H candle: 6,048
-            '4H': 252 * 6,            # 4小时K：1,512
-            '1D': 252,                # 1D candle: 252
-            '1W': 52                  # 1W candle: 52
-        }.get(timeframe, 252)
-        
-        try:
-            # Calculate period returns
-            returns = np.diff(valid_values) / valid_values[:-1]
-            
-            # Filter invalid values
-            returns = returns[np.isfinite(returns)]
-            if len(returns) == 0:
-                return 0
-            
-            # Annualized mean return
-            avg_return = np.mean(returns) * annualization_factor
-            
-            # Annualized std (volatility)
-            std_return = np.std(returns) * np.sqrt(annualization_factor)
-            
-            if std_return == 0 or not np.isfinite(std_return):
-                return 0
-            
-            # Sharpe ratio = (annualized return - risk-free rate) / annualized volatility
-            sharpe = (avg_return - risk_free_rate) / std_return
-            return sharpe if np.isfinite(sharpe) else 0
-        except Exception as e:
-            logger.warning(f"Sharpe ratio calculation failed: {e}")
-            return 0
+        return backtest_metrics.sharpe_ratio(values, timeframe, risk_free_rate)
     
     def _format_result(
         self,
         metrics: Dict,
-        equity_curve: List,
+        equity_curve: EquityCurve,
         trades: List
     ) -> Dict[str, Any]:
         """格式化回测结果"""
-        # Simplify equity curve
-        max_points = 500
-        if len(equity_curve) > max_points:
-            step = len(equity_curve) // max_points
-            equity_curve = equity_curve[::step]
+        if isinstance(equity_curve, list):
+            equity_curve = EquityCurve.from_points(equity_curve)
+        # Display series: shape-preserving decimation to ~BACKTEST_EQUITY_POINTS points
+        # (metrics above were computed on the full-resolution curve)
+        cleaned_curve = equity_curve.to_points()
         
         # Clean NaN/Inf values for JSON serialization
         def clean_value(value):
@@ -3989,14 +3921,6 @@ import pandas as pd
         for key, value in metrics.items():
             cleaned_metrics[key] = clean_value(value)
         
-        # Clean equity_curve
-        cleaned_curve = []
-        for item in equity_curve:
-            cleaned_curve.append({
-                'time': item['time'],
-                'value': clean_value(item['value'])
-            })
-        
         # Clean trades
         cleaned_trades = []
         # Don't truncate trades: return all (frontend can paginate)
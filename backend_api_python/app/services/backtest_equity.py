@@ -0,0 +1,170 @@
+"""
+Backtest equity curve storage and display decimation.
+
+The simulators append one point per execution bar. EquityCurve keeps those points as two
+numeric arrays (int64 timestamps, float64 values) instead of a list of
+{'time': 'YYYY-mm-dd HH:MM', 'value': v} dicts, so a long 1m backtest neither allocates a dict
+and a formatted string per bar nor keeps them alive until the result is built. Metrics read the
+full-resolution `values`; only the points chosen for display are formatted.
+
+Display decimation (BACKTEST_EQUITY_DOWNSAMPLE):
+    lttb    Largest-Triangle-Three-Buckets (default): keeps the visual shape
+    minmax  min and max of each bucket: every spike and trough survives
+    stride  legacy fixed stride (equity_curve[::step])
+For lttb and minmax the first/last point, the global high/low and the max-drawdown peak and
+trough are always included, so the chart never understates the drawdown reported in metrics.
+BACKTEST_EQUITY_POINTS sets the target resolution (default 500).
+"""
+import os
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+DEFAULT_MAX_POINTS = int(os.getenv('BACKTEST_EQUITY_POINTS', '500'))
+DEFAULT_METHOD = (os.getenv('BACKTEST_EQUITY_DOWNSAMPLE') or 'lttb').strip().lower()
+
+
+class EquityCurve:
+    """Append-only equity series: add(timestamp, value) per bar."""
+
+    __slots__ = ('_times', '_values', '_tz')
+
+    def __init__(self):
+        self._times = array('q')
+        self._values = array('d')
+        self._tz = None
+
+    def add(self, timestamp, value: float) -> None:
+        ns = getattr(timestamp, 'value', None)
+        if ns is None:
+            timestamp = pd.Timestamp(timestamp)
+            ns = timestamp.value
+        if not self._times:
+            self._tz = getattr(timestamp, 'tzinfo', None)
+        self._times.append(int(ns))
+        self._values.append(float(value))
+
+    def last_value(self, default: float = 0.0) -> float:
+        return self._values[-1] if self._values else default
+
+    def set_last_value(self, value: float) -> None:
+        if self._values:
+            self._values[-1] = float(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __bool__(self) -> bool:
+        return len(self._values) > 0
+
+    @property
+    def values(self) -> np.ndarray:
+        """Full-resolution equity values (float64 copy)."""
+        return np.array(self._values, dtype=np.float64)
+
+    @property
+    def times(self) -> np.ndarray:
+        """Bar timestamps as int64 nanoseconds (UTC for tz-aware input, wall time otherwise)."""
+        return np.array(self._times, dtype=np.int64)
+
+    def to_series(self) -> pd.Series:
+        """Full-resolution curve as a Series indexed by (naive, exchange-local) bar time."""
+        idx = pd.to_datetime(self.times, utc=self._tz is not None)
+        if self._tz is not None:
+            idx = idx.tz_convert(self._tz).tz_localize(None)
+        return pd.Series(self.values, index=idx)
+
+    def format_times(self, indices: Iterable[int]) -> List[str]:
+        idx = pd.to_datetime(self.times[np.asarray(list(indices), dtype=np.int64)], utc=self._tz is not None)
+        if self._tz is not None:
+            idx = idx.tz_convert(self._tz)
+        return list(idx.strftime(TIME_FORMAT))
+
+    def to_points(self, max_points: Optional[int] = None, method: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Display series [{'time', 'value'}] with at most ~max_points points (NaN/Inf -> 0)."""
+        values = np.nan_to_num(self.values, nan=0.0, posinf=0.0, neginf=0.0)
+        indices = downsample_indices(values, max_points or DEFAULT_MAX_POINTS, method or DEFAULT_METHOD)
+        times = self.format_times(indices)
+        return [{'time': t, 'value': float(values[i])} for t, i in zip(times, indices)]
+
+    @classmethod
+    def from_points(cls, points: Iterable[Dict[str, Any]]) -> 'EquityCurve':
+        """Build from a legacy list of {'time', 'value'} dicts."""
+        curve = cls()
+        for p in points or []:
+            curve.add(pd.Timestamp(p['time']), p['value'])
+        return curve
+
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of n_out points that best keep the curve's shape."""
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.asarray(values, dtype=np.float64)
+    # n_out - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = edges[i]
+        end = max(edges[i + 1], start + 1)
+        nxt_start = end
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        nxt_end = max(nxt_end, nxt_start + 1)
+        avg_x = (nxt_start + nxt_end - 1) / 2.0
+        avg_y = y[nxt_start:nxt_end].mean()
+        xs = np.arange(start, end, dtype=np.float64)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """Min and max of each of n_out / 2 buckets (plus first and last point)."""
+    n = len(values)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(values, dtype=np.float64)
+    picked = [0, n - 1]
+    for bucket in np.array_split(np.arange(n), n_out // 2):
+        if len(bucket):
+            seg = y[bucket[0]:bucket[-1] + 1]
+            picked.append(bucket[0] + int(np.argmin(seg)))
+            picked.append(bucket[0] + int(np.argmax(seg)))
+    return np.unique(np.asarray(picked, dtype=np.int64))
+
+
+def extreme_indices(values: np.ndarray) -> List[int]:
+    """Global high/low and the peak/trough of the maximum drawdown."""
+    if len(values) == 0:
+        return []
+    y = np.asarray(values, dtype=np.float64)
+    running_max = np.maximum.accumulate(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(running_max > 0, (running_max - y) / running_max, 0.0)
+    trough = int(np.argmax(drawdown))
+    peak = int(np.argmax(y[:trough + 1]))
+    return [int(np.argmax(y)), int(np.argmin(y)), peak, trough]
+
+
+def downsample_indices(values: np.ndarray, max_points: int, method: str = 'lttb') -> np.ndarray:
+    """Indices of the display points (sorted, unique)."""
+    n = len(values)
+    max_points = max(3, int(max_points))
+    if n <= max_points:
+        return np.arange(n)
+    if method == 'stride':
+        return np.arange(0, n, n // max_points)
+    if method == 'minmax':
+        picked = minmax_indices(values, max_points)
+    else:
+        picked = lttb_indices(values, max_points)
+    return np.unique(np.concatenate([picked, np.asarray(extreme_indices(values), dtype=np.int64)]))
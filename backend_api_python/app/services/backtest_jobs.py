@@ -0,0 +1,656 @@
+"""
+Backtest job queue.
+
+Backtests are CPU heavy (a 5m multi-timeframe run can take minutes). Instead of running them
+inside the HTTP request, they are submitted as jobs to a bounded pool of worker processes:
+
+- qd_backtest_jobs holds job state (queued/running/success/failed, progress, run_id), so any
+  API process can answer status polls.
+- Identical in-flight jobs (same user + same parameters + same indicator code) are deduplicated:
+  submitting again returns the existing job.
+- The worker process runs BacktestService and writes the run into qd_backtest_runs
+  (backtest_store.save_backtest_run); only the run id travels back.
+- While simulating, the engine reports progress (exec candles processed, trades so far, equity)
+  into the job row; clients poll it or stream it via SSE. Cancellation is cooperative: the
+  progress hook sees cancel_requested and stops the simulation loop.
+- Robustness jobs (kind='robustness', see backtest_robustness) fan out one Monte Carlo task and
+  one backtest per walk-forward window over the same pool; a coordinator thread in the
+  submitting process collects them and stores the combined result in result_json. The job's
+  `tasks` (pool tasks it occupies) counts against BACKTEST_JOB_MAX_PENDING.
+
+Env:
+    BACKTEST_JOB_WORKERS       worker processes per API process (default 2)
+    BACKTEST_JOB_MAX_PENDING   max queued+running pool tasks across all processes (default 20)
+    BACKTEST_JOB_TIMEOUT_SEC   a running job not updated for this long is marked failed (default 900)
+    BACKTEST_JOB_QUEUE_TIMEOUT_SEC  a job still queued this long after submission is marked failed
+                               (default 3600; queued jobs are only waiting for a free worker)
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DONE_STATES = ('success', 'failed', 'cancelled')
+
+# Minimum seconds between progress writes of one job
+PROGRESS_WRITE_INTERVAL_SEC = 1.0
+
+# Overall job progress (%) at the start of each engine phase; 'simulate' spans 10..95
+PHASE_PROGRESS = {
+    'fetch_data': 2,
+    'indicator': 5,
+    'fetch_exec_data': 8,
+    'simulate': 10,
+}
+
+
+class BacktestQueueFull(Exception):
+    """Too many backtest jobs in flight."""
+
+
+def job_key(params: Dict[str, Any]) -> str:
+    """Dedup key: identical parameters + indicator code from the same user."""
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def execute_backtest(params: Dict[str, Any], progress_callback=None) -> Dict[str, Any]:
+    """
+    Run one backtest from request params (dates as YYYY-MM-DD strings) and return the result.
+    Runs inside the job worker process.
+    """
+    from app.services.backtest import BacktestService
+
+    service = BacktestService(progress_callback=progress_callback)
+    # Start date: 00:00:00; end date: 23:59:59 so the whole day is included
+    start_date = datetime.strptime(params['start_date'], '%Y-%m-%d')
+    end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+    common = dict(
+        indicator_code=params['indicator_code'],
+        market=params['market'],
+        symbol=params['symbol'],
+        timeframe=params['timeframe'],
+        start_date=start_date,
+        end_date=end_date,
+        initial_capital=params['initial_capital'],
+        commission=params['commission'],
+        slippage=params['slippage'],
+        leverage=params['leverage'],
+        trade_direction=params['trade_direction'],
+        strategy_config=params['strategy_config'],
+    )
+    # Multi-timeframe (high precision) backtest for crypto when enabled
+    if params.get('enable_mtf') and str(params['market']).lower() in ['crypto', 'cryptocurrency']:
+        return service.run_multi_timeframe(enable_mtf=True, **common)
+
+    result = service.run(**common)
+    result['precision_info'] = {
+        'enabled': False,
+        'timeframe': params['timeframe'],
+        'precision': 'standard',
+        'message': '使用标准K线回测'
+    }
+    return result
+
+
+def _save_run(params: Dict[str, Any], status: str, result: Optional[Dict[str, Any]] = None,
+              error_message: str = '') -> Optional[int]:
+    from app.services.backtest_store import save_backtest_run
+
+    return save_backtest_run(
+        user_id=params['user_id'],
+        indicator_id=params.get('indicator_id'),
+        market=params['market'],
+        symbol=params['symbol'],
+        timeframe=params['timeframe'],
+        start_date=params['start_date'],
+        end_date=params['end_date'],
+        initial_capital=params['initial_capital'],
+        commission=params['commission'],
+        slippage=params['slippage'],
+        leverage=params['leverage'],
+        trade_direction=params['trade_direction'],
+        strategy_config=params['strategy_config'],
+        status=status,
+        error_message=error_message,
+        result=result,
+    )
+
+
+def update_job(job_id: int, now_cols: Tuple[str, ...] = (), **fields) -> None:
+    """
+    Update job columns (status/progress/message/run_id/error_type/error_message/result_json).
+    now_cols: timestamp columns to set to NOW() (started_at/finished_at).
+    """
+    sets = [f"{col} = ?" for col in fields] + [f"{col} = NOW()" for col in now_cols]
+    values = list(fields.values())
+    with get_db_connection() as db:
+        cur = db.cursor()
+        cur.execute(
+            f"UPDATE qd_backtest_jobs SET {', '.join(sets)}, updated_at = NOW() WHERE id = ?",
+            (*values, int(job_id))
+        )
+        db.commit()
+        cur.close()
+
+
+class JobProgress:
+    """
+    Progress hook handed to BacktestService: writes progress into the job row (throttled)
+    and raises BacktestCancelled once cancellation was requested.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = int(job_id)
+        self._last_write = 0.0
+        self._last_phase = None
+
+    def __call__(self, info: Dict[str, Any]) -> None:
+        phase = info.get('phase') or ''
+        now = time.time()
+        # Always write phase changes; within a phase at most once per interval
+        if phase == self._last_phase and now - self._last_write < PROGRESS_WRITE_INTERVAL_SEC:
+            return
+        self._last_phase = phase
+        self._last_write = now
+
+        progress = PHASE_PROGRESS.get(phase, 1)
+        total = int(info.get('total') or 0)
+        if phase == 'simulate' and total > 0:
+            progress = 10 + int(85 * min(1.0, int(info.get('processed') or 0) / total))
+
+        if _write_progress(self.job_id, progress, phase, info):
+            from app.services.backtest import BacktestCancelled
+            raise BacktestCancelled(f"Backtest job {self.job_id} cancelled")
+
+
+class CancelCheck:
+    """
+    Progress hook for the sub-tasks of a job (walk-forward windows): leaves the job's progress
+    to the coordinator and only polls cancel_requested (throttled), raising BacktestCancelled.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = int(job_id)
+        self._last_check = 0.0
+
+    def __call__(self, info: Dict[str, Any]) -> None:
+        now = time.time()
+        if now - self._last_check < PROGRESS_WRITE_INTERVAL_SEC:
+            return
+        self._last_check = now
+        if _cancel_requested(self.job_id):
+            from app.services.backtest import BacktestCancelled
+            raise BacktestCancelled(f"Backtest job {self.job_id} cancelled")
+
+
+def _cancel_requested(job_id: int) -> bool:
+    try:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute("SELECT cancel_requested FROM qd_backtest_jobs WHERE id = ?", (int(job_id),))
+            row = cur.fetchone() or {}
+            cur.close()
+        return bool(row.get('cancel_requested'))
+    except Exception as e:
+        logger.debug(f"Backtest job {job_id} cancel check skipped: {e}")
+        return False
+
+
+def _write_progress(job_id: int, progress: int, message: str, detail: Dict[str, Any]) -> bool:
+    """Write progress into the job row; returns True once cancellation was requested."""
+    row = {}
+    try:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                UPDATE qd_backtest_jobs
+                SET progress = ?, message = ?, progress_detail = ?, updated_at = NOW()
+                WHERE id = ?
+                RETURNING cancel_requested
+                """,
+                (progress, message, json.dumps(detail, ensure_ascii=False), int(job_id))
+            )
+            row = cur.fetchone() or {}
+            db.commit()
+            cur.close()
+    except Exception as e:
+        # Progress is best-effort; never fail the backtest because of it
+        logger.debug(f"Backtest job {job_id} progress write skipped: {e}")
+    return bool(row.get('cancel_requested'))
+
+
+def _claim_job(job_id: int) -> bool:
+    """queued -> running; False if the job was cancelled (or expired) before it started."""
+    with get_db_connection() as db:
+        cur = db.cursor()
+        cur.execute(
+            """
+            UPDATE qd_backtest_jobs
+            SET status = 'running', progress = 1, message = 'running', started_at = NOW(), updated_at = NOW()
+            WHERE id = ? AND status = 'queued' AND NOT cancel_requested
+            """,
+            (int(job_id),)
+        )
+        claimed = cur.rowcount
+        db.commit()
+        cur.close()
+    return claimed > 0
+
+
+def run_backtest_job(job_id: int, params: Dict[str, Any]) -> Optional[int]:
+    """
+    Worker-process entry point: run the backtest, persist the run, update the job row.
+    Returns the qd_backtest_runs id.
+    """
+    from app.services.backtest import BacktestCancelled
+
+    if not _claim_job(job_id):
+        return None
+    try:
+        result = execute_backtest(params, progress_callback=JobProgress(job_id))
+    except BacktestCancelled:
+        update_job(job_id, status='cancelled', message='cancelled', now_cols=('finished_at',))
+        return None
+    except Exception as e:
+        logger.error(f"Backtest job {job_id} failed: {e}\n{traceback.format_exc()}")
+        error_type = 'invalid' if isinstance(e, ValueError) else 'error'
+        try:
+            _save_run(params, 'failed', error_message=str(e))
+        except Exception:
+            pass
+        update_job(job_id, status='failed', message='failed', error_message=str(e)[:2000],
+                   error_type=error_type, now_cols=('finished_at',))
+        return None
+
+    run_id = None
+    try:
+        run_id = _save_run(params, 'success', result=result or {})
+    except Exception as e:
+        logger.warning(f"Backtest job {job_id}: failed to persist run: {e}")
+        update_job(job_id, status='failed', message='failed', error_message=f'persist_failed: {e}'[:2000],
+                   error_type='error', now_cols=('finished_at',))
+        return None
+    update_job(job_id, status='success', progress=100, message='done', run_id=run_id, now_cols=('finished_at',))
+    return run_id
+
+
+class BacktestJobManager:
+    """Submits backtest jobs to a process pool and tracks them in qd_backtest_jobs."""
+
+    def __init__(self):
+        self.max_workers = max(1, int(os.getenv('BACKTEST_JOB_WORKERS', '2')))
+        self.max_pending = max(1, int(os.getenv('BACKTEST_JOB_MAX_PENDING', '20')))
+        self.job_timeout_sec = max(60, int(os.getenv('BACKTEST_JOB_TIMEOUT_SEC', '900')))
+        self.queue_timeout_sec = max(self.job_timeout_sec, int(os.getenv('BACKTEST_JOB_QUEUE_TIMEOUT_SEC', '3600')))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._ensure_table()
+
+    def _ensure_table(self):
+        """Best-effort: create the job table for old databases."""
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS qd_backtest_jobs (
+                        id SERIAL PRIMARY KEY,
+                        user_id INTEGER NOT NULL,
+                        job_key VARCHAR(64) NOT NULL,
+                        status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                        progress INTEGER DEFAULT 0,
+                        message VARCHAR(255) DEFAULT '',
+                        params_json TEXT DEFAULT '',
+                        run_id INTEGER,
+                        error_type VARCHAR(20) DEFAULT '',
+                        error_message TEXT DEFAULT '',
+                        progress_detail TEXT DEFAULT '',
+                        cancel_requested BOOLEAN DEFAULT FALSE,
+                        created_at TIMESTAMP DEFAULT NOW(),
+                        updated_at TIMESTAMP DEFAULT NOW(),
+                        started_at TIMESTAMP,
+                        finished_at TIMESTAMP
+                    )
+                """)
+                cur.execute("ALTER TABLE qd_backtest_jobs ADD COLUMN IF NOT EXISTS progress_detail TEXT DEFAULT ''")
+                cur.execute("ALTER TABLE qd_backtest_jobs ADD COLUMN IF NOT EXISTS cancel_requested BOOLEAN DEFAULT FALSE")
+                cur.execute("ALTER TABLE qd_backtest_jobs ADD COLUMN IF NOT EXISTS kind VARCHAR(20) DEFAULT 'backtest'")
+                cur.execute("ALTER TABLE qd_backtest_jobs ADD COLUMN IF NOT EXISTS result_json TEXT DEFAULT ''")
+                cur.execute("ALTER TABLE qd_backtest_jobs ADD COLUMN IF NOT EXISTS tasks INTEGER DEFAULT 1")
+                cur.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_backtest_jobs_active_key
+                    ON qd_backtest_jobs(job_key) WHERE status IN ('queued', 'running')
+                """)
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_backtest_jobs_user ON qd_backtest_jobs(user_id, id DESC)")
+                db.commit()
+                cur.close()
+        except Exception as e:
+            logger.warning(f"qd_backtest_jobs schema check skipped: {e}")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is not None:
+            return self._pool
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process holding DB connections / background threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                logger.info(f"Backtest job pool started: workers={self.max_workers}")
+            return self._pool
+
+    def _expire_stale_jobs(self, cur) -> None:
+        """
+        Jobs whose worker died (API restart, OOM) stop being updated; fail them so dedup/limits recover.
+        Running jobs expire on a stale updated_at (they write progress); queued jobs are only
+        waiting in the pool backlog and expire on their age instead.
+        """
+        cur.execute(
+            f"""
+            UPDATE qd_backtest_jobs
+            SET status = 'failed', error_type = 'timeout', error_message = 'job lost or timed out',
+                finished_at = NOW(), updated_at = NOW()
+            WHERE (status = 'running' AND updated_at < NOW() - INTERVAL '{int(self.job_timeout_sec)} seconds')
+               OR (status = 'queued' AND created_at < NOW() - INTERVAL '{int(self.queue_timeout_sec)} seconds')
+            """
+        )
+
+    def submit(self, params: Dict[str, Any]) -> Tuple[int, bool]:
+        """
+        Submit a backtest job.
+
+        Returns:
+            (job_id, deduplicated) - deduplicated=True if an identical job was already in flight
+
+        Raises:
+            BacktestQueueFull: too many jobs in flight
+        """
+        job_id, deduplicated = self._create_job(params, job_key(params))
+        if deduplicated:
+            return job_id, True
+
+        try:
+            future = self._get_pool().submit(run_backtest_job, job_id, params)
+        except Exception as e:
+            update_job(job_id, status='failed', message='failed', error_type='error',
+                       error_message=f'submit_failed: {e}', now_cols=('finished_at',))
+            raise
+        future.add_done_callback(lambda f, jid=job_id: self._on_done(jid, f))
+        return job_id, False
+
+    def _create_job(self, params: Dict[str, Any], key: str, kind: str = 'backtest',
+                    extra: Optional[Dict[str, Any]] = None, tasks: int = 1) -> Tuple[int, bool]:
+        """
+        Insert a queued job row (or find the identical in-flight one): (job_id, deduplicated).
+        tasks: pool tasks the job will occupy, counted against max_pending.
+        """
+        summary = {k: v for k, v in params.items() if k != 'indicator_code'}
+        summary.update(extra or {})
+        with get_db_connection() as db:
+            cur = db.cursor()
+            self._expire_stale_jobs(cur)
+            cur.execute(
+                "SELECT id FROM qd_backtest_jobs WHERE job_key = ? AND status IN ('queued', 'running')",
+                (key,)
+            )
+            existing = cur.fetchone()
+            if existing:
+                db.commit()
+                cur.close()
+                return int(existing['id']), True
+
+            cur.execute(
+                "SELECT COALESCE(SUM(COALESCE(tasks, 1)), 0) AS cnt FROM qd_backtest_jobs WHERE status IN ('queued', 'running')"
+            )
+            inflight = int((cur.fetchone() or {}).get('cnt') or 0)
+            if inflight + tasks > self.max_pending:
+                db.commit()
+                cur.close()
+                raise BacktestQueueFull(f"Too many backtests in progress ({inflight}), please retry later")
+
+            cur.execute(
+                """
+                INSERT INTO qd_backtest_jobs (user_id, job_key, kind, tasks, status, progress, message, params_json, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', 0, 'queued', ?, NOW(), NOW())
+                ON CONFLICT (job_key) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING id
+                """,
+                (int(params['user_id']), key, kind, int(tasks), json.dumps(summary, ensure_ascii=False, default=str))
+            )
+            job_id = cur.lastrowid
+            if job_id is None:
+                # Lost a race with an identical submission
+                cur.execute(
+                    "SELECT id FROM qd_backtest_jobs WHERE job_key = ? AND status IN ('queued', 'running')",
+                    (key,)
+                )
+                existing = cur.fetchone()
+                db.commit()
+                cur.close()
+                if existing:
+                    return int(existing['id']), True
+                raise RuntimeError("Failed to create backtest job")
+            db.commit()
+            cur.close()
+        return int(job_id), False
+
+    def submit_robustness(self, params: Dict[str, Any], profits: List[float],
+                          options: Dict[str, Any], original: Optional[Dict[str, Any]] = None) -> Tuple[int, bool]:
+        """
+        Submit a robustness analysis of a completed run.
+
+        Args:
+            params: backtest params of the run (as produced for submit(), incl. indicator code)
+            profits: PnL of the run's trades in execution order (Monte Carlo input)
+            options: {'run_id', 'monte_carlo': {simulations, method, seed} | None,
+                      'walk_forward': {windows, window_days, step_days} | None}
+            original: headline metrics of the run, echoed in the result for comparison
+
+        Returns / Raises: as submit()
+        """
+        from app.services.backtest_robustness import walk_forward_windows
+
+        windows = []
+        if options.get('walk_forward') is not None:
+            wf = options['walk_forward']
+            windows = walk_forward_windows(params['start_date'], params['end_date'], wf.get('windows'),
+                                           wf.get('window_days'), wf.get('step_days'))
+        if options.get('monte_carlo') is None and not windows:
+            raise ValueError('Nothing to analyze: enable monteCarlo and/or walkForward')
+        tasks = len(windows) + (1 if options.get('monte_carlo') is not None else 0)
+        if tasks > self.max_pending:
+            raise ValueError(f'Too many walk-forward windows ({len(windows)}); at most '
+                             f'{self.max_pending - 1} per analysis')
+
+        key = job_key({'kind': 'robustness', **params, 'options': options})
+        job_id, deduplicated = self._create_job(params, key, kind='robustness',
+                                                extra={'robustness': options}, tasks=tasks)
+        if deduplicated:
+            return job_id, True
+        threading.Thread(
+            target=self._run_robustness,
+            args=(job_id, params, profits, options, windows, original or {}),
+            name=f'backtest-robustness-{job_id}',
+            daemon=True,
+        ).start()
+        return job_id, False
+
+    def _run_robustness(self, job_id: int, params: Dict[str, Any], profits: List[float],
+                        options: Dict[str, Any], windows: List[Tuple[str, str]],
+                        original: Dict[str, Any]) -> None:
+        """Coordinator thread: fan the tasks out over the process pool and collect the result."""
+        from app.services.backtest_robustness import run_monte_carlo, run_window, summarize_walk_forward
+
+        try:
+            if not _claim_job(job_id):
+                return
+            pool = self._get_pool()
+            tasks = {}
+            if options.get('monte_carlo') is not None:
+                f = pool.submit(run_monte_carlo, profits, float(params['initial_capital']), options['monte_carlo'])
+                tasks[f] = None
+            for start, end in windows:
+                f = pool.submit(run_window, {**params, 'start_date': start, 'end_date': end}, job_id)
+                tasks[f] = (start, end)
+
+            monte_carlo = None
+            window_results = []
+            pending = set(tasks)
+            while pending:
+                done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for f in done:
+                    window = tasks[f]
+                    exc = f.exception()
+                    if window is None:
+                        if exc is not None:
+                            raise exc
+                        monte_carlo = f.result()
+                    elif exc is not None:
+                        logger.warning(f"Robustness job {job_id} window {window[0]}..{window[1]} failed: {exc}")
+                        window_results.append({'startDate': window[0], 'endDate': window[1], 'error': str(exc)[:300]})
+                    else:
+                        window_results.append(f.result())
+                finished = len(tasks) - len(pending)
+                progress = 1 + int(98 * finished / len(tasks))
+                detail = {'phase': 'robustness', 'processed': finished, 'total': len(tasks)}
+                if _write_progress(job_id, progress, 'robustness', detail):
+                    for f in pending:
+                        f.cancel()
+                    update_job(job_id, status='cancelled', message='cancelled', now_cols=('finished_at',))
+                    return
+
+            result = {
+                'runId': options.get('run_id'),
+                'original': original,
+                'monteCarlo': monte_carlo,
+                'walkForward': summarize_walk_forward(window_results) if windows else None,
+            }
+            update_job(job_id, status='success', progress=100, message='done',
+                       result_json=json.dumps(result, ensure_ascii=False), now_cols=('finished_at',))
+        except Exception as e:
+            logger.error(f"Robustness job {job_id} failed: {e}\n{traceback.format_exc()}")
+            if 'BrokenProcessPool' in type(e).__name__:
+                with self._lock:
+                    self._pool = None
+            try:
+                update_job(job_id, status='failed', message='failed', error_type='error',
+                           error_message=str(e)[:2000], now_cols=('finished_at',))
+            except Exception:
+                pass
+
+    def _on_done(self, job_id: int, future) -> None:
+        # Worker crashed (BrokenProcessPool etc.) before it could record the outcome
+        exc = RuntimeError('cancelled') if future.cancelled() else future.exception()
+        if exc is None:
+            return
+        logger.error(f"Backtest job {job_id} worker error: {exc}")
+        try:
+            update_job(job_id, status='failed', message='failed', error_type='error',
+                       error_message=f'worker_error: {exc}'[:2000], now_cols=('finished_at',))
+        except Exception:
+            pass
+        if 'BrokenProcessPool' in type(exc).__name__:
+            with self._lock:
+                self._pool = None
+
+    def get_job(self, job_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            self._expire_stale_jobs(cur)
+            db.commit()
+            cur.execute(
+                """
+                SELECT id, user_id, kind, status, progress, message, progress_detail, cancel_requested,
+                       params_json, run_id, result_json, error_type, error_message,
+                       created_at, updated_at, started_at, finished_at
+                FROM qd_backtest_jobs
+                WHERE id = ? AND user_id = ?
+                """,
+                (int(job_id), int(user_id))
+            )
+            row = cur.fetchone()
+            cur.close()
+        return row
+
+    def list_jobs(self, user_id: int, limit: int = 20):
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT id, kind, status, progress, message, progress_detail, cancel_requested,
+                       params_json, run_id, error_type, error_message,
+                       created_at, started_at, finished_at
+                FROM qd_backtest_jobs
+                WHERE user_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (int(user_id), int(limit))
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        return rows
+
+    def cancel(self, job_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Request cancellation. A queued job is cancelled immediately; a running job stops at its
+        next progress check. Returns the job row (None if not found).
+        """
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                UPDATE qd_backtest_jobs
+                SET cancel_requested = TRUE,
+                    status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                    message = CASE WHEN status = 'queued' THEN 'cancelled' ELSE 'cancelling' END,
+                    finished_at = CASE WHEN status = 'queued' THEN NOW() ELSE finished_at END,
+                    updated_at = NOW()
+                WHERE id = ? AND user_id = ? AND status IN ('queued', 'running')
+                """,
+                (int(job_id), int(user_id))
+            )
+            db.commit()
+            cur.close()
+        return self.get_job(job_id, user_id)
+
+    def wait(self, job_id: int, user_id: int, timeout_sec: float, poll_sec: float = 0.5) -> Optional[Dict[str, Any]]:
+        """Poll until the job finishes (or timeout); returns the last seen job row."""
+        deadline = time.time() + max(0.0, float(timeout_sec))
+        job = self.get_job(job_id, user_id)
+        while job and job.get('status') not in DONE_STATES and time.time() < deadline:
+            time.sleep(poll_sec)
+            job = self.get_job(job_id, user_id)
+        return job
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_backtest_job_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_backtest_job_manager() -> BacktestJobManager:
+    global _backtest_job_manager
+    if _backtest_job_manager is None:
+        with _manager_lock:
+            if _backtest_job_manager is None:
+                _backtest_job_manager = BacktestJobManager()
+    return _backtest_job_manager
@@ -0,0 +1,289 @@
+"""
+Vectorized backtest metrics.
+
+Operates on the full-resolution equity arrays of EquityCurve and on the trade list converted to
+NumPy arrays once, so computing metrics stays cheap for curves with hundreds of thousands of
+points and for every run of a parameter sweep.
+
+Headline metrics keep their historical definitions (totalReturn, annualReturn, maxDrawdown,
+sharpeRatio, winRate, profitFactor, totalTrades, totalProfit, totalCommission). Additional
+statistics:
+    sortinoRatio, calmarRatio, volatility (annualized, %)
+    maxDrawdownDuration (longest run of consecutive bars below the running peak)
+    avgWin, avgLoss, largestWin, largestLoss, expectancy (per closing trade)
+    avgHoldingHours, exposure (% of the backtest period with an open position)
+    monthlyReturns / yearlyReturns: [{'period': '2024-01', 'return': 1.23}, ...] (%)
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_equity import EquityCurve
+
+# Bars per year by timeframe (trading-day based, as used for Sharpe historically)
+ANNUALIZATION_FACTORS = {
+    '1m': 252 * 24 * 60,
+    '5m': 252 * 24 * 12,
+    '15m': 252 * 24 * 4,
+    '30m': 252 * 24 * 2,
+    '1H': 252 * 24,
+    '4H': 252 * 6,
+    '1D': 252,
+    '1W': 52,
+}
+
+# Trade types that close the whole position (reduce_* only when it takes the size to zero)
+_CLOSE_PREFIXES = ('close', 'liquidation')
+
+# Trade amounts are rounded to 4 decimals: a reduce leaving less than this is a full close
+_FLAT_ABS_TOL = 1e-4
+_FLAT_REL_TOL = 1e-3
+
+
+def annualization_factor(timeframe: str) -> int:
+    return ANNUALIZATION_FACTORS.get(timeframe, 252)
+
+
+def _finite(value: float, default: float = 0.0) -> float:
+    value = float(value)
+    return value if np.isfinite(value) else default
+
+
+# ----------------------------------------------------------------------------
+# Equity-based metrics
+# ----------------------------------------------------------------------------
+
+def drawdown_series(values: np.ndarray) -> np.ndarray:
+    """Drawdown from the running peak per bar, in % (>= 0)."""
+    y = np.asarray(values, dtype=np.float64)
+    if y.size == 0:
+        return y
+    peak = np.maximum.accumulate(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = np.where(peak > 0, (peak - y) / peak * 100.0, 0.0)
+    return dd
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    """Maximum drawdown in % as a non-positive number (e.g. -12.5)."""
+    dd = drawdown_series(values)
+    worst = float(dd.max()) if dd.size else 0.0
+    return -worst if worst > 0 else 0.0
+
+
+def max_drawdown_duration(values: np.ndarray) -> int:
+    """Longest run of consecutive bars below the running peak."""
+    dd = drawdown_series(values)
+    if dd.size == 0:
+        return 0
+    underwater = dd > 0
+    if not underwater.any():
+        return 0
+    # Lengths of consecutive underwater runs
+    edges = np.diff(np.concatenate(([0], underwater.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def period_returns(values: np.ndarray) -> np.ndarray:
+    """Bar-to-bar returns, ignoring zero equity (post-liquidation bars)."""
+    y = np.asarray(values, dtype=np.float64)
+    y = y[y > 0]
+    if y.size < 2:
+        return np.empty(0)
+    returns = np.diff(y) / y[:-1]
+    return returns[np.isfinite(returns)]
+
+
+def sharpe_ratio(values: np.ndarray, timeframe: str = '1D', risk_free_rate: float = 0.02) -> float:
+    returns = period_returns(values)
+    if returns.size == 0:
+        return 0.0
+    af = annualization_factor(timeframe)
+    avg_return = returns.mean() * af
+    std_return = returns.std() * np.sqrt(af)
+    if std_return == 0 or not np.isfinite(std_return):
+        return 0.0
+    return _finite((avg_return - risk_free_rate) / std_return)
+
+
+def sortino_ratio(values: np.ndarray, timeframe: str = '1D', risk_free_rate: float = 0.02) -> float:
+    returns = period_returns(values)
+    if returns.size == 0:
+        return 0.0
+    af = annualization_factor(timeframe)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) * np.sqrt(af)
+    if downside == 0 or not np.isfinite(downside):
+        return 0.0
+    return _finite((returns.mean() * af - risk_free_rate) / downside)
+
+
+def annualized_volatility(values: np.ndarray, timeframe: str = '1D') -> float:
+    returns = period_returns(values)
+    if returns.size == 0:
+        return 0.0
+    return _finite(returns.std() * np.sqrt(annualization_factor(timeframe)) * 100.0)
+
+
+def calmar_ratio(annual_return_pct: float, max_drawdown_pct: float) -> float:
+    if not max_drawdown_pct:
+        return 0.0
+    return _finite(annual_return_pct / abs(max_drawdown_pct))
+
+
+def periodic_returns(series: pd.Series, initial_capital: float, freq: str = 'M') -> List[Dict[str, Any]]:
+    """
+    Return per calendar period (freq 'M' or 'Y') from period-end equity, in %.
+
+    The first period is measured against initial_capital.
+    """
+    if series is None or series.empty:
+        return []
+    closes = series.groupby(series.index.to_period(freq)).last()
+    ends = closes.to_numpy(dtype=np.float64)
+    starts = np.concatenate(([float(initial_capital)], ends[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rets = np.where(starts > 0, (ends / starts - 1.0) * 100.0, 0.0)
+    return [
+        {'period': str(period), 'return': round(_finite(r), 2)}
+        for period, r in zip(closes.index, rets)
+    ]
+
+
+# ----------------------------------------------------------------------------
+# Trade-based metrics
+# ----------------------------------------------------------------------------
+
+def trade_arrays(trades: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """profit / amount / type / time (int64 ns, NaT as int64 min) columns of the trade list."""
+    profit = np.fromiter((float(t.get('profit') or 0.0) for t in trades), dtype=np.float64, count=len(trades))
+    amount = np.fromiter((float(t.get('amount') or 0.0) for t in trades), dtype=np.float64, count=len(trades))
+    types = np.array([str(t.get('type') or '') for t in trades], dtype=object)
+    times = pd.DatetimeIndex(pd.to_datetime([t.get('time') for t in trades], errors='coerce'))
+    # pandas >= 2 may parse to a coarser unit (datetime64[us]); always hand out nanoseconds
+    times_ns = times.values.astype('datetime64[ns]').view(np.int64)
+    return {'profit': profit, 'amount': amount, 'type': types, 'time': times_ns}
+
+
+def trade_stats(profit: np.ndarray) -> Dict[str, Any]:
+    """Win rate / profit factor / expectancy over closing trades (profit != 0)."""
+    closing = profit[profit != 0]
+    wins = closing[closing > 0]
+    losses = closing[closing < 0]
+    total = int(closing.size)
+    total_wins = float(wins.sum())
+    total_losses = float(abs(losses.sum()))
+    if total_losses > 0:
+        profit_factor = total_wins / total_losses
+    else:
+        profit_factor = total_wins if total_wins > 0 else 0
+    return {
+        'winRate': wins.size / total * 100 if total > 0 else 0,
+        'profitFactor': profit_factor,
+        'totalTrades': total,
+        'avgWin': float(wins.mean()) if wins.size else 0.0,
+        'avgLoss': float(losses.mean()) if losses.size else 0.0,
+        'largestWin': float(wins.max()) if wins.size else 0.0,
+        'largestLoss': float(losses.min()) if losses.size else 0.0,
+        'expectancy': float(closing.mean()) if total else 0.0,
+    }
+
+
+def holding_periods_sec(types: np.ndarray, times_ns: np.ndarray,
+                        amounts: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Seconds from each position's first open_* trade to the trade that closes it.
+
+    With amounts, open/add/reduce trades track the position size and a reduce_* that takes it
+    to zero closes the position as well.
+    """
+    periods = []
+    opened_at: Optional[int] = None
+    size = peak = 0.0
+    nat = np.iinfo(np.int64).min
+    if amounts is None:
+        amounts = np.zeros(len(types), dtype=np.float64)
+    for kind, ts, amount in zip(types, times_ns, amounts):
+        if ts == nat:
+            continue
+        closes = kind.startswith(_CLOSE_PREFIXES)
+        if kind.startswith('open'):
+            if opened_at is None:
+                opened_at = int(ts)
+                size = peak = 0.0
+            size += amount
+            peak = max(peak, size)
+        elif kind.startswith('add'):
+            size += amount
+            peak = max(peak, size)
+        elif kind.startswith('reduce') and opened_at is not None and peak > 0:
+            size -= amount
+            closes = size <= max(_FLAT_ABS_TOL, peak * _FLAT_REL_TOL)
+        if closes and opened_at is not None:
+            periods.append((int(ts) - opened_at) / 1e9)
+            opened_at = None
+            size = peak = 0.0
+    return np.asarray(periods, dtype=np.float64)
+
+
+# ----------------------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------------------
+
+def compute_metrics(
+    equity_curve: EquityCurve,
+    trades: List[Dict[str, Any]],
+    initial_capital: float,
+    timeframe: str,
+    start_date: datetime,
+    end_date: datetime,
+    total_commission: float = 0,
+) -> Dict[str, Any]:
+    """All backtest metrics for one run (rounded as returned to the frontend)."""
+    if not equity_curve:
+        return {}
+    values = equity_curve.values
+    final_value = float(values[-1])
+    total_return = (final_value - initial_capital) / initial_capital * 100
+
+    # Simple (not compound) annualization: compounding produces unrealistic numbers
+    # for high-return strategies
+    years = (end_date - start_date).total_seconds() / 86400 / 365.0
+    annual_return = total_return / years if years > 0 else 0
+
+    mdd = max_drawdown(values)
+    arrays = trade_arrays(trades or [])
+    stats = trade_stats(arrays['profit'])
+    holding = holding_periods_sec(arrays['type'], arrays['time'], arrays['amount'])
+    span_sec = (end_date - start_date).total_seconds()
+    exposure = min(100.0, float(holding.sum()) / span_sec * 100.0) if span_sec > 0 and holding.size else 0.0
+
+    series = equity_curve.to_series()
+
+    return {
+        'totalReturn': round(total_return, 2),
+        'annualReturn': round(annual_return, 2),
+        'maxDrawdown': round(mdd, 2),
+        'sharpeRatio': round(sharpe_ratio(values, timeframe), 2),
+        'winRate': round(stats['winRate'], 2),
+        'profitFactor': round(stats['profitFactor'], 2),
+        'totalTrades': stats['totalTrades'],
+        'totalProfit': round(final_value - initial_capital, 2),
+        'totalCommission': round(total_commission, 2),
+        'sortinoRatio': round(sortino_ratio(values, timeframe), 2),
+        'calmarRatio': round(calmar_ratio(annual_return, mdd), 2),
+        'volatility': round(annualized_volatility(values, timeframe), 2),
+        'maxDrawdownDuration': max_drawdown_duration(values),
+        'avgWin': round(stats['avgWin'], 2),
+        'avgLoss': round(stats['avgLoss'], 2),
+        'largestWin': round(stats['largestWin'], 2),
+        'largestLoss': round(stats['largestLoss'], 2),
+        'expectancy': round(stats['expectancy'], 2),
+        'avgHoldingHours': round(float(holding.mean()) / 3600.0, 2) if holding.size else 0.0,
+        'exposure': round(float(exposure), 2),
+        'monthlyReturns': periodic_returns(series, initial_capital, 'M'),
+        'yearlyReturns': periodic_returns(series, initial_capital, 'Y'),
+    }
@@ -0,0 +1,216 @@
+"""
+Robustness analysis of a completed backtest run.
+
+Two analyses, both returning distributions of return and max drawdown instead of a single path:
+
+- Monte Carlo: the run's closing-trade PnLs are resampled (bootstrap = with replacement,
+  shuffle = permutation of the actual sequence) into many alternative equity paths. Paths are
+  built as (simulations x trades) matrices with cumsum / running max, in chunks of at most
+  BACKTEST_MONTE_CARLO_CHUNK_CELLS cells. PnLs are resampled as absolute amounts (position
+  sizes of the original run), and a path that reaches zero equity stays at zero.
+- Walk-forward: the strategy is re-run unchanged on consecutive (or rolling) date windows of
+  the original range, each window a separate backtest fetching its own candles. This shows
+  whether the result comes from one lucky period.
+
+The pieces run as tasks in the backtest job process pool (see
+BacktestJobManager.submit_robustness); this module holds the pure functions those tasks call.
+
+Env:
+    BACKTEST_MONTE_CARLO_MAX_SIMS      upper bound for simulations per request (default 20000)
+    BACKTEST_MONTE_CARLO_CHUNK_CELLS   matrix cells per chunk (default 5000000)
+    BACKTEST_WALK_FORWARD_MAX_WINDOWS  upper bound for walk-forward windows (default 12; plus the
+                                       Monte Carlo task, must fit BACKTEST_JOB_MAX_PENDING)
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAX_SIMULATIONS = int(os.getenv('BACKTEST_MONTE_CARLO_MAX_SIMS', '20000'))
+CHUNK_CELLS = int(os.getenv('BACKTEST_MONTE_CARLO_CHUNK_CELLS', '5000000'))
+MAX_WINDOWS = int(os.getenv('BACKTEST_WALK_FORWARD_MAX_WINDOWS', '12'))
+
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 20
+
+DEFAULT_WINDOWS = 6
+
+# ValueErrors of a window that ran but traded nothing (a flat outcome); every other
+# ValueError (no candles, invalid code/parameters) means the window has no result
+_NO_TRADE_ERRORS = ('No signals generated', 'No trades executed')
+
+# Result keys kept per walk-forward window
+WINDOW_METRICS = ('totalReturn', 'annualReturn', 'maxDrawdown', 'sharpeRatio', 'winRate',
+                  'profitFactor', 'totalTrades')
+
+
+def distribution(values: np.ndarray) -> Dict[str, Any]:
+    """Summary statistics + histogram of a 1-D sample."""
+    x = np.asarray(values, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if x.size == 0:
+        return {'count': 0}
+    counts, edges = np.histogram(x, bins=HISTOGRAM_BINS)
+    out = {
+        'count': int(x.size),
+        'mean': round(float(x.mean()), 4),
+        'std': round(float(x.std()), 4),
+        'min': round(float(x.min()), 4),
+        'max': round(float(x.max()), 4),
+        'histogram': {
+            'edges': [round(float(e), 4) for e in edges],
+            'counts': [int(c) for c in counts],
+        },
+    }
+    for p, v in zip(PERCENTILES, np.percentile(x, PERCENTILES)):
+        out[f'p{p}'] = round(float(v), 4)
+    return out
+
+
+def _simulate_paths(pnl: np.ndarray, initial_capital: float, idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Final return (%) and max drawdown (%, <= 0) of each row of trade indices."""
+    equity = initial_capital + np.cumsum(pnl[idx], axis=1)
+    # Ruin is absorbing: after the first non-positive point the path stays at zero
+    alive = np.logical_and.accumulate(equity > 0, axis=1)
+    equity = np.where(alive, equity, 0.0)
+    paths = np.concatenate([np.full((idx.shape[0], 1), float(initial_capital)), equity], axis=1)
+    peak = np.maximum.accumulate(paths, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = np.where(peak > 0, (peak - paths) / peak * 100.0, 0.0).max(axis=1)
+    final_return = (paths[:, -1] / float(initial_capital) - 1.0) * 100.0
+    return final_return, -dd
+
+
+def monte_carlo(
+    profits: Sequence[float],
+    initial_capital: float,
+    simulations: int = 1000,
+    method: str = 'bootstrap',
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Resample closing-trade PnLs into `simulations` equity paths.
+
+    Args:
+        profits: PnL of each closing trade, in execution order
+        method: 'bootstrap' (with replacement) or 'shuffle' (permutation)
+    """
+    pnl = np.asarray([p for p in profits if p], dtype=np.float64)
+    simulations = max(1, min(int(simulations), MAX_SIMULATIONS))
+    method = 'shuffle' if str(method).lower() == 'shuffle' else 'bootstrap'
+    if pnl.size < 2 or initial_capital <= 0:
+        return {'method': method, 'simulations': 0, 'trades': int(pnl.size),
+                'message': 'At least 2 closing trades are required'}
+
+    rng = np.random.default_rng(seed)
+    n = pnl.size
+    rows_per_chunk = max(1, CHUNK_CELLS // n)
+    returns, drawdowns = [], []
+    for start in range(0, simulations, rows_per_chunk):
+        k = min(rows_per_chunk, simulations - start)
+        if method == 'shuffle':
+            idx = rng.permuted(np.tile(np.arange(n), (k, 1)), axis=1)
+        else:
+            idx = rng.integers(0, n, size=(k, n))
+        r, d = _simulate_paths(pnl, initial_capital, idx)
+        returns.append(r)
+        drawdowns.append(d)
+    returns = np.concatenate(returns)
+    drawdowns = np.concatenate(drawdowns)
+
+    original_return, original_dd = _simulate_paths(pnl, initial_capital, np.arange(n)[None, :])
+    return {
+        'method': method,
+        'simulations': simulations,
+        'trades': int(n),
+        'totalReturn': distribution(returns),
+        'maxDrawdown': distribution(drawdowns),
+        'probabilityOfLoss': round(float((returns < 0).mean() * 100.0), 2),
+        'probabilityOfRuin': round(float((returns <= -100.0).mean() * 100.0), 2),
+        # Where the actual trade order lands within the simulated distribution (%)
+        'originalReturnPercentile': round(float((returns <= original_return[0]).mean() * 100.0), 2),
+        'originalDrawdownPercentile': round(float((drawdowns <= original_dd[0]).mean() * 100.0), 2),
+    }
+
+
+def walk_forward_windows(
+    start_date: str,
+    end_date: str,
+    windows: Optional[int] = None,
+    window_days: Optional[int] = None,
+    step_days: Optional[int] = None,
+) -> List[Tuple[str, str]]:
+    """
+    (start, end) YYYY-MM-DD pairs covering [start_date, end_date].
+
+    Default: `windows` (6) consecutive, equally long windows. With window_days the windows
+    start every step_days (default window_days; smaller = overlapping) and `windows` is the
+    maximum count (default: as many as fit). Never more than MAX_WINDOWS.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    total_days = (end - start).days + 1
+    if windows:
+        limit = max(1, min(int(windows), MAX_WINDOWS))
+    else:
+        limit = MAX_WINDOWS if window_days else min(DEFAULT_WINDOWS, MAX_WINDOWS)
+    window_days = max(1, int(window_days or total_days // limit or 1))
+    step_days = max(1, int(step_days or window_days))
+
+    out = []
+    cursor = start
+    while len(out) < limit:
+        window_end = cursor + timedelta(days=window_days - 1)
+        if window_end > end:
+            break
+        out.append((cursor.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')))
+        cursor += timedelta(days=step_days)
+    return out
+
+
+def run_window(params: Dict[str, Any], job_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Process-pool task: re-run the backtest on one window and keep only its metrics.
+    A window that ran without signals or trades is a valid (flat) outcome; a window without
+    candles or with invalid input is reported as an error and left out of the distributions.
+    With job_id the simulation stops as soon as the job's cancellation is requested.
+    """
+    from app.services.backtest import BacktestCancelled
+    from app.services.backtest_jobs import CancelCheck, execute_backtest
+
+    window = {'startDate': params['start_date'], 'endDate': params['end_date']}
+    try:
+        result = execute_backtest(params, progress_callback=CancelCheck(job_id) if job_id else None)
+    except BacktestCancelled:
+        return {**window, 'error': 'cancelled'}
+    except ValueError as e:
+        if str(e).startswith(_NO_TRADE_ERRORS):
+            return {**window, 'totalReturn': 0.0, 'maxDrawdown': 0.0, 'totalTrades': 0, 'note': str(e)[:300]}
+        return {**window, 'error': str(e)[:300]}
+    return {**window, **{k: result.get(k) for k in WINDOW_METRICS}}
+
+
+def run_monte_carlo(profits: Sequence[float], initial_capital: float, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool task wrapper of monte_carlo()."""
+    return monte_carlo(
+        profits,
+        initial_capital,
+        simulations=int(options.get('simulations') or 1000),
+        method=options.get('method') or 'bootstrap',
+        seed=options.get('seed'),
+    )
+
+
+def summarize_walk_forward(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Distribution of window returns / drawdowns plus the per-window rows (in date order)."""
+    rows = sorted(results, key=lambda r: r.get('startDate') or '')
+    returns = np.array([float(r.get('totalReturn') or 0.0) for r in rows if 'error' not in r])
+    drawdowns = np.array([float(r.get('maxDrawdown') or 0.0) for r in rows if 'error' not in r])
+    return {
+        'windows': rows,
+        'totalReturn': distribution(returns),
+        'maxDrawdown': distribution(drawdowns),
+        'profitableWindows': round(float((returns > 0).mean() * 100.0), 2) if returns.size else 0.0,
+        'failedWindows': sum(1 for r in rows if 'error' in r),
+    }
@@ -0,0 +1,318 @@
+"""
+Backtest run persistence (qd_backtest_runs).
+
+Storage layout:
+- Headline metrics (totalReturn / winRate / maxDrawdown / ...) are typed, indexed columns,
+  so history lists and community rankings never touch the result payload.
+- result_summary: the small remainder of the result (metrics, precision_info, ...) as JSON text.
+- result_detail: equityCurve + trades, JSON encoded and gzip compressed (BYTEA),
+  only decoded when a single run is opened (/backtest/get).
+
+Legacy rows written before this layout only have result_json; readers fall back to it.
+"""
+import gzip
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# column name -> result key
+METRIC_COLUMNS = {
+    'total_return': 'totalReturn',
+    'annual_return': 'annualReturn',
+    'max_drawdown': 'maxDrawdown',
+    'sharpe_ratio': 'sharpeRatio',
+    'win_rate': 'winRate',
+    'profit_factor': 'profitFactor',
+    'total_trades': 'totalTrades',
+    'total_profit': 'totalProfit',
+}
+
+# Bulky result keys moved into the compressed detail blob
+DETAIL_KEYS = ('equityCurve', 'trades')
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_backtest_run_schema():
+    """Best-effort: add metric/detail columns and indexes for old databases (once per process)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                for col in ('total_return', 'annual_return', 'max_drawdown', 'sharpe_ratio',
+                            'win_rate', 'profit_factor', 'total_profit'):
+                    cur.execute(f"ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS {col} DOUBLE PRECISION")
+                cur.execute("ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS total_trades INTEGER")
+                cur.execute("ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS result_summary TEXT")
+                cur.execute("ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS result_detail BYTEA")
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_backtest_runs_indicator_metrics
+                    ON qd_backtest_runs(indicator_id, status)
+                    INCLUDE (total_return, win_rate, max_drawdown, total_trades)
+                """)
+                db.commit()
+                cur.close()
+            _schema_ready = True
+        except Exception as e:
+            logger.warning(f"Backtest run schema check skipped: {e}")
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def split_result(result: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a BacktestService result into (metric_columns, summary, detail).
+    """
+    result = result or {}
+    metrics = {}
+    for col, key in METRIC_COLUMNS.items():
+        val = result.get(key)
+        metrics[col] = int(val or 0) if col == 'total_trades' else _to_float(val)
+    summary = {k: v for k, v in result.items() if k not in DETAIL_KEYS}
+    detail = {k: result.get(k) or [] for k in DETAIL_KEYS}
+    return metrics, summary, detail
+
+
+def compress_detail(detail: Dict[str, Any]) -> bytes:
+    raw = json.dumps(detail, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(raw, compresslevel=6)
+
+
+def decompress_detail(blob) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    try:
+        return json.loads(gzip.decompress(bytes(blob)).decode('utf-8'))
+    except Exception as e:
+        logger.warning(f"Failed to decode backtest result detail: {e}")
+        return {}
+
+
+def save_backtest_run(
+    *,
+    user_id: int,
+    indicator_id: Optional[int],
+    market: str,
+    symbol: str,
+    timeframe: str,
+    start_date: str,
+    end_date: str,
+    initial_capital: float,
+    commission: float,
+    slippage: float,
+    leverage: int,
+    trade_direction: str,
+    strategy_config: Dict[str, Any],
+    status: str = 'success',
+    error_message: str = '',
+    result: Optional[Dict[str, Any]] = None,
+) -> Optional[int]:
+    """Insert a backtest run and return its id."""
+    ensure_backtest_run_schema()
+    metrics, summary, detail = split_result(result or {}) if result else ({c: None for c in METRIC_COLUMNS}, {}, {})
+    cols = list(METRIC_COLUMNS.keys())
+    with get_db_connection() as db:
+        cur = db.cursor()
+        cur.execute(
+            f"""
+            INSERT INTO qd_backtest_runs
+            (user_id, indicator_id, market, symbol, timeframe, start_date, end_date,
+             initial_capital, commission, slippage, leverage, trade_direction,
+             strategy_config, status, error_message, result_json,
+             {', '.join(cols)}, result_summary, result_detail, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '',
+                    {', '.join(['?'] * len(cols))}, ?, ?, NOW())
+            """,
+            (
+                user_id,
+                int(indicator_id) if indicator_id is not None else None,
+                market,
+                symbol,
+                timeframe,
+                start_date,
+                end_date,
+                initial_capital,
+                commission,
+                slippage,
+                leverage,
+                trade_direction,
+                json.dumps(strategy_config or {}, ensure_ascii=False),
+                status,
+                error_message,
+                *[metrics[c] for c in cols],
+                json.dumps(summary, ensure_ascii=False) if result else '',
+                compress_detail(detail) if result else None,
+            )
+        )
+        run_id = cur.lastrowid
+        db.commit()
+        cur.close()
+    return run_id
+
+
+def load_result(row: Dict[str, Any], include_detail: bool = True) -> Dict[str, Any]:
+    """
+    Rebuild the result dict for a run row.
+
+    Pops result_summary/result_detail/result_json from the row. Without include_detail only
+    the summary (metrics etc.) is returned, which is all list/AI-analysis views need.
+    """
+    summary_text = row.pop('result_summary', None)
+    blob = row.pop('result_detail', None)
+    legacy = row.pop('result_json', None)
+
+    if summary_text:
+        try:
+            result = json.loads(summary_text)
+        except Exception:
+            result = {}
+        if include_detail:
+            result.update(decompress_detail(blob))
+        return result
+
+    # Legacy row: everything lives in result_json
+    try:
+        result = json.loads(legacy or '{}')
+    except Exception:
+        result = {}
+    if not include_detail:
+        for k in DETAIL_KEYS:
+            result.pop(k, None)
+    return result
+
+
+def metrics_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Metric columns of a row keyed by their result names (camelCase)."""
+    out = {}
+    for col, key in METRIC_COLUMNS.items():
+        if col in row:
+            val = row.pop(col)
+            out[key] = (int(val) if col == 'total_trades' else float(val)) if val is not None else None
+    return out
+
+
+def backfill_legacy_runs(batch_size: int = 200, max_batches: int = 0) -> int:
+    """
+    Move legacy result_json payloads into metric columns + summary + compressed detail.
+
+    Returns the number of rows migrated. max_batches=0 means until done.
+    """
+    ensure_backtest_run_schema()
+    cols = list(METRIC_COLUMNS.keys())
+    migrated = 0
+    batches = 0
+    while True:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT id, result_json FROM qd_backtest_runs
+                WHERE result_summary IS NULL AND result_json IS NOT NULL AND result_json != ''
+                ORDER BY id
+                LIMIT ?
+                """,
+                (int(batch_size),)
+            )
+            rows = cur.fetchall() or []
+            if not rows:
+                cur.close()
+                break
+            for row in rows:
+                try:
+                    result = json.loads(row['result_json'] or '{}')
+                except Exception:
+                    result = {}
+                metrics, summary, detail = split_result(result)
+                cur.execute(
+                    f"""
+                    UPDATE qd_backtest_runs
+                    SET {', '.join(f'{c} = ?' for c in cols)},
+                        result_summary = ?, result_detail = ?, result_json = ''
+                    WHERE id = ?
+                    """,
+                    (*[metrics[c] for c in cols], json.dumps(summary, ensure_ascii=False),
+                     compress_detail(detail), row['id'])
+                )
+            db.commit()
+            cur.close()
+        migrated += len(rows)
+        batches += 1
+        if max_batches and batches >= max_batches:
+            break
+    return migrated
+
+
+def aggregate_indicator_metrics(cur, indicator_id: int) -> Dict[str, Any]:
+    """
+    Aggregate successful backtest runs of an indicator on the given cursor.
+
+    New-layout rows are aggregated in SQL over the metric columns; only legacy rows
+    (no result_summary yet) still have their result_json parsed here.
+    """
+    ensure_backtest_run_schema()
+    cur.execute(
+        """
+        SELECT COUNT(*) AS run_count,
+               COALESCE(SUM(total_return), 0) AS sum_return,
+               COALESCE(SUM(win_rate), 0) AS sum_win_rate,
+               MIN(max_drawdown) AS min_drawdown,
+               COALESCE(SUM(total_trades), 0) AS total_trades
+        FROM qd_backtest_runs
+        WHERE indicator_id = ? AND status = 'success' AND result_summary IS NOT NULL
+        """,
+        (indicator_id,)
+    )
+    row = cur.fetchone() or {}
+    run_count = int(row.get('run_count') or 0)
+    sum_return = float(row.get('sum_return') or 0)
+    sum_win_rate = float(row.get('sum_win_rate') or 0)
+    min_drawdown = float(row['min_drawdown']) if row.get('min_drawdown') is not None else None
+    total_trades = int(row.get('total_trades') or 0)
+
+    cur.execute(
+        """
+        SELECT result_json
+        FROM qd_backtest_runs
+        WHERE indicator_id = ? AND status = 'success' AND result_summary IS NULL
+          AND result_json IS NOT NULL AND result_json != ''
+        """,
+        (indicator_id,)
+    )
+    for legacy in cur.fetchall() or []:
+        try:
+            rj = json.loads(legacy['result_json'])
+            tr = float(rj.get('totalReturn', 0) or 0)
+            wr = float(rj.get('winRate', 0) or 0)
+            md = float(rj.get('maxDrawdown', 0) or 0)
+            tc = int(rj.get('totalTrades', 0) or 0)
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+            continue
+        run_count += 1
+        sum_return += tr
+        sum_win_rate += wr
+        min_drawdown = md if min_drawdown is None else min(min_drawdown, md)
+        total_trades += tc
+
+    return {
+        'run_count': run_count,
+        'avg_return': sum_return / run_count if run_count else 0.0,
+        'avg_win_rate': sum_win_rate / run_count if run_count else 0.0,
+        'min_drawdown': min_drawdown if min_drawdown is not None else 0.0,
+        'total_trades': total_trades,
+    }
@@ -3,7 +3,6 @@ Community Service - 指标社区服务
 
 处理指标市场、购买、评论等功能。
 """
-import json
 import time
 from decimal import Decimal
 from typing import Dict, Any, List, Optional, Tuple
@@ -11,12 +10,17 @@ from typing import Dict, Any, List, Optional, Tuple
 from app.utils.db import get_db_connection
 from app.utils.logger import get_logger
 from app.services.billing_service import get_billing_service
+from app.services.backtest_store import aggregate_indicator_metrics
+from app.utils.text_search import keyword_query
 
 logger = get_logger(__name__)
 
 
 class CommunityService:
     """指标社区服务类"""
+
+    # qd_indicator_live_stats 汇总的有效期（秒），过期后按需重新聚合
+    LIVE_STATS_TTL_SEC = 300
     
     def __init__(self):
         self.billing = get_billing_service()
@@ -25,6 +29,16 @@ class CommunityService:
             with get_db_connection() as db:
                 cur = db.cursor()
                 cur.execute("ALTER TABLE qd_indicator_codes ADD COLUMN IF NOT EXISTS vip_free BOOLEAN DEFAULT FALSE")
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS qd_indicator_live_stats (
+                        indicator_id INTEGER PRIMARY KEY,
+                        strategy_count INTEGER DEFAULT 0,
+                        trade_count INTEGER DEFAULT 0,
+                        win_count INTEGER DEFAULT 0,
+                        total_profit DECIMAL(20,8) DEFAULT 0,
+                        refreshed_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
                 db.commit()
                 cur.close()
         except Exception:
@@ -40,7 +54,7 @@ class CommunityService:
         page_size: int = 12,
         keyword: str = None,
         pricing_type: str = None,  # 'free' / 'paid' / None(all)
-        sort_by: str = 'newest',   # 'newest' / 'hot' / 'price_asc' / 'price_desc' / 'rating'
+        sort_by: str = 'newest',   # 'newest' / 'hot' / 'price_asc' / 'price_desc' / 'rating' / 'relevance'(需 keyword)
         user_id: int = None        # 当前用户ID，用于判断是否已购买
     ) -> Dict[str, Any]:
         """获取市场上已发布的指标列表"""
@@ -54,10 +68,10 @@ class CommunityService:
                 where_clauses = ["i.publish_to_community = 1", "(i.review_status = 'approved' OR i.review_status IS NULL)"]
                 params = []
                 
-                if keyword and keyword.strip():
-                    where_clauses.append("(i.name ILIKE ? OR i.description ILIKE ?)")
-                    search_term = f"%{keyword.strip()}%"
-                    params.extend([search_term, search_term])
+                search = keyword_query(["i.name", "i.description"], keyword) if keyword and keyword.strip() else None
+                if search:
+                    where_clauses.append(search.where_sql)
+                    params.extend(search.where_params)
                 
                 if pricing_type == 'free':
                     where_clauses.append("(i.pricing_type = 'free' OR i.price <= 0)")
@@ -75,6 +89,10 @@ class CommunityService:
                     'rating': 'i.avg_rating DESC, i.rating_count DESC'
                 }
                 order_sql = order_map.get(sort_by, 'i.created_at DESC')
+                order_params = []
+                if search and sort_by == 'relevance':
+                    order_sql = f"{search.rank_sql} DESC, i.purchase_count DESC, i.created_at DESC"
+                    order_params = list(search.rank_params)
                 
                 # 获取总数
                 count_sql = f"""
@@ -99,7 +117,7 @@ class CommunityService:
                     ORDER BY {order_sql}
                     LIMIT ? OFFSET ?
                 """
-                cur.execute(query_sql, tuple(params + [page_size, offset]))
+                cur.execute(query_sql, tuple(params + order_params + [page_size, offset]))
                 rows = cur.fetchall() or []
                 
                 # 如果有当前用户，查询已购买的指标
@@ -887,12 +905,63 @@ class CommunityService:
     # 实盘表现（聚合回测 + 实盘交易数据）
     # ==========================================
 
+    def _get_indicator_live_stats(self, cur, indicator_id: int) -> Dict[str, Any]:
+        """
+        读取指标的实盘汇总（qd_indicator_live_stats），过期或缺失时重新聚合并写回（由调用方提交）。
+
+        通过 qd_strategies_trading.indicator_id 索引关联策略，不再扫描 indicator_config 文本。
+        """
+        cur.execute("""
+            SELECT strategy_count, trade_count, win_count, total_profit
+            FROM qd_indicator_live_stats
+            WHERE indicator_id = %s AND refreshed_at > NOW() - INTERVAL '1 second' * %s
+        """, (indicator_id, self.LIVE_STATS_TTL_SEC))
+        row = cur.fetchone()
+
+        if not row:
+            cur.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM qd_strategies_trading WHERE indicator_id = %s) AS strategy_count,
+                    COUNT(t.id) AS trade_count,
+                    COALESCE(SUM(CASE WHEN t.profit > 0 THEN 1 ELSE 0 END), 0) AS win_count,
+                    COALESCE(SUM(t.profit), 0) AS total_profit
+                FROM qd_strategies_trading s
+                JOIN qd_strategy_trades t ON t.strategy_id = s.id AND t.profit != 0
+                WHERE s.indicator_id = %s
+            """, (indicator_id, indicator_id))
+            row = cur.fetchone() or {}
+            cur.execute("""
+                INSERT INTO qd_indicator_live_stats
+                    (indicator_id, strategy_count, trade_count, win_count, total_profit, refreshed_at)
+                VALUES (%s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (indicator_id) DO UPDATE SET
+                    strategy_count = EXCLUDED.strategy_count,
+                    trade_count = EXCLUDED.trade_count,
+                    win_count = EXCLUDED.win_count,
+                    total_profit = EXCLUDED.total_profit,
+                    refreshed_at = EXCLUDED.refreshed_at
+                RETURNING indicator_id
+            """, (
+                indicator_id,
+                int(row.get('strategy_count') or 0),
+                int(row.get('trade_count') or 0),
+                int(row.get('win_count') or 0),
+                float(row.get('total_profit') or 0),
+            ))
+
+        return {
+            'strategy_count': int(row.get('strategy_count') or 0),
+            'trade_count': int(row.get('trade_count') or 0),
+            'win_count': int(row.get('win_count') or 0),
+            'total_profit': float(row.get('total_profit') or 0),
+        }
+
     def get_indicator_performance(self, indicator_id: int) -> Dict[str, Any]:
         """
         获取指标的实盘表现统计
 
         数据来源：
-        1. qd_backtest_runs - 回测记录（result_json 内含 totalReturn / winRate 等）
+        1. qd_backtest_runs - 回测记录（total_return / win_rate 等指标列）
         2. qd_strategy_trades + qd_strategies_trading - 真实实盘交易记录
         """
         default_result = {
@@ -908,38 +977,16 @@ class CommunityService:
             with get_db_connection() as db:
                 cur = db.cursor()
 
-                # ---------- Part 1: 回测数据（从 result_json 解析） ----------
-                bt_returns = []
-                bt_win_rates = []
-                bt_drawdowns = []
-                bt_trade_counts = []
-
+                # ---------- Part 1: 回测数据（指标列聚合，旧记录回退解析 result_json） ----------
+                bt = {'run_count': 0, 'avg_return': 0.0, 'avg_win_rate': 0.0,
+                      'min_drawdown': 0.0, 'total_trades': 0}
                 try:
-                    cur.execute("""
-                        SELECT result_json
-                        FROM qd_backtest_runs
-                        WHERE indicator_id = %s AND status = 'success'
-                              AND result_json IS NOT NULL AND result_json != ''
-                    """, (indicator_id,))
-                    rows = cur.fetchall()
-
-                    for row in rows:
-                        try:
-                            rj = json.loads(row['result_json']) if isinstance(row['result_json'], str) else {}
-                            tr = float(rj.get('totalReturn', 0) or 0)
-                            wr = float(rj.get('winRate', 0) or 0)
-                            md = float(rj.get('maxDrawdown', 0) or 0)
-                            tc = int(rj.get('totalTrades', 0) or 0)
-                            bt_returns.append(tr)
-                            bt_win_rates.append(wr)
-                            bt_drawdowns.append(md)
-                            bt_trade_counts.append(tc)
-                        except (json.JSONDecodeError, TypeError, ValueError):
-                            continue
+                    bt = aggregate_indicator_metrics(cur, indicator_id)
                 except Exception:
                     logger.debug("Backtest runs query skipped or failed", exc_info=True)
+                    db.rollback()
 
-                bt_run_count = len(bt_returns)
+                bt_run_count = bt['run_count']
 
                 # ---------- Part 2: 实盘交易数据 ----------
                 live_strategy_count = 0
@@ -948,67 +995,39 @@ class CommunityService:
                 live_total_profit = 0.0
 
                 try:
-                    # 找出使用该指标的策略（indicator_config JSON 中 indicator_id 匹配）
-                    cur.execute("""
-                        SELECT id FROM qd_strategies_trading
-                        WHERE indicator_config::text LIKE %s
-                    """, (f'%"indicator_id": {indicator_id}%',))
-                    strategy_rows = cur.fetchall()
-
-                    # 也尝试匹配无空格的格式
-                    if not strategy_rows:
-                        cur.execute("""
-                            SELECT id FROM qd_strategies_trading
-                            WHERE indicator_config::text LIKE %s
-                        """, (f'%"indicator_id":{indicator_id}%',))
-                        strategy_rows = cur.fetchall()
-
-                    if strategy_rows:
-                        strategy_ids = [r['id'] for r in strategy_rows]
-                        live_strategy_count = len(strategy_ids)
-
-                        placeholders = ','.join(['%s'] * len(strategy_ids))
-                        cur.execute(f"""
-                            SELECT 
-                                COUNT(*) as trade_count,
-                                SUM(CASE WHEN profit > 0 THEN 1 ELSE 0 END) as win_count,
-                                SUM(profit) as total_profit
-                            FROM qd_strategy_trades
-                            WHERE strategy_id IN ({placeholders})
-                              AND profit != 0
-                        """, tuple(strategy_ids))
-                        trade_row = cur.fetchone()
-
-                        if trade_row and (trade_row['trade_count'] or 0) > 0:
-                            live_trade_count = int(trade_row['trade_count'] or 0)
-                            win_count = int(trade_row['win_count'] or 0)
-                            live_win_rate = round(win_count / live_trade_count * 100, 2) if live_trade_count > 0 else 0.0
-                            live_total_profit = round(float(trade_row['total_profit'] or 0), 2)
+                    live = self._get_indicator_live_stats(cur, indicator_id)
+                    db.commit()
+                    live_strategy_count = live['strategy_count']
+                    live_trade_count = live['trade_count']
+                    if live_trade_count > 0:
+                        live_win_rate = round(live['win_count'] / live_trade_count * 100, 2)
+                        live_total_profit = round(live['total_profit'], 2)
                 except Exception:
                     logger.debug("Live trading query skipped or failed", exc_info=True)
+                    db.rollback()
 
                 cur.close()
 
                 # ---------- Combine results ----------
                 total_strategy_count = bt_run_count + live_strategy_count
-                total_trade_count = sum(bt_trade_counts) + live_trade_count
+                total_trade_count = bt['total_trades'] + live_trade_count
 
                 # 综合胜率：优先实盘 > 回测平均
                 if live_trade_count > 0:
                     combined_win_rate = live_win_rate
-                elif bt_win_rates:
-                    combined_win_rate = round(sum(bt_win_rates) / len(bt_win_rates), 2)
+                elif bt_run_count:
+                    combined_win_rate = round(bt['avg_win_rate'], 2)
                 else:
                     combined_win_rate = 0.0
 
                 # 平均收益率（回测 totalReturn %）
-                avg_return = round(sum(bt_returns) / len(bt_returns), 2) if bt_returns else 0.0
+                avg_return = round(bt['avg_return'], 2) if bt_run_count else 0.0
 
                 # 总利润：优先用实盘绝对利润，无实盘则显示回测平均收益率
                 combined_profit = live_total_profit if live_trade_count > 0 else avg_return
 
                 # 最大回撤取回测中最差的（maxDrawdown 是负数，取最小即最差）
-                avg_drawdown = round(min(bt_drawdowns), 2) if bt_drawdowns else 0.0
+                avg_drawdown = round(bt['min_drawdown'], 2) if bt_run_count else 0.0
 
                 if total_strategy_count == 0 and total_trade_count == 0:
                     return default_result
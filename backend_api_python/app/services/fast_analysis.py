@@ -236,8 +236,13 @@ class FastAnalysisService:
                         outcome += f", Return: {p['actual_return_pct']:.2f}%"
                     outcome += ")"
                 
+                asset = ""
+                if p.get("symbol") and p.get("symbol") != symbol:
+                    asset = f" on {p['symbol']}"
+                similarity = (p.get("similarity") or {}).get("score")
+                match = f" [similarity {similarity:.2f}]" if similarity is not None else ""
                 context_lines.append(
-                    f"- Decision: {p['decision']} at ${p.get('price', 'N/A')}{outcome}"
+                    f"- Decision: {p['decision']}{asset} at ${p.get('price', 'N/A')}{outcome}{match}"
                 )
             
             return "\n".join(context_lines)
@@ -4,36 +4,18 @@ Interactive Brokers Trading Client
 Uses ib_insync library to connect to TWS or IB Gateway for trading.
 """
 
-import time
 import threading
 import asyncio
+import concurrent.futures
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Tuple
 
 from app.utils.logger import get_logger
 from app.services.ibkr_trading.symbols import normalize_symbol, format_display_symbol
 
 logger = get_logger(__name__)
 
-
-def _ensure_event_loop():
-    """
-    Ensure there is an event loop in the current thread.
-    
-    ib_insync requires an asyncio event loop to function.
-    When called from Flask request threads, there may not be one.
-    """
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_closed():
-            raise RuntimeError("Event loop is closed")
-    except RuntimeError:
-        # No event loop exists in this thread, create one
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        logger.debug("Created new event loop for IBKR client")
-    return loop
-
 # Lazy import ib_insync to allow other features to work without it installed
 ib_insync = None
 
@@ -61,6 +43,9 @@ class IBKRConfig:
     readonly: bool = False
     account: str = ""  # Leave empty to auto-select first account
     timeout: float = 20.0  # Connection timeout in seconds
+    order_timeout: float = 10.0  # Max wait for a market order to reach a final status
+    quote_timeout: float = 2.0  # Max wait for the first tick of a new quote subscription
+    max_quote_subscriptions: int = 50  # Streaming quotes kept open (oldest evicted first)
 
 
 @dataclass
@@ -79,6 +64,11 @@ class IBKRClient:
     """
     Interactive Brokers Trading Client
     
+    All ib_insync calls run on a single background asyncio loop owned by the client,
+    so it can be used from any Flask / worker thread. Qualified contracts are cached,
+    order fills are awaited through trade status events instead of fixed sleeps, and
+    quotes are served from streaming market-data subscriptions.
+    
     Usage:
         config = IBKRConfig(port=7497)  # TWS Live
         client = IBKRClient(config)
@@ -93,12 +83,26 @@ class IBKRClient:
             client.disconnect()
     """
     
+    # Order statuses after which a trade will not change anymore
+    DONE_STATES = {"Filled", "Cancelled", "ApiCancelled", "Inactive"}
+    # Statuses before TWS has acknowledged the order
+    PENDING_STATES = {"", "PendingSubmit", "ApiPending"}
+    
     def __init__(self, config: Optional[IBKRConfig] = None):
         self.config = config or IBKRConfig()
         self._ib = None
         self._connected = False
         self._lock = threading.Lock()
         self._account = ""
+        
+        # Background event loop (created lazily, lives until disconnect)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        
+        # Only touched from the loop thread
+        self._contracts: Dict[Tuple[str, str], Any] = {}
+        self._tickers: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
     
     @property
     def connected(self) -> bool:
@@ -107,6 +111,81 @@ class IBKRClient:
             return False
         return self._ib.isConnected()
     
+    # ==================== Event Loop ====================
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the client's event loop thread if it is not running."""
+        with self._loop_lock:
+            if self._loop is not None and self._loop_thread is not None and self._loop_thread.is_alive():
+                return self._loop
+            
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            
+            def _run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+            
+            thread = threading.Thread(target=_run_loop, name=f"ibkr-loop-{self.config.client_id}", daemon=True)
+            thread.start()
+            ready.wait(5)
+            self._loop = loop
+            self._loop_thread = thread
+            logger.debug("Started IBKR event loop thread")
+            return loop
+    
+    def _stop_loop(self):
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            self._loop_thread = None
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+    
+    def _run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the client loop and block the calling thread for its result."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("IBKRClient blocking call made from its own event loop thread")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError("IBKR request timed out")
+    
+    def _call(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run a synchronous (non-blocking) ib_insync call on the loop thread."""
+        async def _invoke():
+            return fn(*args, **kwargs)
+        return self._run(_invoke(), timeout=timeout if timeout is not None else self.config.timeout)
+    
+    @staticmethod
+    async def _wait_until(event, obj, predicate: Callable[[Any], bool], timeout: Optional[float]) -> bool:
+        """
+        Wait until predicate(obj) holds, re-checking whenever `event` fires.
+        Returns False on timeout (timeout=None waits indefinitely).
+        """
+        if predicate(obj):
+            return True
+        future = asyncio.get_running_loop().create_future()
+        
+        def _on_event(*_args):
+            if not future.done() and predicate(obj):
+                future.set_result(True)
+        
+        event += _on_event
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return predicate(obj)
+        finally:
+            event -= _on_event
+    
+    # ==================== Connection ====================
+    
     def connect(self) -> bool:
         """
         Connect to TWS or IB Gateway.
@@ -119,28 +198,15 @@ class IBKRClient:
                 return True
             
             try:
-                # Ensure event loop exists in this thread (required by ib_insync)
-                _ensure_event_loop()
-                
                 _ensure_ib_insync()
                 
-                if self._ib is None:
-                    self._ib = ib_insync.IB()
-                
                 logger.info(f"Connecting to IBKR: {self.config.host}:{self.config.port} (clientId={self.config.client_id})")
                 
-                self._ib.connect(
-                    host=self.config.host,
-                    port=self.config.port,
-                    clientId=self.config.client_id,
-                    readonly=self.config.readonly,
-                    timeout=self.config.timeout
-                )
+                accounts = self._run(self._connect_async(), timeout=self.config.timeout + 5)
                 
                 self._connected = True
                 
                 # Get account
-                accounts = self._ib.managedAccounts()
                 if accounts:
                     self._account = self.config.account or accounts[0]
                     logger.info(f"IBKR connected, account: {self._account}")
@@ -154,26 +220,55 @@ class IBKRClient:
                 self._connected = False
                 return False
     
+    async def _connect_async(self) -> List[str]:
+        if self._ib is None:
+            # Created on the loop thread so ib_insync binds to this loop
+            self._ib = ib_insync.IB()
+        # Tickers/contracts of a dropped session (e.g. IB Gateway's daily restart) are dead:
+        # their subscriptions are gone and the tickers would stay frozen at the last quote
+        self._tickers.clear()
+        self._contracts.clear()
+        await self._ib.connectAsync(
+            host=self.config.host,
+            port=self.config.port,
+            clientId=self.config.client_id,
+            timeout=self.config.timeout,
+            readonly=self.config.readonly,
+        )
+        return list(self._ib.managedAccounts() or [])
+    
     def disconnect(self):
         """Disconnect from IBKR."""
         with self._lock:
             if self._ib is not None:
                 try:
-                    self._ib.disconnect()
+                    self._call(self._disconnect_sync, timeout=10)
                 except Exception as e:
                     logger.warning(f"IBKR disconnect exception: {e}")
                 finally:
                     self._connected = False
+                    self._ib = None
+                    self._stop_loop()
                     logger.info("IBKR disconnected")
     
+    def _disconnect_sync(self):
+        for ticker in self._tickers.values():
+            try:
+                self._ib.cancelMktData(ticker.contract)
+            except Exception:
+                pass
+        self._tickers.clear()
+        self._contracts.clear()
+        self._ib.disconnect()
+    
     def _ensure_connected(self):
         """Ensure connection is established."""
-        # Ensure event loop exists (may be called from different threads)
-        _ensure_event_loop()
         if not self.connected:
             if not self.connect():
                 raise ConnectionError("Cannot connect to IBKR")
     
+    # ==================== Contracts ====================
+    
     def _create_contract(self, symbol: str, market_type: str):
         """
         Create IB contract object.
@@ -194,32 +289,77 @@ class IBKRClient:
         
         return contract
     
-    def _qualify_contract(self, contract) -> bool:
-        """Validate contract."""
+    async def _qualified_contract(self, symbol: str, market_type: str):
+        """Qualified contract from cache, qualifying (one round trip) on first use. None if invalid."""
+        key = (str(symbol).strip().upper(), str(market_type))
+        contract = self._contracts.get(key)
+        if contract is not None:
+            return contract
         try:
-            qualified = self._ib.qualifyContracts(contract)
-            return len(qualified) > 0
+            qualified = await self._ib.qualifyContractsAsync(self._create_contract(symbol, market_type))
         except Exception as e:
             logger.warning(f"Contract qualification failed: {e}")
-            return False
+            return None
+        if not qualified:
+            return None
+        self._contracts[key] = qualified[0]
+        return qualified[0]
     
     # ==================== Order Methods ====================
     
+    @staticmethod
+    def _order_result(trade, message: str, **extra_raw) -> OrderResult:
+        status = trade.orderStatus
+        raw = {
+            "orderId": trade.order.orderId,
+            "status": status.status,
+            "filled": float(status.filled or 0),
+            "remaining": float(status.remaining or 0),
+        }
+        raw.update(extra_raw)
+        return OrderResult(
+            success=status.status not in ("Cancelled", "ApiCancelled", "Inactive"),
+            order_id=trade.order.orderId,
+            filled=float(status.filled or 0),
+            avg_price=float(status.avgFillPrice or 0),
+            status=status.status,
+            message=message if status.status not in ("Cancelled", "ApiCancelled", "Inactive")
+            else f"Order {status.status}",
+            raw=raw,
+        )
+    
+    async def _place_order_async(self, symbol: str, market_type: str, order, wait_done: bool, timeout: float):
+        contract = await self._qualified_contract(symbol, market_type)
+        if contract is None:
+            return None
+        trade = self._ib.placeOrder(contract, order)
+        if wait_done:
+            # Market order: resolve as soon as the order reaches a final status
+            await self._wait_until(trade.statusEvent, trade,
+                                   lambda t: t.orderStatus.status in self.DONE_STATES, timeout)
+        else:
+            # Limit order: resolve once TWS acknowledged it
+            await self._wait_until(trade.statusEvent, trade,
+                                   lambda t: t.orderStatus.status not in self.PENDING_STATES, timeout)
+        return trade
+    
     def place_market_order(
         self,
         symbol: str,
-        side: str,
-        quantity: float,
+        side: str = "",
+        quantity: float = 0.0,
         market_type: str = "USStock",
+        action: Optional[str] = None,
     ) -> OrderResult:
         """
-        Place a market order.
+        Place a market order and wait (event-driven, up to config.order_timeout) for it to fill.
         
         Args:
             symbol: Symbol code (e.g., AAPL, 0700.HK)
             side: Direction ("buy" or "sell")
             quantity: Number of shares
             market_type: Market type ("USStock")
+            action: Alias of side (used by the live trading executors)
             
         Returns:
             OrderResult
@@ -227,13 +367,7 @@ class IBKRClient:
         try:
             self._ensure_connected()
             _ensure_ib_insync()
-            
-            contract = self._create_contract(symbol, market_type)
-            if not self._qualify_contract(contract):
-                return OrderResult(
-                    success=False,
-                    message=f"Invalid contract: {symbol}"
-                )
+            side = side or action or ""
             
             order = ib_insync.MarketOrder(
                 action="BUY" if side.lower() == "buy" else "SELL",
@@ -241,25 +375,17 @@ class IBKRClient:
                 account=self._account
             )
             
-            trade = self._ib.placeOrder(contract, order)
-            
-            # Wait for order status update
-            self._ib.sleep(2)
-            
-            return OrderResult(
-                success=True,
-                order_id=trade.order.orderId,
-                filled=float(trade.orderStatus.filled or 0),
-                avg_price=float(trade.orderStatus.avgFillPrice or 0),
-                status=trade.orderStatus.status,
-                message="Order submitted",
-                raw={
-                    "orderId": trade.order.orderId,
-                    "status": trade.orderStatus.status,
-                    "filled": float(trade.orderStatus.filled or 0),
-                    "remaining": float(trade.orderStatus.remaining or 0),
-                }
+            trade = self._run(
+                self._place_order_async(symbol, market_type, order, True, self.config.order_timeout),
+                timeout=self.config.order_timeout + self.config.timeout,
             )
+            if trade is None:
+                return OrderResult(
+                    success=False,
+                    message=f"Invalid contract: {symbol}"
+                )
+            
+            return self._order_result(trade, "Order submitted")
             
         except Exception as e:
             logger.error(f"Order failed: {e}")
@@ -271,13 +397,14 @@ class IBKRClient:
     def place_limit_order(
         self,
         symbol: str,
-        side: str,
-        quantity: float,
-        price: float,
+        side: str = "",
+        quantity: float = 0.0,
+        price: float = 0.0,
         market_type: str = "USStock",
+        action: Optional[str] = None,
     ) -> OrderResult:
         """
-        Place a limit order.
+        Place a limit order (returns once TWS acknowledged it).
         
         Args:
             symbol: Symbol code
@@ -285,6 +412,7 @@ class IBKRClient:
             quantity: Number of shares
             price: Limit price
             market_type: Market type
+            action: Alias of side
             
         Returns:
             OrderResult
@@ -292,13 +420,7 @@ class IBKRClient:
         try:
             self._ensure_connected()
             _ensure_ib_insync()
-            
-            contract = self._create_contract(symbol, market_type)
-            if not self._qualify_contract(contract):
-                return OrderResult(
-                    success=False,
-                    message=f"Invalid contract: {symbol}"
-                )
+            side = side or action or ""
             
             order = ib_insync.LimitOrder(
                 action="BUY" if side.lower() == "buy" else "SELL",
@@ -307,22 +429,18 @@ class IBKRClient:
                 account=self._account
             )
             
-            trade = self._ib.placeOrder(contract, order)
-            self._ib.sleep(1)
-            
-            return OrderResult(
-                success=True,
-                order_id=trade.order.orderId,
-                filled=float(trade.orderStatus.filled or 0),
-                avg_price=float(trade.orderStatus.avgFillPrice or 0),
-                status=trade.orderStatus.status,
-                message="Limit order submitted",
-                raw={
-                    "orderId": trade.order.orderId,
-                    "status": trade.orderStatus.status,
-                    "limitPrice": price,
-                }
+            ack_timeout = min(self.config.order_timeout, 3.0)
+            trade = self._run(
+                self._place_order_async(symbol, market_type, order, False, ack_timeout),
+                timeout=ack_timeout + self.config.timeout,
             )
+            if trade is None:
+                return OrderResult(
+                    success=False,
+                    message=f"Invalid contract: {symbol}"
+                )
+            
+            return self._order_result(trade, "Limit order submitted", limitPrice=price)
             
         except Exception as e:
             logger.error(f"Limit order failed: {e}")
@@ -331,6 +449,24 @@ class IBKRClient:
                 message=str(e)
             )
     
+    def order_done_future(self, order_id: int, timeout: Optional[float] = None) -> "concurrent.futures.Future":
+        """
+        Future resolving to an OrderResult once the order reaches a final status
+        (or with its current state after `timeout` seconds, if given).
+        Does not block; callers may poll .done() or wait on .result().
+        """
+        async def _await_done():
+            trade = next((t for t in self._ib.trades() if t.order.orderId == order_id), None)
+            if trade is None:
+                return OrderResult(success=False, order_id=order_id, message=f"Order not found: {order_id}")
+            await self._wait_until(trade.statusEvent, trade,
+                                   lambda t: t.orderStatus.status in self.DONE_STATES,
+                                   timeout)
+            return self._order_result(trade, "Order done")
+        
+        self._ensure_connected()
+        return asyncio.run_coroutine_threadsafe(_await_done(), self._ensure_loop())
+    
     def cancel_order(self, order_id: int) -> bool:
         """
         Cancel an order.
@@ -344,11 +480,16 @@ class IBKRClient:
         try:
             self._ensure_connected()
             
-            for trade in self._ib.openTrades():
-                if trade.order.orderId == order_id:
-                    self._ib.cancelOrder(trade.order)
-                    logger.info(f"Order {order_id} cancelled")
-                    return True
+            def _cancel():
+                for trade in self._ib.openTrades():
+                    if trade.order.orderId == order_id:
+                        self._ib.cancelOrder(trade.order)
+                        return True
+                return False
+            
+            if self._call(_cancel):
+                logger.info(f"Order {order_id} cancelled")
+                return True
             
             logger.warning(f"Order not found: {order_id}")
             return False
@@ -369,7 +510,7 @@ class IBKRClient:
         try:
             self._ensure_connected()
             
-            summary = self._ib.accountSummary(self._account)
+            summary = self._run(self._ib.accountSummaryAsync(self._account), timeout=self.config.timeout)
             result = {}
             for item in summary:
                 result[item.tag] = {
@@ -397,7 +538,7 @@ class IBKRClient:
         try:
             self._ensure_connected()
             
-            positions = self._ib.positions(self._account)
+            positions = self._call(self._ib.positions, self._account)
             result = []
             
             for pos in positions:
@@ -431,7 +572,7 @@ class IBKRClient:
         try:
             self._ensure_connected()
             
-            trades = self._ib.openTrades()
+            trades = self._call(self._ib.openTrades)
             result = []
             
             for trade in trades:
@@ -458,10 +599,51 @@ class IBKRClient:
             logger.error(f"Get orders failed: {e}")
             return []
     
+    # ==================== Market Data ====================
+    
+    @staticmethod
+    def _positive(value) -> Optional[float]:
+        try:
+            v = float(value)
+        except (TypeError, ValueError):
+            return None
+        return v if v > 0 else None  # also filters NaN
+    
+    async def _quote_ticker(self, symbol: str, market_type: str):
+        """Streaming ticker for the symbol, subscribing (and waiting for the first tick) on first use."""
+        contract = await self._qualified_contract(symbol, market_type)
+        if contract is None:
+            return None
+        key = (str(symbol).strip().upper(), str(market_type))
+        ticker = self._tickers.get(key)
+        if ticker is not None:
+            self._tickers.move_to_end(key)
+            return ticker
+        
+        # Keep the number of market data lines bounded
+        while len(self._tickers) >= max(1, int(self.config.max_quote_subscriptions)):
+            _, old = self._tickers.popitem(last=False)
+            try:
+                self._ib.cancelMktData(old.contract)
+            except Exception:
+                pass
+        
+        ticker = self._ib.reqMktData(contract, '', False, False)
+        self._tickers[key] = ticker
+        await self._wait_until(
+            ticker.updateEvent, ticker,
+            lambda t: any(self._positive(v) for v in (t.last, t.bid, t.ask, t.close)),
+            self.config.quote_timeout,
+        )
+        return ticker
+    
     def get_quote(self, symbol: str, market_type: str = "USStock") -> Dict[str, Any]:
         """
         Get real-time quote.
         
+        The first call for a symbol opens a streaming subscription; later calls read the
+        live ticker without another request.
+        
         Args:
             symbol: Symbol code
             market_type: Market type
@@ -472,37 +654,45 @@ class IBKRClient:
         try:
             self._ensure_connected()
             
-            contract = self._create_contract(symbol, market_type)
-            if not self._qualify_contract(contract):
+            ticker = self._run(self._quote_ticker(symbol, market_type),
+                               timeout=self.config.quote_timeout + self.config.timeout)
+            if ticker is None:
                 return {"success": False, "error": f"Invalid contract: {symbol}"}
             
-            # Request market data
-            ticker = self._ib.reqMktData(contract, '', False, False)
-            
-            # Wait for data
-            self._ib.sleep(2)
-            
-            result = {
+            return {
                 "success": True,
                 "symbol": symbol,
-                "bid": ticker.bid if ticker.bid and ticker.bid > 0 else None,
-                "ask": ticker.ask if ticker.ask and ticker.ask > 0 else None,
-                "last": ticker.last if ticker.last and ticker.last > 0 else None,
-                "high": ticker.high if ticker.high and ticker.high > 0 else None,
-                "low": ticker.low if ticker.low and ticker.low > 0 else None,
-                "volume": ticker.volume if ticker.volume and ticker.volume > 0 else None,
-                "close": ticker.close if ticker.close and ticker.close > 0 else None,
+                "bid": self._positive(ticker.bid),
+                "ask": self._positive(ticker.ask),
+                "last": self._positive(ticker.last),
+                "high": self._positive(ticker.high),
+                "low": self._positive(ticker.low),
+                "volume": self._positive(ticker.volume),
+                "close": self._positive(ticker.close),
             }
             
-            # Cancel subscription
-            self._ib.cancelMktData(contract)
-            
-            return result
-            
         except Exception as e:
             logger.error(f"Get quote failed: {e}")
             return {"success": False, "error": str(e)}
     
+    def unsubscribe_quote(self, symbol: str, market_type: str = "USStock") -> bool:
+        """Cancel the streaming subscription opened by get_quote."""
+        if not self.connected:
+            return False
+        
+        def _cancel():
+            ticker = self._tickers.pop((str(symbol).strip().upper(), str(market_type)), None)
+            if ticker is None:
+                return False
+            self._ib.cancelMktData(ticker.contract)
+            return True
+        
+        try:
+            return bool(self._call(_cancel))
+        except Exception as e:
+            logger.warning(f"Unsubscribe quote failed: {e}")
+            return False
+    
     def get_connection_status(self) -> Dict[str, Any]:
         """Get connection status."""
         return {
@@ -512,6 +702,8 @@ class IBKRClient:
             "clientId": self.config.client_id,
             "account": self._account,
             "readonly": self.config.readonly,
+            "quoteSubscriptions": len(self._tickers),
+            "cachedContracts": len(self._contracts),
         }
 
 
@@ -0,0 +1,205 @@
+"""
+Lookback-window trimming for live indicator execution.
+
+Live signal extraction only looks at the last one or two rows of the indicator output, but the
+script used to run over the whole K_LINE_HISTORY_GET_NUMBER history on every tick. This module
+finds the shortest trailing window whose output matches the full-history output, so realtime
+ticks can run the script on that tail only.
+
+Window selection (per indicator code + trading config):
+1. Declared: `# @lookback 50` (or a parameter name: `# @lookback ma_slow`) in the indicator code
+   gives the warm-up length; the window is warm-up + INDICATOR_LOOKBACK_VERIFY_ROWS.
+   `# @lookback full` disables trimming for that indicator.
+2. Auto: otherwise try INDICATOR_LOOKBACK_CANDIDATES (smallest first).
+
+A window is accepted only if, over the last VERIFY_ROWS rows, every output column (signals,
+indicator lines, position sizes) and the exported `highest_price` match the full run. The
+strategy loop runs the full history once per candle anyway; each of those runs re-verifies the
+window and falls back to full history on mismatch (e.g. stateful scripts whose replay depends
+on distant history).
+
+INDICATOR_LOOKBACK_MODE: auto (default) | declared (only declared windows) | off
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.indicator_params import IndicatorParamsParser
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 窗口声明：# @lookback 50 / # @lookback ma_slow / # @lookback full
+LOOKBACK_PATTERN = re.compile(r'^\s*#\s*@lookback\s+(\w+)', re.IGNORECASE | re.MULTILINE)
+
+FULL_HISTORY = 0
+
+
+def parse_declared_lookback(indicator_code: str, params: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Declared warm-up bars of an indicator.
+
+    Returns:
+        None if not declared, 0 (FULL_HISTORY) for `full`, else the number of bars
+    """
+    match = LOOKBACK_PATTERN.search(indicator_code or '')
+    if not match:
+        return None
+    value = match.group(1)
+    if value.lower() in ('full', 'none', 'off'):
+        return FULL_HISTORY
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0, int(float((params or {}).get(value))))
+    except (TypeError, ValueError):
+        logger.warning(f"@lookback refers to unknown parameter '{value}'; ignoring declaration")
+        return None
+
+
+def outputs_match(
+    full_df: pd.DataFrame,
+    tail_df: pd.DataFrame,
+    full_env: Dict[str, Any],
+    tail_env: Dict[str, Any],
+    rows: int,
+    rtol: float = 1e-5,
+) -> bool:
+    """Whether the last `rows` rows (and the exported highest_price) of both runs agree."""
+    if full_df is None or tail_df is None or len(tail_df) < rows or len(full_df) < rows:
+        return False
+    if set(full_df.columns) != set(tail_df.columns):
+        return False
+    a = full_df.iloc[-rows:]
+    b = tail_df.iloc[-rows:]
+    if not a.index.equals(b.index):
+        return False
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_numeric_dtype(x) and pd.api.types.is_numeric_dtype(y):
+            if not np.allclose(x.astype('float64').values, y.astype('float64').values,
+                               rtol=rtol, atol=1e-8, equal_nan=True):
+                return False
+        elif not x.astype(str).equals(y.astype(str)):
+            return False
+    hp_a, hp_b = full_env.get('highest_price'), tail_env.get('highest_price')
+    if isinstance(hp_a, (int, float)) or isinstance(hp_b, (int, float)):
+        try:
+            if not np.isclose(float(hp_a or 0), float(hp_b or 0), rtol=rtol, atol=1e-8):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+class IndicatorLookback:
+    """Learns and verifies per-indicator lookback windows (thread-safe)."""
+
+    def __init__(self):
+        self.mode = (os.getenv('INDICATOR_LOOKBACK_MODE') or 'auto').strip().lower()
+        self.verify_rows = max(2, int(os.getenv('INDICATOR_LOOKBACK_VERIFY_ROWS', '10')))
+        raw = os.getenv('INDICATOR_LOOKBACK_CANDIDATES', '64,128,256')
+        self.candidates = sorted({int(x) for x in raw.split(',') if x.strip().isdigit() and int(x) > 0})
+        # After a failed search, full history is used for this long before searching again
+        self.retry_sec = float(os.getenv('INDICATOR_LOOKBACK_RETRY_SEC', '21600'))
+
+        self._lock = threading.Lock()
+        # key -> (window, decided_at); window 0 = full history
+        self._windows: Dict[str, Tuple[int, float]] = {}
+
+    @staticmethod
+    def key(indicator_code: str, trading_config: Dict[str, Any]) -> str:
+        raw = (indicator_code or '') + '\n' + json.dumps(trading_config or {}, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def window_for(self, key: str) -> int:
+        """Window to use for realtime ticks (0 = full history)."""
+        if self.mode == 'off':
+            return FULL_HISTORY
+        with self._lock:
+            entry = self._windows.get(key)
+        return entry[0] if entry else FULL_HISTORY
+
+    def _set(self, key: str, window: int) -> None:
+        with self._lock:
+            self._windows[key] = (int(window), time.time())
+
+    def learn(
+        self,
+        key: str,
+        indicator_code: str,
+        trading_config: Dict[str, Any],
+        df: pd.DataFrame,
+        full_df: pd.DataFrame,
+        full_env: Dict[str, Any],
+        run: Callable[[pd.DataFrame], Tuple[Optional[pd.DataFrame], Dict[str, Any]]],
+    ) -> int:
+        """
+        Verify the current window against a full-history run, or search for one.
+
+        Args:
+            df: full input history
+            full_df / full_env: output of `run(df)` (already computed by the caller)
+            run: executes the indicator on a slice of df
+
+        Returns:
+            the window now in effect (0 = full history)
+        """
+        if self.mode == 'off' or full_df is None:
+            return FULL_HISTORY
+
+        def _matches(window: int) -> bool:
+            try:
+                tail_df, tail_env = run(df.iloc[-window:])
+            except Exception:
+                return False
+            return outputs_match(full_df, tail_df, full_env, tail_env or {}, self.verify_rows)
+
+        with self._lock:
+            entry = self._windows.get(key)
+
+        if entry and entry[0] > 0:
+            if entry[0] >= len(df) or _matches(entry[0]):
+                return entry[0]
+            logger.warning(f"Indicator lookback window {entry[0]} no longer matches full history; using full history")
+            self._set(key, FULL_HISTORY)
+            entry = None
+
+        if entry and entry[0] == FULL_HISTORY and time.time() - entry[1] < self.retry_sec:
+            return FULL_HISTORY
+
+        params = IndicatorParamsParser.merge_params(
+            IndicatorParamsParser.parse_params(indicator_code),
+            (trading_config or {}).get('indicator_params', {}),
+        )
+        declared = parse_declared_lookback(indicator_code, params)
+        if declared == FULL_HISTORY:
+            self._set(key, FULL_HISTORY)
+            return FULL_HISTORY
+        if declared is not None:
+            candidates = [declared + self.verify_rows]
+        elif self.mode == 'auto':
+            candidates = self.candidates
+        else:
+            candidates = []
+
+        for window in candidates:
+            # Must leave room to verify and actually be a reduction
+            if window < 2 * self.verify_rows or window >= len(df) - self.verify_rows:
+                continue
+            if _matches(window):
+                self._set(key, window)
+                logger.info(f"Indicator lookback window set to {window} bars (history={len(df)})")
+                return window
+
+        if declared is not None:
+            logger.warning(f"Declared @lookback {declared} does not reproduce full-history output; using full history")
+        self._set(key, FULL_HISTORY)
+        return FULL_HISTORY
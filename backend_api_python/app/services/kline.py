@@ -71,6 +71,59 @@ class KlineService:
             return klines[-1]
         return None
     
+    def get_realtime_prices(
+        self,
+        market: str,
+        symbols: List[str],
+        force_refresh: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取同一市场多个标的的实时价格
+        
+        未命中缓存的标的通过 DataSourceFactory.get_tickers 一次批量获取，
+        批量接口未返回有效价格的标的再逐个走 get_realtime_price 的 K 线降级逻辑。
+        
+        Returns:
+            {symbol: 与 get_realtime_price 相同格式的价格数据}
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for symbol in dict.fromkeys(symbols or []):
+            if not symbol:
+                continue
+            cached = None if force_refresh else self.cache.get(f"realtime_price:{market}:{symbol}")
+            if cached:
+                results[symbol] = cached
+            else:
+                missing.append(symbol)
+        
+        if not missing:
+            return results
+        
+        tickers: Dict[str, Dict[str, Any]] = {}
+        if len(missing) > 1:
+            tickers = DataSourceFactory.get_tickers(market, missing)
+        
+        for symbol in missing:
+            ticker = tickers.get(symbol) or {}
+            if (ticker.get('last') or 0) > 0:
+                result = {
+                    'price': ticker.get('last', 0),
+                    'change': ticker.get('change', 0),
+                    'changePercent': ticker.get('changePercent', 0),
+                    'high': ticker.get('high', 0),
+                    'low': ticker.get('low', 0),
+                    'open': ticker.get('open', 0),
+                    'previousClose': ticker.get('previousClose', 0),
+                    'source': 'ticker'
+                }
+                self.cache.set(f"realtime_price:{market}:{symbol}", result, 30)
+                results[symbol] = result
+            else:
+                results[symbol] = self.get_realtime_price(market, symbol, force_refresh=force_refresh)
+        
+        return results
+    
     def get_realtime_price(self, market: str, symbol: str, force_refresh: bool = False) -> Dict[str, Any]:
         """
         获取实时价格（优先使用 ticker API，降级使用分钟 K 线）
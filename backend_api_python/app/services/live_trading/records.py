@@ -11,6 +11,7 @@ from __future__ import annotations
 import time
 from typing import Any, Dict, Optional, Tuple
 
+from app.services.strategy_state import invalidate_strategy_positions
 from app.utils.db import get_db_connection
 
 
@@ -89,6 +90,7 @@ def _delete_position(strategy_id: int, symbol: str, side: str) -> None:
         )
         db.commit()
         cur.close()
+    invalidate_strategy_positions(strategy_id)
 
 
 def upsert_position(
@@ -125,6 +127,7 @@ def upsert_position(
         )
         db.commit()
         cur.close()
+    invalidate_strategy_positions(strategy_id)
 
 
 def apply_fill_to_local_position(
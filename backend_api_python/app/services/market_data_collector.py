@@ -14,10 +14,11 @@
 - 基本面: Finnhub (美股) / 固定描述 (加密)
 """
 
+import threading
 import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError
 
 import yfinance as yf
 import pandas as pd
@@ -25,7 +26,8 @@ import pandas as pd
 from app.data_sources import DataSourceFactory
 from app.services.kline import KlineService
 from app.utils.logger import get_logger
-from app.config import APIKeys
+from app.utils.cache import CacheManager
+from app.config import APIKeys, CacheConfig
 
 logger = get_logger(__name__)
 
@@ -43,8 +45,22 @@ class MarketDataCollector:
     4. 情绪数据 (可选): 新闻、市场情绪
     """
     
+    # 各数据源阶段的截止时间(秒，从 collect_all 开始计时)，同时受 collect_all 的全局 timeout 约束
+    STAGE_DEADLINES = {
+        "price": 10,
+        "kline": 12,
+        "fundamental": 15,
+        "company": 8,
+        "macro": 10,
+        "news": 15,
+        "polymarket": 8,
+    }
+    
     def __init__(self):
         self.kline_service = KlineService()
+        # 分析输入共享缓存（启用 Redis 时跨 worker 共享）
+        self.cache = CacheManager()
+        self.input_cache_ttl = CacheConfig.ANALYSIS_INPUT_CACHE_TTL
         self._finnhub_client = None
         self._ak = None
         self._init_clients()
@@ -75,7 +91,8 @@ class MarketDataCollector:
         include_macro: bool = True,
         include_news: bool = True,
         include_polymarket: bool = True,  # 新增：是否包含预测市场数据
-        timeout: int = 30
+        timeout: int = 30,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         采集所有市场数据
@@ -87,10 +104,11 @@ class MarketDataCollector:
             include_macro: 是否包含宏观数据
             include_news: 是否包含新闻
             include_polymarket: 是否包含预测市场数据
-            timeout: 总超时时间(秒)
+            timeout: 全局时间预算(秒)，各阶段另有 STAGE_DEADLINES 截止时间
+            use_cache: 是否使用按数据类型分级的共享输入缓存 (CacheConfig.ANALYSIS_INPUT_CACHE_TTL)
             
         Returns:
-            完整的市场数据字典
+            完整的市场数据字典，_meta.stages 记录每个阶段的开始时间、耗时和状态
         """
         start_time = time.time()
         
@@ -121,80 +139,137 @@ class MarketDataCollector:
             }
         }
         
-        # === 阶段1: 核心数据 (并行获取) ===
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            core_futures = {
-                executor.submit(self._get_price, market, symbol): "price",
-                executor.submit(self._get_kline, market, symbol, timeframe, 60): "kline",
-            }
-            
-            # 如果需要基本面，也并行获取
-            if market == 'USStock':
-                core_futures[executor.submit(self._get_fundamental, market, symbol)] = "fundamental"
-                core_futures[executor.submit(self._get_company, market, symbol)] = "company"
-            elif market == 'Crypto':
-                # 加密货币的"基本面"是固定描述
-                core_futures[executor.submit(self._get_crypto_info, symbol)] = "fundamental"
-            
-            try:
-                for future in as_completed(core_futures, timeout=15):
-                    key = core_futures[future]
-                    try:
-                        result = future.result(timeout=3)
-                        if result:
-                            data[key] = result
-                            data["_meta"]["success_items"].append(key)
-                        else:
-                            data["_meta"]["failed_items"].append(key)
-                    except Exception as e:
-                        logger.warning(f"Core data fetch failed ({key}): {e}")
-                        data["_meta"]["failed_items"].append(key)
-            except TimeoutError:
-                logger.warning(f"Core data fetch timed out for {market}:{symbol}")
+        # === 阶段图: 所有相互独立的数据源同时启动 ===
+        # 仅新闻依赖公司名称（美股），由新闻阶段自己等待 company 结果，不阻塞其他阶段
+        # 已超时被放弃的阶段线程仍可能在返回后写入，因此加锁并在返回时附加快照
+        stage_meta: Dict[str, Dict[str, Any]] = {}
+        stage_meta_lock = threading.Lock()
+        executor = ThreadPoolExecutor(max_workers=8)
+        futures = {}
         
-        # 计算技术指标 (本地计算，不需要外部API)
-        if data.get("kline"):
-            data["indicators"] = self._calculate_indicators(data["kline"])
-            data["_meta"]["success_items"].append("indicators")
+        def set_meta(name, **fields):
+            with stage_meta_lock:
+                stage_meta.setdefault(name, {}).update(fields)
         
-        # === 阶段2: 宏观数据 (如果需要) ===
-        if include_macro:
-            try:
-                data["macro"] = self._get_macro_data(market, timeout=10)
-                if data["macro"]:
-                    data["_meta"]["success_items"].append("macro")
-            except Exception as e:
-                logger.warning(f"Macro data fetch failed: {e}")
-                data["_meta"]["failed_items"].append("macro")
+        def submit(name, fn, *args, **kwargs):
+            def run():
+                t0 = time.time()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    set_meta(
+                        name,
+                        start_ms=int((t0 - start_time) * 1000),
+                        duration_ms=int((time.time() - t0) * 1000),
+                    )
+            future = executor.submit(run)
+            futures[future] = name
+            return future
+        
+        cache_enabled = use_cache and CacheConfig.ANALYSIS_INPUT_CACHE_ENABLED
         
-        # === 阶段3: 新闻/情绪 (如果需要) ===
+        def cached(name, cache_key, fn, *args, **kwargs):
+            """按数据类型 TTL 读写共享缓存，不缓存空结果以便失败后重试"""
+            if not cache_enabled:
+                return fn(*args, **kwargs)
+            key = f"analysis_input:{cache_key}"
+            hit = self.cache.get(key)
+            if hit:
+                set_meta(name, cache="hit")
+                return hit
+            set_meta(name, cache="miss")
+            result = fn(*args, **kwargs)
+            if result and not (name == "news" and not result.get("news")):
+                self.cache.set(key, result, self.input_cache_ttl.get(name, 60))
+            return result
+        
+        def submit_cached(name, cache_key, fn, *args, **kwargs):
+            return submit(name, cached, name, cache_key, fn, *args, **kwargs)
+        
+        submit_cached("price", f"price:{market}:{symbol}", self._get_price, market, symbol)
+        submit_cached("kline", f"kline:{market}:{symbol}:{timeframe}", self._get_kline, market, symbol, timeframe, 60)
+        company_future = None
+        if market == 'USStock':
+            submit_cached("fundamental", f"fundamental:{market}:{symbol}", self._get_fundamental, market, symbol)
+            company_future = submit_cached("company", f"company:{market}:{symbol}", self._get_company, market, symbol)
+        elif market == 'Crypto':
+            # 加密货币的"基本面"是固定描述
+            submit_cached("fundamental", f"fundamental:{market}:{symbol}", self._get_crypto_info, symbol)
+        if include_macro:
+            submit_cached("macro", f"macro:{market}", self._get_macro_data, market, timeout=self.STAGE_DEADLINES["macro"])
         if include_news:
-            try:
-                # 获取公司名称以改善搜索
-                company_name = None
-                if data.get("company"):
-                    company_name = data["company"].get("name")
-                
-                news_result = self._get_news(market, symbol, company_name, timeout=8)
-                data["news"] = news_result.get("news", [])
-                data["sentiment"] = news_result.get("sentiment", {})
+            submit_cached("news", f"news:{market}:{symbol}", self._collect_news_stage, market, symbol, company_future)
+        if include_polymarket:
+            submit_cached("polymarket", f"polymarket:{market}:{symbol}", self._get_polymarket_events, symbol, market)
+        
+        # 每个阶段有独立截止时间，同时受全局预算 timeout 约束
+        budget_deadline = start_time + timeout
+        deadlines = {
+            f: min(start_time + self.STAGE_DEADLINES.get(name, timeout), budget_deadline)
+            for f, name in futures.items()
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                now = time.time()
+                expired = {f for f in pending if deadlines[f] <= now}
+                for future in expired:
+                    name = futures[future]
+                    logger.warning(f"Market data stage '{name}' timed out for {market}:{symbol}")
+                    set_meta(name, status="timeout")
+                    data["_meta"]["failed_items"].append(name)
+                pending -= expired
+                if not pending:
+                    break
                 
-                if data["news"]:
-                    data["_meta"]["success_items"].append("news")
-            except Exception as e:
-                logger.warning(f"News fetch failed: {e}")
-                data["_meta"]["failed_items"].append("news")
+                done, pending = wait(
+                    pending,
+                    timeout=max(0.0, min(deadlines[f] for f in pending) - now),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"Market data stage '{name}' failed: {e}")
+                        set_meta(name, status="error")
+                        data["_meta"]["failed_items"].append(name)
+                        continue
+                    
+                    if name == "news":
+                        result = result or {}
+                        data["news"] = result.get("news", [])
+                        data["sentiment"] = result.get("sentiment", {})
+                        ok = bool(data["news"])
+                    else:
+                        ok = bool(result)
+                        if ok:
+                            data[name] = result
+                    
+                    set_meta(name, status="ok" if ok else "empty")
+                    if ok:
+                        data["_meta"]["success_items"].append(name)
+                    elif name not in ("macro", "news", "polymarket"):
+                        data["_meta"]["failed_items"].append(name)
+                    
+                    # 技术指标只依赖K线 (本地计算，不需要外部API)
+                    if name == "kline" and ok:
+                        t0 = time.time()
+                        data["indicators"] = self._calculate_indicators(data["kline"])
+                        set_meta(
+                            "indicators",
+                            start_ms=int((t0 - start_time) * 1000),
+                            duration_ms=int((time.time() - t0) * 1000),
+                            status="ok",
+                        )
+                        data["_meta"]["success_items"].append("indicators")
+        finally:
+            # 不等待已超时的阶段，让其在后台自然结束
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        # === 阶段4: 预测市场数据 (如果需要) ===
-        if include_polymarket:
-            try:
-                polymarket_events = self._get_polymarket_events(symbol, market)
-                data["polymarket"] = polymarket_events
-                if polymarket_events:
-                    data["_meta"]["success_items"].append("polymarket")
-            except Exception as e:
-                logger.debug(f"Polymarket data fetch failed: {e}")
-                data["_meta"]["failed_items"].append("polymarket")
+        with stage_meta_lock:
+            data["_meta"]["stages"] = {name: dict(meta) for name, meta in stage_meta.items()}
         
         # 记录总耗时
         data["_meta"]["duration_ms"] = int((time.time() - start_time) * 1000)
@@ -204,6 +279,18 @@ class MarketDataCollector:
         
         return data
     
+    def _collect_news_stage(self, market: str, symbol: str, company_future=None) -> Dict[str, Any]:
+        """新闻阶段：仅在需要时等待公司名称（改善搜索），然后获取新闻"""
+        company_name = None
+        if company_future is not None:
+            try:
+                company = company_future.result(timeout=self.STAGE_DEADLINES["company"])
+                if company:
+                    company_name = company.get("name")
+            except Exception:
+                pass
+        return self._get_news(market, symbol, company_name, timeout=8)
+    
     # ==================== 核心数据获取 ====================
     
     def _get_price(self, market: str, symbol: str) -> Optional[Dict[str, Any]]:
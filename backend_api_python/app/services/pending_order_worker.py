@@ -19,6 +19,7 @@ from app.services.exchange_execution import load_strategy_configs, resolve_excha
 from app.services.live_trading.execution import place_order_from_signal
 from app.services.live_trading.factory import create_client
 from app.services.live_trading.records import apply_fill_to_local_position, record_trade
+from app.services.strategy_state import invalidate_strategy_positions
 from app.services.live_trading.base import LiveTradingError
 from app.services.live_trading.binance import BinanceFuturesClient
 from app.services.live_trading.binance_spot import BinanceSpotClient
@@ -36,7 +37,8 @@ from app.services.live_trading.bitfinex import BitfinexClient
 from app.services.live_trading.bitfinex import BitfinexDerivativesClient
 from app.services.live_trading.symbols import to_okx_swap_inst_id
 from app.services.live_trading.symbols import to_gate_currency_pair
-from app.utils.db import get_db_connection
+from app.utils.db import get_db_connection, get_order_db_connection
+from app.utils import latency
 from app.utils.logger import get_logger
 
 # Lazy import IBKR to avoid ImportError if ib_insync not installed
@@ -69,6 +71,16 @@ class PendingOrderWorker:
         self._last_position_sync_ts = 0.0
         logger.info(f"PendingOrderWorker: sync_enabled={self._position_sync_enabled}, interval={self._position_sync_interval_sec}s")
 
+        # Best-effort: per-order latency column for old databases.
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute("ALTER TABLE pending_orders ADD COLUMN IF NOT EXISTS latency_json TEXT DEFAULT ''")
+                db.commit()
+                cur.close()
+        except Exception as e:
+            logger.debug(f"pending_orders.latency_json check skipped: {e}")
+
     def start(self) -> bool:
         with self._lock:
             if self._thread and self._thread.is_alive():
@@ -112,13 +124,55 @@ class PendingOrderWorker:
             if not self._mark_processing(order_id=int(oid)):
                 continue
 
+            self._begin_order_trace(o)
             try:
-                self._dispatch_one(o)
+                with latency.span("dispatch"):
+                    self._dispatch_one(o)
             except Exception as e:
                 self._mark_failed(order_id=int(oid), error=str(e))
+            self._save_order_latency(order_id=int(oid))
 
         self._maybe_sync_positions()
 
+    def _begin_order_trace(self, order_row: Dict[str, Any]) -> None:
+        """
+        Start the latency trace of one order: seed it with the signal-side stages recorded by the
+        executor (payload_json._latency) and record how long the order waited in the queue.
+        """
+        info: Dict[str, Any] = {}
+        try:
+            payload = json.loads(order_row.get("payload_json") or "{}") or {}
+            info = payload.get("_latency") or {}
+        except Exception:
+            info = {}
+        stages = info.get("stages") if isinstance(info, dict) else None
+        latency.begin_trace(stages if isinstance(stages, dict) else None)
+        try:
+            enqueued_at = float(info.get("enqueued_at") or 0.0)
+        except Exception:
+            enqueued_at = 0.0
+        if enqueued_at > 0:
+            latency.record("queue_wait", max(0.0, time.time() - enqueued_at) * 1000.0)
+
+    def _save_order_latency(self, order_id: int) -> None:
+        """Persist the stage timings (ms) of this order to pending_orders.latency_json (best-effort)."""
+        trace = latency.current_trace()
+        if not trace:
+            return
+        try:
+            with get_order_db_connection() as db:
+                cur = db.cursor()
+                cur.execute(
+                    "UPDATE pending_orders SET latency_json = %s WHERE id = %s",
+                    (json.dumps(trace, ensure_ascii=False), int(order_id)),
+                )
+                db.commit()
+                cur.close()
+        except Exception as e:
+            logger.debug(f"save order latency skipped: id={order_id}, err={e}")
+        finally:
+            latency.begin_trace()
+
     def _maybe_sync_positions(self) -> None:
         if not self._position_sync_enabled:
             return
@@ -612,6 +666,7 @@ class PendingOrderWorker:
                         )
                     db.commit()
                     cur.close()
+                invalidate_strategy_positions(sid)
 
                 if to_delete_ids:
                     logger.debug(f"position sync: removed {len(to_delete_ids)} ghost positions for strategy_id={sid}")
@@ -630,7 +685,7 @@ class PendingOrderWorker:
             except Exception:
                 stale_sec = 0
             if stale_sec > 0:
-                with get_db_connection() as db:
+                with get_order_db_connection() as db:
                     cur = db.cursor()
                     cur.execute(
                         """
@@ -650,7 +705,7 @@ class PendingOrderWorker:
                     db.commit()
                     cur.close()
 
-            with get_db_connection() as db:
+            with get_order_db_connection() as db:
                 cur = db.cursor()
                 cur.execute(
                     """
@@ -672,7 +727,7 @@ class PendingOrderWorker:
 
     def _mark_processing(self, order_id: int) -> bool:
         try:
-            with get_db_connection() as db:
+            with get_order_db_connection() as db:
                 cur = db.cursor()
                 # Only claim if still pending to avoid double-processing.
                 cur.execute(
@@ -1303,6 +1358,7 @@ class PendingOrderWorker:
                     limit_price = limit_price * (1.0 + maker_offset)
 
                 limit_client_oid = _make_client_oid("lmt")
+                t_place = time.perf_counter()
                 if isinstance(client, BinanceFuturesClient):
                     res1 = client.place_limit_order(
                         symbol=str(symbol),
@@ -1482,8 +1538,10 @@ class PendingOrderWorker:
 
                 limit_order_id = str(res1.exchange_order_id or "")
                 phases["limit_place"] = res1.raw
+                latency.record("exchange_rtt", (time.perf_counter() - t_place) * 1000.0)
 
                 # Wait for fills
+                t_fill = time.perf_counter()
                 if isinstance(client, BinanceFuturesClient):
                     q = client.wait_for_fill(symbol=str(symbol), order_id=limit_order_id, client_order_id=limit_client_oid, max_wait_sec=maker_wait_sec)
                     phases["limit_query"] = q
@@ -1562,6 +1620,7 @@ class PendingOrderWorker:
                     phases["limit_query"] = q
                     _apply_fill(float(q.get("filled") or 0.0), float(q.get("avg_price") or 0.0))
                     _apply_fee(float(q.get("fee") or 0.0), str(q.get("fee_ccy") or ""))
+                latency.record("fill_wait", (time.perf_counter() - t_fill) * 1000.0)
 
                 remaining = max(0.0, float(amount or 0.0) - total_base)
 
@@ -1641,6 +1700,7 @@ class PendingOrderWorker:
         market_client_oid = _make_client_oid("mkt")
         if remaining > 0:
             try:
+                t_place = time.perf_counter()
                 if isinstance(client, BinanceFuturesClient):
                     res2 = client.place_market_order(
                         symbol=str(symbol),
@@ -1806,8 +1866,10 @@ class PendingOrderWorker:
 
                 market_order_id = str(res2.exchange_order_id or "")
                 phases["market_place"] = res2.raw
+                latency.record("exchange_rtt", (time.perf_counter() - t_place) * 1000.0)
 
                 # Query fills (short wait)
+                t_fill = time.perf_counter()
                 if isinstance(client, BinanceFuturesClient):
                     q2 = client.wait_for_fill(symbol=str(symbol), order_id=market_order_id, client_order_id=market_client_oid, max_wait_sec=3.0)
                     phases["market_query"] = q2
@@ -1887,6 +1949,7 @@ class PendingOrderWorker:
                     phases["market_query"] = q2
                     _apply_fill(float(q2.get("filled") or 0.0), float(q2.get("avg_price") or 0.0))
                     _apply_fee(float(q2.get("fee") or 0.0), str(q2.get("fee_ccy") or ""))
+                latency.record("fill_wait", (time.perf_counter() - t_fill) * 1000.0)
             except LiveTradingError as e:
                 logger.warning(f"live market phase failed: pending_id={order_id}, strategy_id={strategy_id}, cfg={safe_cfg}, err={e}")
                 phases["market_error"] = str(e)
@@ -2035,13 +2098,14 @@ class PendingOrderWorker:
         ).strip()
 
         try:
-            # Place market order via IBKR
-            result = client.place_market_order(
-                symbol=symbol,
-                action=action,
-                quantity=amount,
-                market_type=market_type,
-            )
+            # Place market order via IBKR (waits for the fill: RTT includes fill time)
+            with latency.span("exchange_rtt"):
+                result = client.place_market_order(
+                    symbol=symbol,
+                    action=action,
+                    quantity=amount,
+                    market_type=market_type,
+                )
 
             if not result.success:
                 self._mark_failed(order_id=order_id, error=f"ibkr_order_failed:{result.message}")
@@ -2161,12 +2225,13 @@ class PendingOrderWorker:
 
         try:
             # Place market order via MT5
-            result = client.place_market_order(
-                symbol=symbol,
-                side=action,
-                volume=amount,
-                comment="QuantDinger",
-            )
+            with latency.span("exchange_rtt"):
+                result = client.place_market_order(
+                    symbol=symbol,
+                    side=action,
+                    volume=amount,
+                    comment="QuantDinger",
+                )
 
             if not result.success:
                 self._mark_failed(order_id=order_id, error=f"mt5_order_failed:{result.message}")
@@ -2253,7 +2318,7 @@ class PendingOrderWorker:
         avg_price: float = 0.0,
         executed_at: Optional[int] = None,
     ) -> None:
-        with get_db_connection() as db:
+        with get_order_db_connection() as db:
             cur = db.cursor()
             # Use NOW() for timestamp fields; executed_at is set to NOW() if provided, else NULL
             cur.execute(
@@ -2288,7 +2353,7 @@ class PendingOrderWorker:
             cur.close()
 
     def _mark_failed(self, order_id: int, error: str) -> None:
-        with get_db_connection() as db:
+        with get_order_db_connection() as db:
             cur = db.cursor()
             cur.execute(
                 """
@@ -2304,7 +2369,7 @@ class PendingOrderWorker:
             cur.close()
 
     def _mark_deferred(self, order_id: int, reason: str) -> None:
-        with get_db_connection() as db:
+        with get_order_db_connection() as db:
             cur = db.cursor()
             cur.execute(
                 """
@@ -195,52 +195,59 @@ class PolymarketBatchAnalyzer:
         return opportunities[:max_opportunities]
     
     def save_batch_analysis(self, markets: List[Dict]):
-        """保存批量分析结果到数据库"""
+        """保存批量分析结果到数据库（一次删除 + 一次多行插入）"""
+        rows = {}
+        for market in markets:
+            market_id = market.get('market_id')
+            ai_analysis = market.get('ai_analysis')
+            
+            if not market_id or not ai_analysis:
+                continue
+            
+            try:
+                rows[market_id] = (
+                    market_id,
+                    None,  # 通用分析
+                    float(ai_analysis.get('predicted_probability', market.get('current_probability', 50.0))),
+                    market.get('current_probability', 50.0),
+                    float(ai_analysis.get('divergence', 0)),
+                    ai_analysis.get('recommendation', 'HOLD'),
+                    ai_analysis.get('confidence_score', 0),
+                    ai_analysis.get('opportunity_score', 0),
+                    ai_analysis.get('reasoning', ''),
+                    json.dumps(ai_analysis.get('key_factors', [])),
+                    []
+                )
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Failed to save analysis for market {market_id}: {e}")
+                continue
+        
+        if not rows:
+            return
+        
         try:
             with get_db_connection() as db:
                 cur = db.cursor()
                 
-                for market in markets:
-                    market_id = market.get('market_id')
-                    ai_analysis = market.get('ai_analysis')
-                    
-                    if not market_id or not ai_analysis:
-                        continue
-                    
-                    try:
-                        # 先删除该市场的旧分析记录（user_id为NULL的通用分析）
-                        cur.execute("""
-                            DELETE FROM qd_polymarket_ai_analysis
-                            WHERE market_id = %s AND user_id IS NULL
-                        """, (market_id,))
-                        
-                        # 插入新的分析记录
-                        cur.execute("""
-                            INSERT INTO qd_polymarket_ai_analysis
-                            (market_id, user_id, ai_predicted_probability, market_probability,
-                             divergence, recommendation, confidence_score, opportunity_score,
-                             reasoning, key_factors, related_assets, created_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                        """, (
-                            market_id,
-                            None,  # 通用分析
-                            float(ai_analysis.get('predicted_probability', market.get('current_probability', 50.0))),
-                            market.get('current_probability', 50.0),
-                            float(ai_analysis.get('divergence', 0)),
-                            ai_analysis.get('recommendation', 'HOLD'),
-                            ai_analysis.get('confidence_score', 0),
-                            ai_analysis.get('opportunity_score', 0),
-                            ai_analysis.get('reasoning', ''),
-                            json.dumps(ai_analysis.get('key_factors', [])),
-                            []
-                        ))
-                    except Exception as e:
-                        logger.warning(f"Failed to save analysis for market {market_id}: {e}")
-                        continue
+                # 先删除这些市场的旧分析记录（user_id为NULL的通用分析）
+                cur.execute("""
+                    DELETE FROM qd_polymarket_ai_analysis
+                    WHERE market_id = ANY(%s) AND user_id IS NULL
+                """, (list(rows.keys()),))
+                
+                # 插入新的分析记录
+                cur.execute_values("""
+                    INSERT INTO qd_polymarket_ai_analysis
+                    (market_id, user_id, ai_predicted_probability, market_probability,
+                     divergence, recommendation, confidence_score, opportunity_score,
+                     reasoning, key_factors, related_assets, created_at)
+                    VALUES %s
+                """, list(rows.values()),
+                    template="(%s, %s::int, %s, %s, %s, %s, %s, %s, %s, %s, %s::text[], NOW())")
                 
                 db.commit()
                 cur.close()
-                logger.info(f"Saved batch analysis for {len(markets)} markets")
+                logger.info(f"Saved batch analysis for {len(rows)} markets")
                 
         except Exception as e:
             logger.error(f"Failed to save batch analysis: {e}", exc_info=True)
@@ -994,6 +994,19 @@ def _check_position_alerts():
             alerts = cur.fetchall() or []
             cur.close()
         
+        # Prefetch prices with one batch ticker call per market
+        symbols_by_market = {}
+        for alert in alerts:
+            if alert.get('market') and alert.get('symbol'):
+                symbols_by_market.setdefault(alert.get('market'), []).append(alert.get('symbol'))
+        prices_by_market = {}
+        for market, symbols in symbols_by_market.items():
+            try:
+                prices_by_market[market] = kline_service.get_realtime_prices(market, symbols)
+            except Exception as e:
+                logger.warning(f"Batch price fetch failed for {market}: {e}")
+                prices_by_market[market] = {}
+        
         for alert in alerts:
             try:
                 alert_id = alert.get('id')
@@ -1023,7 +1036,8 @@ def _check_position_alerts():
                 # Get current price (use realtime price API)
                 current_price = 0
                 try:
-                    price_data = kline_service.get_realtime_price(market, symbol)
+                    price_data = prices_by_market.get(market, {}).get(symbol) \
+                        or kline_service.get_realtime_price(market, symbol)
                     current_price = float(price_data.get('price') or 0)
                 except Exception:
                     continue
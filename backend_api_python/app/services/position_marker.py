@@ -0,0 +1,216 @@
+"""
+Mark-to-market job for strategy positions.
+
+Every POSITION_MARK_INTERVAL_SEC: take one quote per (market, symbol) for all open positions
+(prices published by the strategy loops in this process are reused, the rest are fetched with
+one batched get_tickers call per market), compute unrealized PnL, and write every changed row
+with a single UPDATE ... FROM (VALUES ...).
+
+This is the only writer of qd_strategy_positions.current_price / unrealized_pnl / pnl_percent,
+so API reads of positions are pure reads. marked_at records the last mark; updated_at is left
+for structural changes (open / resize / close). With ENABLE_POSITION_MARKER=false there is no
+background job; the positions API marks the requested strategy's rows on read instead.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.data_sources import DataSourceFactory
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def position_marker_enabled() -> bool:
+    return os.getenv("ENABLE_POSITION_MARKER", "true").lower() == "true"
+
+
+def calc_unrealized_pnl(side: str, entry_price: float, current_price: float, size: float) -> float:
+    ep = float(entry_price or 0.0)
+    cp = float(current_price or 0.0)
+    sz = float(size or 0.0)
+    if ep <= 0 or cp <= 0 or sz <= 0:
+        return 0.0
+    if (side or "").strip().lower() == "short":
+        return (ep - cp) * sz
+    return (cp - ep) * sz
+
+
+def calc_pnl_percent(entry_price: float, size: float, pnl: float) -> float:
+    denom = float(entry_price or 0.0) * float(size or 0.0)
+    if denom <= 0:
+        return 0.0
+    return float(pnl) / denom * 100.0
+
+
+class PositionMarker:
+    """Background mark-to-market of qd_strategy_positions."""
+
+    def __init__(self, interval_sec: float = 10.0, quote_max_age_sec: float = 60.0):
+        self.interval_sec = max(1.0, float(interval_sec))
+        # A quote older than this is not used (the row keeps its last mark)
+        self.quote_max_age_sec = float(quote_max_age_sec)
+        self._quotes: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._quotes_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Quote snapshot
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _quote_key(market_category: str, symbol: str) -> Tuple[str, str]:
+        return ((market_category or 'Crypto').strip(), (symbol or '').strip().upper())
+
+    def publish_quote(self, market_category: str, symbol: str, price: float) -> None:
+        """Share a freshly fetched price (e.g. from a strategy tick) with the next mark."""
+        try:
+            price = float(price or 0.0)
+        except (TypeError, ValueError):
+            return
+        if price <= 0:
+            return
+        with self._quotes_lock:
+            self._quotes[self._quote_key(market_category, symbol)] = (price, time.time())
+
+    def _fresh_quote(self, key: Tuple[str, str], max_age: float) -> Optional[float]:
+        with self._quotes_lock:
+            item = self._quotes.get(key)
+        if item and time.time() - item[1] <= max_age:
+            return item[0]
+        return None
+
+    def _refresh_quotes(self, wanted: Dict[str, List[str]]) -> None:
+        """Fetch quotes not published within the last interval, one batch per market."""
+        for market, symbols in wanted.items():
+            missing = sorted({s for s in symbols if self._fresh_quote(self._quote_key(market, s), self.interval_sec) is None})
+            if not missing:
+                continue
+            try:
+                tickers = DataSourceFactory.get_tickers(market, missing) or {}
+            except Exception as e:
+                logger.warning(f"PositionMarker: get_tickers failed for {market} ({len(missing)} symbols): {e}")
+                continue
+            for sym in missing:
+                t = tickers.get(sym) or {}
+                self.publish_quote(market, sym, t.get('last') or t.get('close') or 0.0)
+
+    # ------------------------------------------------------------------
+    # Marking
+    # ------------------------------------------------------------------
+
+    def mark_once(self, strategy_id: Optional[int] = None) -> int:
+        """Mark open positions (all, or one strategy's). Returns the number of rows written."""
+        where = "p.size > 0"
+        params: Tuple = ()
+        if strategy_id is not None:
+            where += " AND p.strategy_id = ?"
+            params = (int(strategy_id),)
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                f"""
+                SELECT p.id, p.symbol, p.side, p.size, p.entry_price, p.current_price,
+                       p.unrealized_pnl, p.pnl_percent,
+                       COALESCE(NULLIF(s.market_category, ''), 'Crypto') AS market_category
+                FROM qd_strategy_positions p
+                LEFT JOIN qd_strategies_trading s ON s.id = p.strategy_id
+                WHERE {where}
+                """,
+                params
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        if not rows:
+            return 0
+
+        wanted: Dict[str, List[str]] = defaultdict(list)
+        for r in rows:
+            sym = (r.get('symbol') or '').strip()
+            if sym:
+                wanted[r.get('market_category') or 'Crypto'].append(sym)
+        self._refresh_quotes(wanted)
+
+        batch = []
+        for r in rows:
+            price = self._fresh_quote(self._quote_key(r.get('market_category'), r.get('symbol')), self.quote_max_age_sec)
+            if price is None:
+                continue
+            pnl = calc_unrealized_pnl(r.get('side'), r.get('entry_price'), price, r.get('size'))
+            pct = calc_pnl_percent(r.get('entry_price'), r.get('size'), pnl)
+            if (abs(float(r.get('current_price') or 0.0) - price) < 1e-12
+                    and abs(float(r.get('unrealized_pnl') or 0.0) - pnl) < 1e-8
+                    and abs(float(r.get('pnl_percent') or 0.0) - pct) < 1e-4):
+                continue
+            batch.append((int(r['id']), float(price), float(pnl), float(pct)))
+        if not batch:
+            return 0
+
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute_values(
+                """
+                UPDATE qd_strategy_positions AS p
+                SET current_price = v.current_price,
+                    unrealized_pnl = v.unrealized_pnl,
+                    pnl_percent = v.pnl_percent,
+                    marked_at = NOW()
+                FROM (VALUES %s) AS v(id, current_price, unrealized_pnl, pnl_percent)
+                WHERE p.id = v.id
+                """,
+                batch,
+                template="(%s, %s::double precision, %s::double precision, %s::double precision)",
+            )
+            db.commit()
+            cur.close()
+        return len(batch)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return True
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="PositionMarker", daemon=True)
+            self._thread.start()
+            logger.info(f"PositionMarker started (interval={self.interval_sec}s)")
+            return True
+
+    def stop(self, timeout_sec: float = 5.0) -> None:
+        with self._lock:
+            if not self._thread or not self._thread.is_alive():
+                return
+            self._stop_event.set()
+            self._thread.join(timeout=timeout_sec)
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.mark_once()
+            except Exception as e:
+                logger.warning(f"PositionMarker mark failed: {e}")
+            self._stop_event.wait(self.interval_sec)
+
+
+_position_marker: Optional[PositionMarker] = None
+_marker_lock = threading.Lock()
+
+
+def get_position_marker() -> PositionMarker:
+    """获取PositionMarker单例"""
+    global _position_marker
+    with _marker_lock:
+        if _position_marker is None:
+            _position_marker = PositionMarker(
+                interval_sec=float(os.getenv("POSITION_MARK_INTERVAL_SEC", "10")),
+                quote_max_age_sec=float(os.getenv("POSITION_MARK_QUOTE_MAX_AGE_SEC", "60")),
+            )
+        return _position_marker
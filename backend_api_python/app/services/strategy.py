@@ -16,10 +16,43 @@ class StrategyService:
     
     # Class variable: limit connection test concurrency
     _connection_test_semaphore = threading.Semaphore(5)
+    _schema_checked = False
     
     def __init__(self):
         # Local deployment: do not use encryption/decryption.
-        pass
+        self._ensure_indicator_link_column()
+
+    @classmethod
+    def _ensure_indicator_link_column(cls):
+        """
+        Best-effort (once per process): ensure qd_strategies_trading.indicator_id exists, is indexed,
+        and is backfilled from indicator_config for rows written before the column existed.
+        Also adds qd_strategy_positions.marked_at (last mark-to-market) for old databases.
+        """
+        if cls._schema_checked:
+            return
+        cls._schema_checked = True
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute("ALTER TABLE qd_strategies_trading ADD COLUMN IF NOT EXISTS indicator_id INTEGER")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_strategies_indicator_id ON qd_strategies_trading(indicator_id)")
+                cur.execute("ALTER TABLE qd_strategy_positions ADD COLUMN IF NOT EXISTS marked_at TIMESTAMP")
+                # Keyset pagination of /strategies/trades (strategy_id, id < cursor ORDER BY id DESC)
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_trades_strategy_id_id ON qd_strategy_trades(strategy_id, id DESC)")
+                # Note: '{0,1}' instead of '?' because the cursor rewrites '?' placeholders.
+                cur.execute(
+                    """
+                    UPDATE qd_strategies_trading
+                    SET indicator_id = substring(indicator_config from '"indicator_id"\\s*:\\s*"{0,1}(\\d+)')::int
+                    WHERE indicator_id IS NULL
+                      AND indicator_config ~ '"indicator_id"\\s*:\\s*"{0,1}\\d+'
+                    """
+                )
+                db.commit()
+                cur.close()
+        except Exception as e:
+            logger.warning(f"Failed to ensure strategy indicator_id column: {e}")
         
     def get_running_strategies(self) -> List[Dict[str, Any]]:
         """Get all running strategies (ID only)"""
@@ -468,6 +501,17 @@ class StrategyService:
         except Exception:
             return default
 
+    @staticmethod
+    def _extract_indicator_id(indicator_config: Any) -> Optional[int]:
+        """indicator_config.indicator_id as int (denormalized into qd_strategies_trading.indicator_id)."""
+        if not isinstance(indicator_config, dict):
+            return None
+        try:
+            val = indicator_config.get('indicator_id')
+            return int(val) if val not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
     def _dump_json_or_encrypt(self, obj: Any, encrypt: bool = False) -> str:
         if obj is None:
             return ''
@@ -589,9 +633,9 @@ class StrategyService:
                 (user_id, strategy_name, strategy_type, market_category, execution_mode, notification_config,
                  status, symbol, timeframe, initial_capital, leverage, market_type,
                  exchange_config, indicator_config, trading_config, ai_model_config, decide_interval,
-                 strategy_group_id, group_base_name,
+                 strategy_group_id, group_base_name, indicator_id,
                  created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW(), NOW())
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW(), NOW())
                 """,
                 (
                     user_id,
@@ -612,7 +656,8 @@ class StrategyService:
                     self._dump_json_or_encrypt(payload.get('ai_model_config') or {}, encrypt=False),
                     int(payload.get('decide_interval') or 300),
                     strategy_group_id,
-                    group_base_name
+                    group_base_name,
+                    self._extract_indicator_id(indicator_config)
                 )
             )
             new_id = cur.lastrowid
@@ -826,6 +871,7 @@ class StrategyService:
                     market_type = ?,
                     exchange_config = ?,
                     indicator_config = ?,
+                    indicator_id = ?,
                     trading_config = ?,
                     ai_model_config = ?,
                     updated_at = NOW()
@@ -843,6 +889,7 @@ class StrategyService:
                     market_type,
                     self._dump_json_or_encrypt(exchange_config, encrypt=False) if exchange_config else '',
                     self._dump_json_or_encrypt(indicator_config, encrypt=False),
+                    self._extract_indicator_id(indicator_config),
                     self._dump_json_or_encrypt(trading_config, encrypt=False),
                     self._dump_json_or_encrypt(ai_model_config, encrypt=False),
                     strategy_id
@@ -0,0 +1,500 @@
+"""
+Standalone strategy runtime (strategies sharded across worker processes).
+
+By default live strategies run as threads inside the API process (TradingExecutor). With
+STRATEGY_RUNTIME_MODE=external they run in a separate runtime started with
+`python run_strategy_runtime.py`, which spawns STRATEGY_RUNTIME_WORKERS shard processes.
+Shard i owns every strategy with `id % workers == i` and runs them with its own TradingExecutor,
+so indicator work uses all cores and does not compete with API requests for one GIL.
+
+Control channel (PostgreSQL):
+- qd_strategy_runtime_commands: start/stop commands written by the API (StrategyRuntimeClient)
+  and claimed by the owning shard (FOR UPDATE SKIP LOCKED).
+- qd_strategy_runtime_shards: one heartbeat row per shard (pid, host, running strategy ids).
+
+Shards also reconcile against qd_strategies_trading.status every STRATEGY_RUNTIME_RECONCILE_SEC,
+which restores running strategies after a restart and repairs lost commands.
+"""
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RUNTIME_INPROCESS = 'inprocess'
+RUNTIME_EXTERNAL = 'external'
+
+
+def runtime_mode() -> str:
+    mode = (os.getenv('STRATEGY_RUNTIME_MODE') or RUNTIME_INPROCESS).strip().lower()
+    return RUNTIME_EXTERNAL if mode == RUNTIME_EXTERNAL else RUNTIME_INPROCESS
+
+
+def is_external_runtime() -> bool:
+    return runtime_mode() == RUNTIME_EXTERNAL
+
+
+def _default_workers() -> int:
+    return max(1, int(os.getenv('STRATEGY_RUNTIME_WORKERS') or (os.cpu_count() or 2)))
+
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def ensure_runtime_tables() -> None:
+    """Best-effort (once per process): create the control tables."""
+    global _tables_ready
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if _tables_ready:
+            return
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS qd_strategy_runtime_commands (
+                        id SERIAL PRIMARY KEY,
+                        strategy_id INTEGER NOT NULL,
+                        command VARCHAR(20) NOT NULL,
+                        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                        message TEXT DEFAULT '',
+                        created_at TIMESTAMP DEFAULT NOW(),
+                        processed_at TIMESTAMP
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_strategy_runtime_commands_pending
+                    ON qd_strategy_runtime_commands(id) WHERE status = 'pending'
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS qd_strategy_runtime_shards (
+                        shard_index INTEGER PRIMARY KEY,
+                        shard_count INTEGER NOT NULL,
+                        pid INTEGER,
+                        hostname VARCHAR(255) DEFAULT '',
+                        running_json TEXT DEFAULT '[]',
+                        started_at TIMESTAMP DEFAULT NOW(),
+                        heartbeat_at TIMESTAMP DEFAULT NOW()
+                    )
+                    """
+                )
+                db.commit()
+                cur.close()
+            _tables_ready = True
+        except Exception as e:
+            logger.warning(f"ensure strategy runtime tables failed: {e}")
+
+
+# ----------------------------------------------------------------------
+# API side
+# ----------------------------------------------------------------------
+
+class StrategyRuntimeClient:
+    """
+    Used by the API instead of TradingExecutor when STRATEGY_RUNTIME_MODE=external.
+
+    Exposes the same start_strategy / stop_strategy contract (bool result), implemented by
+    sending a command to the owning shard and waiting for its acknowledgement.
+    """
+
+    def __init__(self):
+        self.command_timeout_sec = float(os.getenv('STRATEGY_RUNTIME_COMMAND_TIMEOUT_SEC', '15'))
+        self.heartbeat_timeout_sec = float(os.getenv('STRATEGY_RUNTIME_HEARTBEAT_TIMEOUT_SEC', '30'))
+        ensure_runtime_tables()
+
+    def _shards(self) -> List[Dict[str, Any]]:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT shard_index, shard_count, pid, hostname, running_json, started_at, heartbeat_at,
+                       EXTRACT(EPOCH FROM (NOW() - heartbeat_at)) AS heartbeat_age_sec
+                FROM qd_strategy_runtime_shards
+                ORDER BY shard_index
+                """
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        return rows
+
+    def _owner_alive(self, strategy_id: int) -> bool:
+        shards = [s for s in self._shards() if float(s.get('heartbeat_age_sec') or 1e9) < self.heartbeat_timeout_sec]
+        if not shards:
+            return False
+        shard_count = int(shards[0].get('shard_count') or 1)
+        owner = int(strategy_id) % shard_count
+        return any(int(s.get('shard_index')) == owner and int(s.get('shard_count') or 0) == shard_count for s in shards)
+
+    def _send(self, strategy_id: int, command: str) -> Optional[Dict[str, Any]]:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                "INSERT INTO qd_strategy_runtime_commands (strategy_id, command) VALUES (?, ?)",
+                (int(strategy_id), command)
+            )
+            command_id = cur.lastrowid
+            db.commit()
+            cur.close()
+
+        deadline = time.time() + self.command_timeout_sec
+        while time.time() < deadline:
+            time.sleep(0.2)
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute(
+                    "SELECT id, status, message FROM qd_strategy_runtime_commands WHERE id = ?",
+                    (int(command_id),)
+                )
+                row = cur.fetchone()
+                cur.close()
+            if row and row.get('status') != 'pending' and row.get('status') != 'processing':
+                return row
+        return None
+
+    def start_strategy(self, strategy_id: int) -> bool:
+        if not self._owner_alive(strategy_id):
+            logger.error(f"Strategy runtime shard for strategy {strategy_id} is offline; refuse to start")
+            return False
+        row = self._send(strategy_id, 'start')
+        if not row:
+            logger.error(f"Strategy runtime did not acknowledge start of strategy {strategy_id}")
+            return False
+        if row.get('status') != 'done':
+            logger.error(f"Strategy runtime failed to start strategy {strategy_id}: {row.get('message')}")
+            return False
+        return True
+
+    def stop_strategy(self, strategy_id: int) -> bool:
+        # Even unacknowledged, the shard stops it on its next reconcile (DB status is 'stopped').
+        row = self._send(strategy_id, 'stop')
+        if not row:
+            logger.warning(f"Strategy runtime did not acknowledge stop of strategy {strategy_id}; reconcile will stop it")
+            return False
+        return row.get('status') == 'done'
+
+    def get_status(self) -> Dict[str, Any]:
+        shards = []
+        for s in self._shards():
+            try:
+                running = json.loads(s.get('running_json') or '[]')
+            except Exception:
+                running = []
+            age = float(s.get('heartbeat_age_sec') or 0)
+            shards.append({
+                'shard': int(s.get('shard_index')),
+                'shardCount': int(s.get('shard_count') or 0),
+                'pid': s.get('pid'),
+                'host': s.get('hostname') or '',
+                'alive': age < self.heartbeat_timeout_sec,
+                'heartbeatAgeSec': round(age, 1),
+                'startedAt': s.get('started_at'),
+                'running': running,
+            })
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute("SELECT COUNT(*) AS n FROM qd_strategy_runtime_commands WHERE status = 'pending'")
+            pending = int((cur.fetchone() or {}).get('n') or 0)
+            cur.close()
+        return {
+            'mode': RUNTIME_EXTERNAL,
+            'shards': shards,
+            'pendingCommands': pending,
+            'runningCount': sum(len(s['running']) for s in shards if s['alive']),
+        }
+
+
+# ----------------------------------------------------------------------
+# Runtime side
+# ----------------------------------------------------------------------
+
+class StrategyRuntimeShard:
+    """One runtime worker process: runs the strategies of its shard with a local TradingExecutor."""
+
+    def __init__(self, shard_index: int, shard_count: int):
+        from app.services.trading_executor import TradingExecutor
+
+        self.shard_index = int(shard_index)
+        self.shard_count = max(1, int(shard_count))
+        self.poll_sec = float(os.getenv('STRATEGY_RUNTIME_POLL_SEC', '1'))
+        self.reconcile_sec = float(os.getenv('STRATEGY_RUNTIME_RECONCILE_SEC', '30'))
+        self.executor = TradingExecutor()
+        self._position_versions: Dict[int, tuple] = {}
+        self._last_reconcile = 0.0
+        self._last_cleanup = 0.0
+
+    def owns(self, strategy_id: int) -> bool:
+        return int(strategy_id) % self.shard_count == self.shard_index
+
+    def running_ids(self) -> List[int]:
+        with self.executor.lock:
+            return sorted(int(sid) for sid, th in self.executor.running_strategies.items() if th.is_alive())
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        ensure_runtime_tables()
+        logger.info(f"Strategy runtime shard {self.shard_index}/{self.shard_count} started (pid={os.getpid()})")
+        while not stop_event.is_set():
+            try:
+                self._process_commands()
+                now = time.time()
+                if now - self._last_reconcile >= self.reconcile_sec:
+                    self._last_reconcile = now
+                    self._reconcile()
+                self._refresh_position_versions()
+                self._heartbeat()
+                if now - self._last_cleanup >= 3600:
+                    self._last_cleanup = now
+                    self._cleanup_commands()
+            except Exception as e:
+                logger.error(f"Strategy runtime shard {self.shard_index} loop error: {e}")
+            stop_event.wait(self.poll_sec)
+        logger.info(f"Strategy runtime shard {self.shard_index} stopping")
+
+    def _heartbeat(self) -> None:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                INSERT INTO qd_strategy_runtime_shards
+                    (shard_index, shard_count, pid, hostname, running_json, started_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, NOW(), NOW())
+                ON CONFLICT (shard_index) DO UPDATE SET
+                    shard_count = excluded.shard_count,
+                    pid = excluded.pid,
+                    hostname = excluded.hostname,
+                    running_json = excluded.running_json,
+                    started_at = CASE WHEN qd_strategy_runtime_shards.pid = excluded.pid
+                                      THEN qd_strategy_runtime_shards.started_at ELSE NOW() END,
+                    heartbeat_at = NOW()
+                RETURNING shard_index
+                """,
+                (self.shard_index, self.shard_count, os.getpid(), socket.gethostname(),
+                 json.dumps(self.running_ids()))
+            )
+            # Shards beyond the current shard count belong to a previous deployment
+            cur.execute("DELETE FROM qd_strategy_runtime_shards WHERE shard_index >= ?", (self.shard_count,))
+            db.commit()
+            cur.close()
+
+    def _process_commands(self) -> None:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                UPDATE qd_strategy_runtime_commands
+                SET status = 'processing'
+                WHERE id IN (
+                    SELECT id FROM qd_strategy_runtime_commands
+                    WHERE status = 'pending' AND MOD(strategy_id, ?) = ?
+                    ORDER BY id
+                    LIMIT 50
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, strategy_id, command
+                """,
+                (self.shard_count, self.shard_index)
+            )
+            commands = cur.fetchall() or []
+            db.commit()
+            cur.close()
+
+        for c in sorted(commands, key=lambda r: int(r.get('id'))):
+            ok, message = self._apply(int(c.get('strategy_id')), str(c.get('command') or ''))
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute(
+                    "UPDATE qd_strategy_runtime_commands SET status = ?, message = ?, processed_at = NOW() WHERE id = ?",
+                    ('done' if ok else 'failed', message, int(c.get('id')))
+                )
+                db.commit()
+                cur.close()
+
+    def _apply(self, strategy_id: int, command: str):
+        running = strategy_id in self.running_ids()
+        try:
+            if command == 'start':
+                # Already running (e.g. started by reconcile) counts as success
+                if running:
+                    return True, 'already running'
+                if self.executor.start_strategy(strategy_id):
+                    return True, 'started'
+                return False, 'start refused (see runtime logs)'
+            if command == 'stop':
+                if not running:
+                    return True, 'not running'
+                self.executor.stop_strategy(strategy_id)
+                return True, 'stopped'
+            return False, f'unknown command: {command}'
+        except Exception as e:
+            logger.error(f"Strategy runtime shard {self.shard_index}: {command} {strategy_id} failed: {e}")
+            return False, str(e)
+
+    def _reconcile(self) -> None:
+        """Converge the local threads to qd_strategies_trading.status for this shard."""
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                "SELECT id, strategy_type FROM qd_strategies_trading WHERE status = 'running' AND MOD(id, ?) = ?",
+                (self.shard_count, self.shard_index)
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        wanted = {
+            int(r['id']) for r in rows
+            if not r.get('strategy_type') or r.get('strategy_type') == 'IndicatorStrategy'
+        }
+        running = set(self.running_ids())
+
+        for sid in sorted(running - wanted):
+            logger.info(f"Strategy runtime shard {self.shard_index}: stopping {sid} (not running in DB)")
+            self.executor.stop_strategy(sid)
+
+        for sid in sorted(wanted - running):
+            if self.executor.start_strategy(sid):
+                logger.info(f"Strategy runtime shard {self.shard_index}: started {sid}")
+                continue
+            logger.warning(f"Strategy runtime shard {self.shard_index}: failed to start {sid}; marking stopped")
+            # Same as the in-process startup restore: avoid "zombie" running rows
+            try:
+                from app.services.strategy import StrategyService
+                StrategyService().update_strategy_status(sid, 'stopped')
+            except Exception as e:
+                logger.error(f"Failed to update strategy {sid} status after start failure: {e}")
+
+    def _refresh_position_versions(self) -> None:
+        """
+        Fills and exchange syncs are applied by the API process; detect their position writes
+        (row count / max updated_at per strategy) and drop this process's cached copy.
+        """
+        ids = self.running_ids()
+        if not ids:
+            self._position_versions = {}
+            return
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                """
+                SELECT strategy_id, COUNT(*) AS n, MAX(updated_at) AS ts
+                FROM qd_strategy_positions
+                WHERE strategy_id = ANY(?)
+                GROUP BY strategy_id
+                """,
+                (ids,)
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        versions = {int(sid): (0, None) for sid in ids}
+        for r in rows:
+            versions[int(r['strategy_id'])] = (int(r.get('n') or 0), r.get('ts'))
+
+        from app.services.strategy_state import invalidate_strategy_positions
+        for sid, version in versions.items():
+            old = self._position_versions.get(sid)
+            if old is not None and old != version:
+                invalidate_strategy_positions(sid)
+        self._position_versions = versions
+
+    def _cleanup_commands(self) -> None:
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute(
+                "DELETE FROM qd_strategy_runtime_commands WHERE status IN ('done', 'failed') "
+                "AND processed_at < NOW() - INTERVAL '1 day'"
+            )
+            # Claimed by a shard that died before acknowledging
+            cur.execute(
+                "UPDATE qd_strategy_runtime_commands SET status = 'failed', message = 'shard died', processed_at = NOW() "
+                "WHERE status = 'processing' AND created_at < NOW() - INTERVAL '10 minutes'"
+            )
+            db.commit()
+            cur.close()
+
+
+def run_shard(shard_index: int, shard_count: int) -> None:
+    """Entry point of a shard process (spawned by StrategyRuntimeSupervisor)."""
+    from app.utils.logger import setup_logger
+    setup_logger()
+
+    stop_event = threading.Event()
+
+    def _handle_signal(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    # Strategy threads are daemons; exiting leaves their DB status 'running' so the next
+    # runtime start restores them. The state cache is flushed at exit.
+    StrategyRuntimeShard(shard_index, shard_count).run_forever(stop_event)
+
+
+class StrategyRuntimeSupervisor:
+    """Spawns and supervises the shard processes (restarts a shard that dies)."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, int(workers or _default_workers()))
+        self.restart_delay_sec = float(os.getenv('STRATEGY_RUNTIME_RESTART_DELAY_SEC', '5'))
+        self._ctx = multiprocessing.get_context('spawn')
+        self._procs: Dict[int, Any] = {}
+        self._stopping = False
+
+    def _spawn(self, shard_index: int) -> None:
+        proc = self._ctx.Process(
+            target=run_shard,
+            args=(shard_index, self.workers),
+            name=f"strategy-shard-{shard_index}",
+            daemon=False,
+        )
+        proc.start()
+        self._procs[shard_index] = proc
+        logger.info(f"Strategy runtime shard {shard_index} spawned (pid={proc.pid})")
+
+    def _handle_signal(self, signum, frame):
+        self._stopping = True
+
+    def run_forever(self) -> None:
+        ensure_runtime_tables()
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        logger.info(f"Strategy runtime starting with {self.workers} shard(s)")
+
+        for i in range(self.workers):
+            self._spawn(i)
+
+        died_at: Dict[int, float] = {}
+        while not self._stopping:
+            time.sleep(1.0)
+            for i, proc in list(self._procs.items()):
+                if proc.is_alive() or self._stopping:
+                    continue
+                # Back off before respawning to avoid a crash loop
+                first = died_at.setdefault(i, time.time())
+                if time.time() - first < self.restart_delay_sec:
+                    continue
+                logger.error(f"Strategy runtime shard {i} exited (code={proc.exitcode}); restarting")
+                died_at.pop(i, None)
+                self._spawn(i)
+
+        logger.info("Strategy runtime stopping shards...")
+        for proc in self._procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in self._procs.values():
+            proc.join(timeout=15)
+            if proc.is_alive():
+                proc.kill()
+        logger.info("Strategy runtime stopped")
@@ -0,0 +1,370 @@
+"""
+In-memory state of running strategies (status + local position snapshot).
+
+The strategy loop used to query qd_strategies_trading / qd_strategy_positions several times per
+tick (status check, position reads for indicator injection / SL / TP / execution, highest-price
+tracking, current-price refresh). This cache keeps one authoritative copy per strategy:
+
+- status: updated by start/stop events, re-read from DB every STRATEGY_STATUS_REFRESH_SEC as a
+  safety net for out-of-band changes.
+- positions: loaded once, then maintained by events. Structural changes (open / size / close)
+  are still written through to the DB by the caller and applied here; writers outside the
+  executor (fills in PendingOrderWorker, exchange position sync) call `invalidate()`.
+  Positions are also re-read every STRATEGY_STATE_RELOAD_SEC.
+- highest_price / lowest_price tracking is write-behind: kept in memory and flushed in one
+  batched UPDATE every STRATEGY_STATE_FLUSH_SEC (current_price is kept in memory only; the DB
+  column and PnL are written by PositionMarker). Rows are matched by id, so a
+  flush never touches a position that was closed and reopened in the meantime. The flush leaves
+  updated_at alone: it only moves on structural changes (see StrategyRuntimeShard).
+
+Usage:
+    cache = get_strategy_state_cache()
+    if cache.get_status(sid) == 'running': ...
+    positions = cache.get_positions(sid)
+    cache.track_prices(sid, symbol, side, highest_price=hp)
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRICE_FIELDS = ('current_price', 'highest_price', 'lowest_price')
+
+
+class _StrategyState:
+    __slots__ = ('user_id', 'status', 'status_loaded_at', 'positions', 'positions_loaded_at', 'dirty', 'generation')
+
+    def __init__(self):
+        self.user_id: Optional[int] = None
+        self.status: Optional[str] = None
+        self.status_loaded_at = 0.0
+        # (symbol, side) -> position row
+        self.positions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.positions_loaded_at = 0.0
+        # (symbol, side) of rows with unflushed price fields
+        self.dirty = set()
+        # Bumped on every position write event; a load that raced with one is discarded
+        self.generation = 0
+
+
+class StrategyStateCache:
+    """Per-strategy status/position cache with write-behind price persistence."""
+
+    def __init__(self):
+        self.flush_interval_sec = float(os.getenv('STRATEGY_STATE_FLUSH_SEC', '5'))
+        self.reload_interval_sec = float(os.getenv('STRATEGY_STATE_RELOAD_SEC', '60'))
+        self.status_refresh_sec = float(os.getenv('STRATEGY_STATUS_REFRESH_SEC', '30'))
+
+        self._lock = threading.RLock()
+        self._states: Dict[int, _StrategyState] = {}
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    def _state(self, strategy_id: int) -> _StrategyState:
+        st = self._states.get(strategy_id)
+        if st is None:
+            st = self._states[strategy_id] = _StrategyState()
+        return st
+
+    def _load_status(self, strategy_id: int) -> None:
+        # DB round trip outside the lock; a set_status() that lands meanwhile wins
+        started = time.time()
+        with get_db_connection() as db:
+            cur = db.cursor()
+            cur.execute("SELECT status, user_id FROM qd_strategies_trading WHERE id = %s", (strategy_id,))
+            row = cur.fetchone()
+            cur.close()
+        with self._lock:
+            st = self._state(strategy_id)
+            st.user_id = int((row or {}).get('user_id') or 1)
+            if st.status_loaded_at <= started:
+                st.status = (row or {}).get('status')
+                st.status_loaded_at = time.time()
+
+    def get_status(self, strategy_id: int) -> Optional[str]:
+        """Strategy status ('running' / 'stopped' / None if the strategy does not exist)."""
+        strategy_id = int(strategy_id)
+        with self._lock:
+            st = self._state(strategy_id)
+            stale = st.status_loaded_at <= 0 or time.time() - st.status_loaded_at >= self.status_refresh_sec
+        if stale:
+            self._load_status(strategy_id)
+        with self._lock:
+            return self._state(strategy_id).status
+
+    def set_status(self, strategy_id: int, status: str) -> None:
+        """Apply a status change that the caller has already written to the DB."""
+        with self._lock:
+            st = self._state(int(strategy_id))
+            st.status = status
+            st.status_loaded_at = time.time()
+
+    def invalidate_status(self, strategy_id: int) -> None:
+        with self._lock:
+            st = self._states.get(int(strategy_id))
+            if st is not None:
+                st.status_loaded_at = 0.0
+
+    def get_user_id(self, strategy_id: int) -> int:
+        strategy_id = int(strategy_id)
+        with self._lock:
+            user_id = self._state(strategy_id).user_id
+        if user_id is None:
+            self._load_status(strategy_id)
+            with self._lock:
+                user_id = self._state(strategy_id).user_id
+        return user_id or 1
+
+    # ------------------------------------------------------------------
+    # Positions
+    # ------------------------------------------------------------------
+
+    def _load_positions(self, strategy_id: int, attempts: int = 3) -> None:
+        for attempt in range(attempts):
+            with self._lock:
+                generation = self._state(strategy_id).generation
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute(
+                    """
+                    SELECT id, symbol, side, size, entry_price, current_price, highest_price, lowest_price
+                    FROM qd_strategy_positions
+                    WHERE strategy_id = %s
+                    """,
+                    (strategy_id,)
+                )
+                rows = cur.fetchall() or []
+                cur.close()
+            with self._lock:
+                st = self._state(strategy_id)
+                # A position write landed while reading: the snapshot may predate it, read again
+                if st.generation == generation or attempt == attempts - 1:
+                    self._install_positions(st, rows)
+                    return
+
+    def _install_positions(self, st: _StrategyState, rows: List[Dict[str, Any]]) -> None:
+        positions = {}
+        for r in rows:
+            key = (str(r.get('symbol') or ''), str(r.get('side') or ''))
+            # Unflushed price tracking survives a reload of the same row
+            old = st.positions.get(key)
+            if old is not None and key in st.dirty and old.get('id') == r.get('id'):
+                for f in PRICE_FIELDS:
+                    r[f] = old.get(f)
+            positions[key] = dict(r)
+        st.dirty &= set(positions.keys())
+        st.positions = positions
+        st.positions_loaded_at = time.time()
+
+    def get_positions(self, strategy_id: int) -> List[Dict[str, Any]]:
+        """All local positions of a strategy (copies; safe to mutate)."""
+        strategy_id = int(strategy_id)
+        with self._lock:
+            st = self._state(strategy_id)
+            stale = st.positions_loaded_at <= 0 or time.time() - st.positions_loaded_at >= self.reload_interval_sec
+        if stale:
+            self._load_positions(strategy_id)
+        with self._lock:
+            return [dict(p) for p in self._state(strategy_id).positions.values()]
+
+    def put_position(self, strategy_id: int, row: Dict[str, Any]) -> None:
+        """
+        Apply an upsert that the caller has already written to the DB.
+
+        highest_price / lowest_price follow the upsert semantics: values <= 0 keep the old ones.
+        """
+        with self._lock:
+            st = self._states.get(int(strategy_id))
+            if st is None:
+                return  # not cached; next read loads from DB
+            st.generation += 1
+            if st.positions_loaded_at <= 0:
+                return
+            key = (str(row.get('symbol') or ''), str(row.get('side') or ''))
+            pos = st.positions.get(key)
+            if pos is None:
+                pos = st.positions[key] = {
+                    'id': None, 'symbol': key[0], 'side': key[1], 'size': 0.0, 'entry_price': 0.0,
+                    'current_price': 0.0, 'highest_price': 0.0, 'lowest_price': 0.0,
+                }
+            for f in ('id', 'size', 'entry_price', 'current_price'):
+                if row.get(f) is not None:
+                    pos[f] = row[f]
+            for f in ('highest_price', 'lowest_price'):
+                if float(row.get(f) or 0) > 0:
+                    pos[f] = row[f]
+            if pos.get('id') is None:
+                # Row id unknown (e.g. lastrowid unavailable): reload to pick it up
+                st.positions_loaded_at = 0.0
+
+    def remove_position(self, strategy_id: int, symbol: str, side: str) -> None:
+        """Apply a close that the caller has already written to the DB."""
+        with self._lock:
+            st = self._states.get(int(strategy_id))
+            if st is None:
+                return
+            st.generation += 1
+            key = (str(symbol), str(side))
+            st.positions.pop(key, None)
+            st.dirty.discard(key)
+
+    def track_prices(
+        self,
+        strategy_id: int,
+        symbol: str,
+        side: Optional[str] = None,
+        current_price: Optional[float] = None,
+        highest_price: float = 0.0,
+        lowest_price: float = 0.0,
+    ) -> None:
+        """
+        Update price tracking fields in memory; changed highest/lowest are persisted by the next flush.
+
+        side=None applies to every side of `symbol`. highest/lowest <= 0 are ignored.
+        """
+        with self._lock:
+            st = self._states.get(int(strategy_id))
+            if st is None or st.positions_loaded_at <= 0:
+                return
+            changed = False
+            for key, pos in st.positions.items():
+                if key[0] != symbol or (side is not None and key[1] != side):
+                    continue
+                if current_price is not None and float(current_price) > 0:
+                    pos['current_price'] = float(current_price)
+                if float(highest_price or 0) > 0 and float(highest_price) != float(pos.get('highest_price') or 0):
+                    pos['highest_price'] = float(highest_price)
+                    st.dirty.add(key)
+                    changed = True
+                if float(lowest_price or 0) > 0 and float(lowest_price) != float(pos.get('lowest_price') or 0):
+                    pos['lowest_price'] = float(lowest_price)
+                    st.dirty.add(key)
+                    changed = True
+        if changed:
+            self._ensure_flusher()
+
+    def invalidate(self, strategy_id: int) -> None:
+        """
+        Drop the cached positions of a strategy (written by someone else); re-read on next access.
+
+        Unflushed price tracking is discarded: the position may have been replaced, and the next
+        tick recomputes it anyway.
+        """
+        with self._lock:
+            st = self._states.get(int(strategy_id))
+            if st is not None:
+                st.generation += 1
+                st.positions = {}
+                st.dirty = set()
+                st.positions_loaded_at = 0.0
+
+    def forget(self, strategy_id: int) -> None:
+        """Flush and drop a strategy's state (strategy loop exited)."""
+        self.flush(strategy_id)
+        with self._lock:
+            self._states.pop(int(strategy_id), None)
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    def flush(self, strategy_id: Optional[int] = None) -> int:
+        """Persist dirty highest/lowest prices in one batched UPDATE. Returns the number of rows sent."""
+        batch = []
+        taken = []
+        with self._lock:
+            items = self._states.items() if strategy_id is None else [(int(strategy_id), self._states.get(int(strategy_id)))]
+            for sid, st in items:
+                if st is None or not st.dirty:
+                    continue
+                for key in st.dirty:
+                    pos = st.positions.get(key)
+                    if not pos or pos.get('id') is None:
+                        continue
+                    batch.append((
+                        int(pos['id']),
+                        float(pos.get('highest_price') or 0.0),
+                        float(pos.get('lowest_price') or 0.0),
+                    ))
+                taken.append((sid, set(st.dirty)))
+                st.dirty = set()
+        if not batch:
+            return 0
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute_values(
+                    """
+                    UPDATE qd_strategy_positions AS p
+                    SET highest_price = CASE WHEN v.highest_price > 0 THEN v.highest_price ELSE p.highest_price END,
+                        lowest_price = CASE WHEN v.lowest_price > 0 THEN v.lowest_price ELSE p.lowest_price END
+                    FROM (VALUES %s) AS v(id, highest_price, lowest_price)
+                    WHERE p.id = v.id
+                    """,
+                    batch,
+                    template="(%s, %s::double precision, %s::double precision)",
+                )
+                db.commit()
+                cur.close()
+        except Exception as e:
+            logger.warning(f"strategy state flush failed ({len(batch)} rows), will retry: {e}")
+            with self._lock:
+                for sid, keys in taken:
+                    st = self._states.get(sid)
+                    if st is not None:
+                        st.dirty |= {k for k in keys if k in st.positions}
+            return 0
+        return len(batch)
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        with self._lock:
+            if self._flush_thread is not None and self._flush_thread.is_alive():
+                return
+            self._flush_thread = threading.Thread(target=self._flush_loop, name="strategy-state-flush", daemon=True)
+            self._flush_thread.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop_event.wait(self.flush_interval_sec):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"strategy state flush loop error: {e}")
+
+    def shutdown(self) -> None:
+        self._stop_event.set()
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+
+_cache: Optional[StrategyStateCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_strategy_state_cache() -> StrategyStateCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = StrategyStateCache()
+                atexit.register(_cache.shutdown)
+    return _cache
+
+
+def invalidate_strategy_positions(strategy_id: int) -> None:
+    """Notify the cache that a strategy's positions were written outside the executor."""
+    if _cache is not None:
+        _cache.invalidate(strategy_id)
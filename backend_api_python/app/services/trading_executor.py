@@ -18,10 +18,14 @@ import numpy as np
 import ccxt
 
 from app.utils.logger import get_logger
-from app.utils.db import get_db_connection
+from app.utils.db import get_db_connection, get_order_db_connection
+from app.utils import latency
 from app.data_sources import DataSourceFactory
 from app.services.kline import KlineService
 from app.services.indicator_params import IndicatorParamsParser, IndicatorCaller
+from app.services.indicator_lookback import IndicatorLookback
+from app.services.strategy_state import get_strategy_state_cache
+from app.services.position_marker import get_position_marker
 
 logger = get_logger(__name__)
 
@@ -45,6 +49,10 @@ class TradingExecutor:
         self._signal_dedup = {}  # type: Dict[int, Dict[str, float]]
         self._signal_dedup_lock = threading.Lock()
         self.kline_service = KlineService()   # K线服务（带缓存）
+        # 运行中策略的状态/持仓内存副本（价格跟踪字段批量异步落库）
+        self.state_cache = get_strategy_state_cache()
+        # 实时 tick 只在指标所需的尾部窗口上执行（每根K线用全量历史校验一次）
+        self.indicator_lookback = IndicatorLookback()
         
         # 单实例线程上限，避免无限制创建线程导致 can't start new thread/OOM
         self.max_threads = int(os.getenv('STRATEGY_MAX_THREADS', '64'))
@@ -418,6 +426,8 @@ class TradingExecutor:
                     self._log_resource_status(prefix="启动异常")
                     raise e
                 self.running_strategies[strategy_id] = thread
+                # 调用方已先写库 status=running，下次检查时重新读取
+                self.state_cache.invalidate_status(strategy_id)
                 
                 logger.info(f"Strategy {strategy_id} started")
                 self._console_print(f"[strategy:{strategy_id}] started")
@@ -453,6 +463,7 @@ class TradingExecutor:
                     )
                     db.commit()
                     cursor.close()
+                self.state_cache.set_status(strategy_id, 'stopped')
                 
                 # 从运行列表中移除（线程会在下次循环检查状态时退出）
                 del self.running_strategies[strategy_id]
@@ -671,7 +682,8 @@ class TradingExecutor:
                 initial_position=initial_position,
                 initial_avg_entry_price=initial_avg_entry_price,
                 initial_position_count=initial_position_count,
-                initial_last_add_price=initial_last_add_price
+                initial_last_add_price=initial_last_add_price,
+                lookback_mode='learn'
             )
             if indicator_result is None:
                 logger.error(f"Strategy {strategy_id} indicator execution failed")
@@ -722,6 +734,8 @@ class TradingExecutor:
                             time.sleep(min(sleep_sec, 1.0))
                             continue
                     last_tick_time = current_time
+                    # Per-tick latency trace (stage timings are attached to any order enqueued this tick)
+                    latency.begin_trace()
 
                     # ============================================
                     # 0. 虚拟持仓模式，无需同步交易所
@@ -731,7 +745,8 @@ class TradingExecutor:
                     # ============================================
                     # 1. Fetch current price once per tick
                     # ============================================
-                    current_price = self._fetch_current_price(exchange, symbol, market_type=market_type, market_category=market_category)
+                    with latency.span("fetch_price"):
+                        current_price = self._fetch_current_price(exchange, symbol, market_type=market_type, market_category=market_category)
                     if current_price is None:
                         logger.warning(f"Strategy {strategy_id} failed to fetch current price for {market_category}:{symbol}")
                         continue
@@ -740,7 +755,8 @@ class TradingExecutor:
                     # 2. 检查是否需要更新K线（每个K线周期更新一次，从API拉取）
                     # ============================================
                     if current_time - last_kline_update_time >= kline_update_interval:
-                        klines = self._fetch_latest_kline(symbol, timeframe, limit=history_limit, market_category=market_category)
+                        with latency.span("kline_refresh"):
+                            klines = self._fetch_latest_kline(symbol, timeframe, limit=history_limit, market_category=market_category)
                         if klines and len(klines) >= 2:
                             df = self._klines_to_dataframe(klines)
                             if len(df) > 0:
@@ -760,14 +776,16 @@ class TradingExecutor:
                                     initial_position_count = 1
                                     initial_last_add_price = initial_avg_entry_price
 
-                                indicator_result = self._execute_indicator_with_prices(
-                                    indicator_code, df, trading_config,
-                                    initial_highest_price=initial_highest,
-                                    initial_position=initial_position,
-                                    initial_avg_entry_price=initial_avg_entry_price,
-                                    initial_position_count=initial_position_count,
-                                    initial_last_add_price=initial_last_add_price
-                                )
+                                with latency.span("indicator_exec"):
+                                    indicator_result = self._execute_indicator_with_prices(
+                                        indicator_code, df, trading_config,
+                                        initial_highest_price=initial_highest,
+                                        initial_position=initial_position,
+                                        initial_avg_entry_price=initial_avg_entry_price,
+                                        initial_position_count=initial_position_count,
+                                        initial_last_add_price=initial_last_add_price,
+                                        lookback_mode='learn'
+                                    )
                                 if indicator_result:
                                     pending_signals = indicator_result.get('pending_signals', [])
                                     last_kline_time = indicator_result.get('last_kline_time', 0)
@@ -779,10 +797,9 @@ class TradingExecutor:
                                     if new_hp > 0 and current_pos_list:
                                         current_close = float(df['close'].iloc[-1])
                                         for p in current_pos_list:
-                                            self._update_position(
+                                            self.state_cache.track_prices(
                                                 strategy_id, p['symbol'], p['side'],
-                                                float(p['size']), float(p['entry_price']),
-                                                current_close,
+                                                current_price=current_close,
                                                 highest_price=new_hp
                                             )
                     else:
@@ -810,24 +827,25 @@ class TradingExecutor:
                                     initial_position_count = 1
                                     initial_last_add_price = initial_avg_entry_price
 
-                                indicator_result = self._execute_indicator_with_prices(
-                                    indicator_code, realtime_df, trading_config,
-                                    initial_highest_price=initial_highest,
-                                    initial_position=initial_position,
-                                    initial_avg_entry_price=initial_avg_entry_price,
-                                    initial_position_count=initial_position_count,
-                                    initial_last_add_price=initial_last_add_price
-                                )
+                                with latency.span("indicator_exec"):
+                                    indicator_result = self._execute_indicator_with_prices(
+                                        indicator_code, realtime_df, trading_config,
+                                        initial_highest_price=initial_highest,
+                                        initial_position=initial_position,
+                                        initial_avg_entry_price=initial_avg_entry_price,
+                                        initial_position_count=initial_position_count,
+                                        initial_last_add_price=initial_last_add_price,
+                                        lookback_mode='tail'
+                                    )
                                 if indicator_result:
                                     pending_signals = indicator_result.get('pending_signals', [])
                                     new_hp = indicator_result.get('new_highest_price', 0)
 
                                     if new_hp > 0 and current_pos_list:
                                         for p in current_pos_list:
-                                            self._update_position(
+                                            self.state_cache.track_prices(
                                                 strategy_id, p['symbol'], p['side'],
-                                                float(p['size']), float(p['entry_price']),
-                                                current_price,
+                                                current_price=current_price,
                                                 highest_price=new_hp
                                             )
                             except Exception as e:
@@ -976,26 +994,27 @@ class TradingExecutor:
                             execute_price = trigger_price if trigger_price > 0 else current_price
                             signal_ts = int(selected.get("timestamp") or 0)
 
-                            ok = self._execute_signal(
-                                strategy_id=strategy_id,
-                                strategy_name=strategy_name,
-                                exchange=exchange,
-                                symbol=symbol,
-                                current_price=execute_price,
-                                signal_type=signal_type,
-                                position_size=position_size,
-                                signal_ts=signal_ts,
-                                current_positions=current_positions,
-                                trade_direction=trade_direction,
-                                leverage=leverage,
-                                initial_capital=initial_capital,
-                                market_type=market_type,
-                                market_category=market_category,
-                                execution_mode=execution_mode,
-                                notification_config=notification_config,
-                                trading_config=trading_config,
-                                ai_model_config=ai_model_config,
-                            )
+                            with latency.span("signal_execute"):
+                                ok = self._execute_signal(
+                                    strategy_id=strategy_id,
+                                    strategy_name=strategy_name,
+                                    exchange=exchange,
+                                    symbol=symbol,
+                                    current_price=execute_price,
+                                    signal_type=signal_type,
+                                    position_size=position_size,
+                                    signal_ts=signal_ts,
+                                    current_positions=current_positions,
+                                    trade_direction=trade_direction,
+                                    leverage=leverage,
+                                    initial_capital=initial_capital,
+                                    market_type=market_type,
+                                    market_category=market_category,
+                                    execution_mode=execution_mode,
+                                    notification_config=notification_config,
+                                    trading_config=trading_config,
+                                    ai_model_config=ai_model_config,
+                                )
                             if ok:
                                 logger.info(f"Strategy {strategy_id} signal executed: {signal_type} @ {execute_price}")
                                 # Notify portfolio positions linked to this symbol
@@ -1013,7 +1032,7 @@ class TradingExecutor:
                                 logger.warning(f"Strategy {strategy_id} signal rejected/failed: {signal_type}")
 
                     # Update positions once per tick.
-                    self._update_positions(strategy_id, symbol, current_price)
+                    self._update_positions(strategy_id, symbol, current_price, market_category=market_category)
 
                     # Heartbeat for UI observability (once per tick).
                     self._console_print(
@@ -1035,6 +1054,10 @@ class TradingExecutor:
             with self.lock:
                 if strategy_id in self.running_strategies:
                     del self.running_strategies[strategy_id]
+            try:
+                self.state_cache.forget(strategy_id)
+            except Exception as e:
+                logger.warning(f"Strategy {strategy_id} state flush on exit failed: {e}")
             self._console_print(f"[strategy:{strategy_id}] loop exited")
             logger.info(f"Strategy {strategy_id} loop exited")
     
@@ -1099,16 +1122,8 @@ class TradingExecutor:
         同时检查数据库状态和线程状态，避免重启后状态不一致
         """
         try:
-            # 1. 检查数据库状态
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                cursor.execute(
-                    "SELECT status FROM qd_strategies_trading WHERE id = %s",
-                    (strategy_id,)
-                )
-                result = cursor.fetchone()
-                cursor.close()
-                db_status = result and result.get('status') == 'running'
+            # 1. 检查数据库状态（内存副本，启停事件即时更新，定期回源）
+            db_status = self.state_cache.get_status(strategy_id) == 'running'
             
             # 2. 检查线程是否真的在运行
             with self.lock:
@@ -1128,6 +1143,7 @@ class TradingExecutor:
                         )
                         db.commit()
                         cursor.close()
+                    self.state_cache.set_status(strategy_id, 'stopped')
                 except Exception as e:
                     logger.error(f"Failed to update strategy {strategy_id} status to stopped: {e}")
                 return False
@@ -1382,14 +1398,12 @@ class TradingExecutor:
                 lp = entry_price
             lp = min(lp, float(current_price))
 
-            # Persist best-effort
+            # Persist best-effort (write-behind via the state cache)
             try:
-                self._update_position(
-                    strategy_id=strategy_id,
-                    symbol=pos.get('symbol') or symbol,
-                    side=side,
-                    size=float(pos.get('size') or 0.0),
-                    entry_price=entry_price,
+                self.state_cache.track_prices(
+                    strategy_id,
+                    pos.get('symbol') or symbol,
+                    side,
                     current_price=float(current_price),
                     highest_price=hp,
                     lowest_price=lp,
@@ -1556,23 +1570,47 @@ class TradingExecutor:
         initial_position: int = 0,
         initial_avg_entry_price: float = 0.0,
         initial_position_count: int = 0,
-        initial_last_add_price: float = 0.0
+        initial_last_add_price: float = 0.0,
+        lookback_mode: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         执行指标代码并提取待触发的信号和价格
+
+        lookback_mode:
+            None: 全量历史执行
+            'learn': 全量历史执行，并校验/学习尾部窗口（每根K线一次）
+            'tail': 使用已学习的尾部窗口执行（实时 tick）
         """
         try:
-            # 执行指标代码
-            executed_df, exec_env = self._execute_indicator_df(
-                indicator_code, df, trading_config, 
+            state_kwargs = dict(
                 initial_highest_price=initial_highest_price,
                 initial_position=initial_position,
                 initial_avg_entry_price=initial_avg_entry_price,
                 initial_position_count=initial_position_count,
-                initial_last_add_price=initial_last_add_price
+                initial_last_add_price=initial_last_add_price,
+            )
+            lookback_key = self.indicator_lookback.key(indicator_code, trading_config) if lookback_mode else None
+            run_df = df
+            if lookback_mode == 'tail':
+                window = self.indicator_lookback.window_for(lookback_key)
+                if 0 < window < len(df):
+                    run_df = df.iloc[-window:]
+
+            # 执行指标代码
+            executed_df, exec_env = self._execute_indicator_df(
+                indicator_code, run_df, trading_config, **state_kwargs
             )
             if executed_df is None:
                 return None
+
+            if lookback_mode == 'learn':
+                try:
+                    self.indicator_lookback.learn(
+                        lookback_key, indicator_code, trading_config, df, executed_df, exec_env,
+                        run=lambda part: self._execute_indicator_df(indicator_code, part, trading_config, **state_kwargs),
+                    )
+                except Exception as e:
+                    logger.warning(f"Indicator lookback analysis failed (using full history): {e}")
             
             # 提取最新的 highest_price
             new_highest_price = exec_env.get('highest_price', 0.0)
@@ -1919,24 +1957,15 @@ class TradingExecutor:
     def _get_current_positions(self, strategy_id: int, symbol: str) -> List[Dict[str, Any]]:
         """获取当前持仓（支持symbol规范化匹配）"""
         try:
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                query = """
-                    SELECT id, symbol, side, size, entry_price, highest_price, lowest_price
-                    FROM qd_strategy_positions
-                    WHERE strategy_id = %s
-                """
-                cursor.execute(query, (strategy_id,))
-                all_positions = cursor.fetchall()
-                
-                matched_positions = []
-                for pos in all_positions:
-                    # 简化匹配逻辑：只匹配前缀
-                    if pos['symbol'].split(':')[0] == symbol.split(':')[0]:
-                        matched_positions.append(pos)
-                
-                cursor.close()
-                return matched_positions
+            all_positions = self.state_cache.get_positions(strategy_id)
+
+            matched_positions = []
+            for pos in all_positions:
+                # 简化匹配逻辑：只匹配前缀
+                if pos['symbol'].split(':')[0] == symbol.split(':')[0]:
+                    matched_positions.append(pos)
+
+            return matched_positions
         except Exception as e:
             logger.error(f"Failed to fetch positions: {str(e)}")
             return []
@@ -2478,8 +2507,14 @@ class TradingExecutor:
             }
             if extra_payload and isinstance(extra_payload, dict):
                 payload.update(extra_payload)
+            # Signal-side stage timings of this tick; the worker adds queue/dispatch/exchange stages.
+            payload["_latency"] = {
+                "stages": dict(latency.current_trace()),
+                "enqueued_at": time.time(),
+            }
+            t_enqueue = time.perf_counter()
 
-            with get_db_connection() as db:
+            with get_order_db_connection() as db:
                 cur = db.cursor()
 
                 # Extra dedup/cooldown guard (DB-based, more rigorous than local position state):
@@ -2603,6 +2638,7 @@ class TradingExecutor:
                 pending_id = cur.lastrowid
                 db.commit()
                 cur.close()
+            latency.record("enqueue", (time.perf_counter() - t_enqueue) * 1000.0)
             return int(pending_id) if pending_id is not None else None
         except Exception as e:
             logger.error(f"enqueue_pending_order failed: {e}")
@@ -2658,15 +2694,9 @@ class TradingExecutor:
         """更新持仓状态"""
         try:
             # Get user_id from strategy
-            user_id = 1
+            user_id = self.state_cache.get_user_id(strategy_id)
             with get_db_connection() as db:
                 cursor = db.cursor()
-                try:
-                    cursor.execute("SELECT user_id FROM qd_strategies_trading WHERE id = %s", (strategy_id,))
-                    row = cursor.fetchone()
-                    user_id = int((row or {}).get('user_id') or 1)
-                except Exception:
-                    pass
                 # 简化：直接 Update 或 Insert
                 upsert_query = """
                     INSERT INTO qd_strategy_positions (
@@ -2684,10 +2714,16 @@ class TradingExecutor:
                 cursor.execute(upsert_query, (
                     user_id, strategy_id, symbol, side, size, entry_price, current_price, highest_price, lowest_price
                 ))
+                position_id = cursor.lastrowid
                 db.commit()
                 cursor.close()
+            self.state_cache.put_position(strategy_id, {
+                'id': position_id, 'symbol': symbol, 'side': side, 'size': size, 'entry_price': entry_price,
+                'current_price': current_price, 'highest_price': highest_price, 'lowest_price': lowest_price,
+            })
         except Exception as e:
             logger.error(f"Failed to update position: {e}")
+            self.state_cache.invalidate(strategy_id)
 
     def _close_position(self, strategy_id: int, symbol: str, side: str):
         """平仓：删除持仓记录"""
@@ -2697,20 +2733,19 @@ class TradingExecutor:
                 cursor.execute("DELETE FROM qd_strategy_positions WHERE strategy_id = %s AND symbol = %s AND side = %s", (strategy_id, symbol, side))
                 db.commit()
                 cursor.close()
+            self.state_cache.remove_position(strategy_id, symbol, side)
         except Exception as e:
             logger.error(f"Failed to close position: {e}")
+            self.state_cache.invalidate(strategy_id)
     
     def _delete_position_by_id(self, position_id: int):
          pass
 
-    def _update_positions(self, strategy_id: int, symbol: str, current_price: float):
-        """更新所有持仓的当前价格"""
+    def _update_positions(self, strategy_id: int, symbol: str, current_price: float, market_category: str = 'Crypto'):
+        """更新所有持仓的当前价格（内存副本 + 共享报价快照，由 PositionMarker 批量落库并计算浮盈）"""
         try:
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                cursor.execute("UPDATE qd_strategy_positions SET current_price = %s WHERE strategy_id = %s AND symbol = %s", (current_price, strategy_id, symbol))
-                db.commit()
-                cursor.close()
+            self.state_cache.track_prices(strategy_id, symbol, current_price=current_price)
+            get_position_marker().publish_quote(market_category, symbol, current_price)
         except Exception:
             pass
             
@@ -2727,14 +2762,7 @@ class TradingExecutor:
     def _get_all_positions(self, strategy_id: int) -> List[Dict[str, Any]]:
         """获取策略的所有持仓（截面策略使用）"""
         try:
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                cursor.execute("""
-                    SELECT id, symbol, side, size, entry_price, current_price, highest_price, lowest_price
-                    FROM qd_strategy_positions
-                    WHERE strategy_id = %s
-                """, (strategy_id,))
-                return cursor.fetchall() or []
+            return self.state_cache.get_positions(strategy_id)
         except Exception as e:
             logger.error(f"Failed to get all positions: {e}")
             return []
@@ -7,6 +7,7 @@ import hashlib
 import time
 import os
 from typing import Optional, Dict, Any, List
+from app.utils.auth import invalidate_token_version_cache
 from app.utils.db import get_db_connection
 from app.utils.logger import get_logger
 
@@ -244,6 +245,7 @@ class UserService:
                 
                 new_version = int(row.get('token_version') or 1) if row else 1
                 logger.info(f"Incremented token_version for user_id={user_id} to {new_version}")
+                invalidate_token_version_cache(user_id, new_version)
                 return new_version
         except Exception as e:
             logger.error(f"increment_token_version failed: {e}")
@@ -399,8 +401,13 @@ class UserService:
         
         return self.reset_password(user_id, new_password)
     
-    def reset_password(self, user_id: int, new_password: str) -> bool:
-        """Reset user password (admin operation, no old password required)"""
+    def reset_password(self, user_id: int, new_password: str, revoke_sessions: bool = False) -> bool:
+        """
+        Reset user password (admin operation, no old password required).
+
+        revoke_sessions=True also bumps token_version so existing tokens stop working
+        (admin reset / forgot-password flow).
+        """
         if len(new_password) < 6:
             raise ValueError("Password must be at least 6 characters")
         
@@ -409,20 +416,32 @@ class UserService:
         try:
             with get_db_connection() as db:
                 cur = db.cursor()
-                cur.execute(
-                    "UPDATE qd_users SET password_hash = ?, updated_at = NOW() WHERE id = ?",
-                    (password_hash, user_id)
-                )
+                if revoke_sessions:
+                    cur.execute(
+                        """
+                        UPDATE qd_users
+                        SET password_hash = ?, token_version = COALESCE(token_version, 0) + 1, updated_at = NOW()
+                        WHERE id = ?
+                        """,
+                        (password_hash, user_id)
+                    )
+                else:
+                    cur.execute(
+                        "UPDATE qd_users SET password_hash = ?, updated_at = NOW() WHERE id = ?",
+                        (password_hash, user_id)
+                    )
                 db.commit()
                 cur.close()
-                return True
+            if revoke_sessions:
+                invalidate_token_version_cache(user_id)
+            return True
         except Exception as e:
             logger.error(f"reset_password failed: {e}")
             return False
     
-    def update_password(self, user_id: int, new_password: str) -> bool:
+    def update_password(self, user_id: int, new_password: str, revoke_sessions: bool = False) -> bool:
         """Alias for reset_password - update user password without old password verification"""
-        return self.reset_password(user_id, new_password)
+        return self.reset_password(user_id, new_password, revoke_sessions=revoke_sessions)
     
     def delete_user(self, user_id: int) -> bool:
         """Delete a user"""
@@ -432,7 +451,8 @@ class UserService:
                 cur.execute("DELETE FROM qd_users WHERE id = ?", (user_id,))
                 db.commit()
                 cur.close()
-                return True
+            invalidate_token_version_cache(user_id)
+            return True
         except Exception as e:
             logger.error(f"delete_user failed: {e}")
             return False
@@ -7,13 +7,21 @@ Supports multi-user authentication with role-based access control.
 import jwt
 import datetime
 import os
+import threading
+import time
 from functools import wraps
+from typing import Optional
 from flask import request, jsonify, g
 from app.config.settings import Config
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# user_id -> (token_version, expires_at)；进程内缓存，避免每个请求都查 qd_users
+_token_version_cache = {}
+_token_version_lock = threading.Lock()
+_TOKEN_VERSION_KEY = "auth:token_version:{}"
+
 
 def generate_token(user_id: int, username: str, role: str = 'user', token_version: int = 1) -> str:
     """
@@ -79,10 +87,97 @@ def verify_token(token: str) -> dict:
         return None
 
 
+def _token_version_ttl() -> int:
+    try:
+        from app.config import CacheConfig
+        return max(0, int(CacheConfig.TOKEN_VERSION_CACHE_TTL))
+    except Exception:
+        return 0
+
+
+def _shared_cache():
+    """Redis-backed CacheManager when enabled (shared across workers), else None."""
+    try:
+        from app.utils.cache import CacheManager
+        cache = CacheManager()
+        return cache if cache.is_redis else None
+    except Exception:
+        return None
+
+
+def _load_token_version(user_id: int) -> Optional[int]:
+    """
+    当前 token 版本号：进程内缓存 -> 共享缓存(Redis) -> 数据库。
+    用户不存在返回 None（不缓存）。
+    """
+    user_id = int(user_id)
+    ttl = _token_version_ttl()
+    now = time.time()
+    if ttl > 0:
+        with _token_version_lock:
+            hit = _token_version_cache.get(user_id)
+        if hit and hit[1] > now:
+            return hit[0]
+
+        shared = _shared_cache()
+        if shared is not None:
+            cached = shared.get(_TOKEN_VERSION_KEY.format(user_id))
+            if cached is not None:
+                version = int(cached)
+                with _token_version_lock:
+                    _token_version_cache[user_id] = (version, now + ttl)
+                return version
+
+    from app.utils.db import get_db_connection
+    with get_db_connection() as db:
+        cur = db.cursor()
+        cur.execute(
+            "SELECT token_version FROM qd_users WHERE id = ?",
+            (user_id,)
+        )
+        row = cur.fetchone()
+        cur.close()
+
+    if not row:
+        return None
+    version = int(row.get('token_version') or 1)
+    if ttl > 0:
+        with _token_version_lock:
+            _token_version_cache[user_id] = (version, now + ttl)
+        shared = _shared_cache()
+        if shared is not None:
+            shared.set(_TOKEN_VERSION_KEY.format(user_id), version, ttl)
+    return version
+
+
+def invalidate_token_version_cache(user_id: int, new_version: Optional[int] = None):
+    """
+    使用户 token_version 缓存失效。
+
+    调用方在修改 qd_users.token_version（登录踢出、登出、改密码）或删除用户后调用；
+    传入 new_version 时直接写入新值（write-through），否则删除缓存下次回源。
+    """
+    user_id = int(user_id)
+    ttl = _token_version_ttl()
+    shared = _shared_cache()
+    with _token_version_lock:
+        if new_version is not None and ttl > 0:
+            _token_version_cache[user_id] = (int(new_version), time.time() + ttl)
+        else:
+            _token_version_cache.pop(user_id, None)
+    if shared is not None:
+        if new_version is not None and ttl > 0:
+            shared.set(_TOKEN_VERSION_KEY.format(user_id), int(new_version), ttl)
+        else:
+            shared.delete(_TOKEN_VERSION_KEY.format(user_id))
+
+
 def _verify_token_version(user_id: int, token_version: int) -> bool:
     """
     验证 token 版本是否与数据库中存储的版本匹配。
     用于实现单一客户端登录（踢出重复登录）。
+
+    版本号按 TOKEN_VERSION_CACHE_TTL 短时缓存；版本变更时由 invalidate_token_version_cache 立即更新。
     
     Args:
         user_id: 用户ID
@@ -92,21 +187,10 @@ def _verify_token_version(user_id: int, token_version: int) -> bool:
         True if version matches, False otherwise
     """
     try:
-        from app.utils.db import get_db_connection
-        with get_db_connection() as db:
-            cur = db.cursor()
-            cur.execute(
-                "SELECT token_version FROM qd_users WHERE id = ?",
-                (user_id,)
-            )
-            row = cur.fetchone()
-            cur.close()
-            
-            if not row:
-                return False
-            
-            db_token_version = row.get('token_version') or 1
-            return int(token_version) == int(db_token_version)
+        db_token_version = _load_token_version(user_id)
+        if db_token_version is None:
+            return False
+        return int(token_version) == int(db_token_version)
     except Exception as e:
         logger.error(f"_verify_token_version failed: {e}")
         # 如果验证失败，为了安全起见，返回 False
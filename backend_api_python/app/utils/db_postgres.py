@@ -3,11 +3,37 @@ PostgreSQL Database Connection Utility
 
 Supports multi-user mode with connection pooling.
 Provides placeholder conversion for backward compatibility with legacy code.
+
+Statement handling:
+- The translated SQL (? -> %s, INSERT OR IGNORE, RETURNING id) is memoized per source string
+  (DB_STATEMENT_CACHE_SIZE entries).
+- Per-statement timing counters (count / total / max / errors / rows) are kept in-process and
+  readable via get_query_stats(); statements slower than DB_SLOW_QUERY_MS are logged.
+- DB_PREPARED_STATEMENTS=true: a parameterized statement executed DB_PREPARE_THRESHOLD times in
+  this process is PREPAREd on each pooled connection that runs it, and later calls are sent as
+  EXECUTE. Statements that cannot be prepared safely (literal %, SELECT *, multiple statements,
+  DDL) always take the plain path.
+
+Connection pools:
+- "default": DB_POOL_MIN..DB_POOL_MAX connections, used by everything else.
+- "orders": a small separate pool (DB_ORDER_POOL_MIN..DB_ORDER_POOL_MAX) for the order queue
+  (enqueue / claim / mark sent), so live dispatch is not starved by dashboards or backtests.
+  DB_ORDER_POOL_MAX=0 routes those callers to the default pool.
+- Acquisition blocks up to DB_POOL_TIMEOUT_SEC when a pool is exhausted instead of failing.
+- Connections idle longer than DB_POOL_VALIDATE_IDLE_SEC are checked with SELECT 1 on checkout;
+  connections older than DB_POOL_MAX_LIFETIME_SEC are closed when returned.
+- get_pool_stats(): utilization, timeouts and per-caller wait / hold time histograms.
 """
+import functools
+import hashlib
 import os
+import re
+import sys
 import threading
+import time
 from typing import Optional, Any, List, Dict
 from contextlib import contextmanager
+from app.utils.latency import LatencyRecorder
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,16 +42,167 @@ logger = get_logger(__name__)
 try:
     import psycopg2
     from psycopg2 import pool
+    from psycopg2 import extensions as pg_extensions
     from psycopg2.extras import RealDictCursor
     HAS_PSYCOPG2 = True
 except ImportError:
     HAS_PSYCOPG2 = False
     logger.warning("psycopg2 not installed. PostgreSQL support disabled.")
 
-# Connection pool (global singleton)
-_connection_pool: Optional[Any] = None
+# Connection pools by name (global singletons)
+DEFAULT_POOL = 'default'
+ORDERS_POOL = 'orders'
+_connection_pools: Dict[str, Any] = {}
 _pool_lock = threading.Lock()
 
+STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '1024'))
+PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'false').lower() == 'true'
+PREPARE_THRESHOLD = max(1, int(os.getenv('DB_PREPARE_THRESHOLD', '50')))
+QUERY_STATS_ENABLED = os.getenv('DB_QUERY_STATS', 'true').lower() == 'true'
+QUERY_STATS_MAX_STATEMENTS = int(os.getenv('DB_QUERY_STATS_MAX_STATEMENTS', '500'))
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '0') or 0)
+
+# SQLSTATEs on EXECUTE that mean the prepared form itself is unusable (result type changed after
+# ALTER TABLE, statement missing, parameter type inferred differently than the values sent)
+_PREPARED_FAILURE_CODES = {'0A000', '26000', '42804', '42883', '22P02'}
+
+_PREPARABLE_VERBS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+_STAR_PROJECTION = re.compile(r'(SELECT|RETURNING|,)\s*(\w+\.)?\*', re.IGNORECASE)
+
+if HAS_PSYCOPG2:
+    class _SessionConnection(pg_extensions.connection):
+        """psycopg2 connection that remembers which statements are prepared in its session."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # statement name -> True (prepared) / False (PREPARE failed on this session)
+            self.prepared_statements: Dict[str, bool] = {}
+
+
+class _Statement:
+    """A translated SQL statement (shared by all callers of the same source string)."""
+
+    __slots__ = ('converted', 'sql', 'is_insert', 'preparable', 'name', 'prepare_sql', 'execute_sql',
+                 'param_count', 'hits')
+
+    def __init__(self, query: str):
+        # Replace ? -> %s
+        sql = query.replace('?', '%s')
+        # INSERT OR IGNORE -> PostgreSQL: INSERT ... ON CONFLICT DO NOTHING
+        sql = sql.replace('INSERT OR IGNORE', 'INSERT')
+        self.converted = sql
+
+        # Check if this is an INSERT and add RETURNING id if not present
+        upper = sql.strip().upper()
+        self.is_insert = upper.startswith('INSERT')
+        if self.is_insert and 'RETURNING' not in upper:
+            sql = sql.rstrip(';').rstrip() + ' RETURNING id'
+        self.sql = sql
+
+        self.param_count = sql.count('%s')
+        body = sql.strip().rstrip(';')
+        self.preparable = (
+            self.param_count > 0
+            and upper.startswith(_PREPARABLE_VERBS)
+            and '%' not in sql.replace('%s', '')
+            and not any('%s' in lit for lit in sql.split("'")[1::2])
+            and ';' not in body
+            and not _STAR_PROJECTION.search(sql)
+        )
+        self.name = 'qd_' + hashlib.sha1(sql.encode('utf-8')).hexdigest()[:20]
+        self.prepare_sql = None
+        self.execute_sql = None
+        if self.preparable:
+            parts = body.split('%s')
+            numbered = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], start=1))
+            self.prepare_sql = f'PREPARE {self.name} AS {numbered}'
+            self.execute_sql = f'EXECUTE {self.name} ({", ".join(["%s"] * self.param_count)})'
+        self.hits = 0
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _translate(query: str) -> _Statement:
+    return _Statement(query)
+
+
+class QueryStats:
+    """Thread-safe per-statement timing counters."""
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max(1, int(max_statements))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List[float]] = {}
+        self._started_at = time.time()
+
+    def record(self, sql: str, ms: float, rows: int = 0, error: bool = False, prepared: bool = False) -> None:
+        with self._lock:
+            entry = self._stats.get(sql)
+            if entry is None:
+                if len(self._stats) >= self.max_statements:
+                    sql = '<other>'
+                    entry = self._stats.get(sql)
+                if entry is None:
+                    # count, total_ms, max_ms, errors, rows, prepared
+                    entry = self._stats[sql] = [0, 0.0, 0.0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += ms
+            if ms > entry[2]:
+                entry[2] = ms
+            if error:
+                entry[3] += 1
+            if rows > 0:
+                entry[4] += rows
+            if prepared:
+                entry[5] += 1
+
+    def snapshot(self, limit: int = 50, order_by: str = 'total') -> Dict[str, Any]:
+        with self._lock:
+            items = [(sql, list(v)) for sql, v in self._stats.items()]
+            started_at = self._started_at
+        key = {
+            'count': lambda item: item[1][0],
+            'max': lambda item: item[1][2],
+            'avg': lambda item: item[1][1] / item[1][0] if item[1][0] else 0.0,
+        }.get(order_by, lambda item: item[1][1])
+        items.sort(key=key, reverse=True)
+        statements = []
+        for sql, (count, total_ms, max_ms, errors, rows, prepared) in items[:max(1, int(limit))]:
+            statements.append({
+                'sql': ' '.join(sql.split()),
+                'count': count,
+                'total_ms': round(total_ms, 3),
+                'avg_ms': round(total_ms / count, 3) if count else None,
+                'max_ms': round(max_ms, 3),
+                'errors': errors,
+                'rows': rows,
+                'prepared': prepared,
+            })
+        cache = _translate.cache_info()
+        return {
+            'since': int(started_at),
+            'distinct_statements': len(items),
+            'statement_cache': {'hits': cache.hits, 'misses': cache.misses, 'size': cache.currsize, 'max_size': cache.maxsize},
+            'prepared_statements': PREPARED_STATEMENTS,
+            'statements': statements,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self._started_at = time.time()
+
+
+_query_stats = QueryStats(QUERY_STATS_MAX_STATEMENTS)
+
+
+def get_query_stats(limit: int = 50, order_by: str = 'total') -> Dict[str, Any]:
+    """Per-statement timing profile of this process (order_by: total / count / avg / max)."""
+    return _query_stats.snapshot(limit=limit, order_by=order_by)
+
+
+def reset_query_stats() -> None:
+    _query_stats.reset()
+
 
 def _get_database_url() -> str:
     """Get database connection URL from environment"""
@@ -75,16 +252,196 @@ def _parse_database_url(url: str) -> Dict[str, Any]:
     return result
 
 
-def _get_connection_pool():
-    """Get or create connection pool"""
-    global _connection_pool
-    
-    if _connection_pool is not None:
-        return _connection_pool
+def _pool_settings(name: str) -> Dict[str, Any]:
+    if name == ORDERS_POOL:
+        minconn = int(os.getenv('DB_ORDER_POOL_MIN', '1'))
+        maxconn = int(os.getenv('DB_ORDER_POOL_MAX', '4'))
+    else:
+        minconn = int(os.getenv('DB_POOL_MIN', '2'))
+        maxconn = int(os.getenv('DB_POOL_MAX', '20'))
+    maxconn = max(0 if name == ORDERS_POOL else 1, maxconn)
+    return {
+        'minconn': max(0, min(minconn, maxconn)),
+        'maxconn': maxconn,
+        'timeout_sec': float(os.getenv('DB_POOL_TIMEOUT_SEC', '10')),
+        'validate_idle_sec': float(os.getenv('DB_POOL_VALIDATE_IDLE_SEC', '30')),
+        'max_lifetime_sec': float(os.getenv('DB_POOL_MAX_LIFETIME_SEC', '1800')),
+    }
+
+
+class QdConnectionPool:
+    """
+    ThreadedConnectionPool with blocking acquisition, idle validation, connection recycling and
+    saturation metrics.
+
+    A semaphore with `maxconn` slots bounds checkouts, so the underlying pool never reports
+    "connection pool exhausted"; callers wait up to `timeout_sec` for a slot instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        minconn: int,
+        maxconn: int,
+        timeout_sec: float = 10.0,
+        validate_idle_sec: float = 30.0,
+        max_lifetime_sec: float = 1800.0,
+        **connect_kwargs,
+    ):
+        self.name = name
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout_sec = max(0.0, float(timeout_sec))
+        self.validate_idle_sec = float(validate_idle_sec)
+        self.max_lifetime_sec = float(max_lifetime_sec)
+        self._pool = pool.ThreadedConnectionPool(minconn=minconn, maxconn=maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        # id(conn) -> (checked out at, caller)
+        self._checked_out: Dict[int, tuple] = {}
+        self._created_at: Dict[int, float] = {}
+        self._returned_at: Dict[int, float] = {}
+        self._acquired = 0
+        self._timeouts = 0
+        self._validated = 0
+        self._discarded = 0
+        self._recycled = 0
+        self._peak_in_use = 0
+        self._waits = LatencyRecorder()
+        self._holds = LatencyRecorder()
+
+    def getconn(self, caller: str = '?'):
+        """Check out a connection, waiting up to timeout_sec for a free slot."""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout_sec):
+            with self._lock:
+                self._timeouts += 1
+            raise pool.PoolError(
+                f"connection pool '{self.name}' exhausted: no connection within {self.timeout_sec:.1f}s "
+                f"({self.maxconn} in use, caller={caller})"
+            )
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self._checked_out[id(conn)] = (time.perf_counter(), caller)
+            self._acquired += 1
+            self._peak_in_use = max(self._peak_in_use, len(self._checked_out))
+        self._waits.record(caller, wait_ms)
+        return conn
+
+    def _checkout(self):
+        for _ in range(3):
+            conn = self._pool.getconn()
+            cid = id(conn)
+            now = time.time()
+            with self._lock:
+                self._created_at.setdefault(cid, now)
+                idle_sec = now - self._returned_at.get(cid, now)
+            if conn.closed:
+                self._discard(conn)
+                continue
+            if self.validate_idle_sec > 0 and idle_sec > self.validate_idle_sec and not self._is_alive(conn):
+                self._discard(conn)
+                continue
+            return conn
+        # Server unreachable or every idle connection was broken: a fresh connect raises if it fails
+        conn = self._pool.getconn()
+        with self._lock:
+            self._created_at.setdefault(id(conn), time.time())
+        return conn
+
+    def _is_alive(self, conn) -> bool:
+        with self._lock:
+            self._validated += 1
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.info(f"Discarding broken connection from pool '{self.name}': {e}")
+            return False
+
+    def _discard(self, conn) -> None:
+        cid = id(conn)
+        with self._lock:
+            self._discarded += 1
+            self._created_at.pop(cid, None)
+            self._returned_at.pop(cid, None)
+        try:
+            self._pool.putconn(conn, close=True)
+        except Exception:
+            pass
+
+    def putconn(self, conn) -> None:
+        """Return a connection; unknown or already returned connections are ignored."""
+        cid = id(conn)
+        with self._lock:
+            entry = self._checked_out.pop(cid, None)
+            if entry is None:
+                return
+            now = time.time()
+            expired = self.max_lifetime_sec > 0 and now - self._created_at.get(cid, now) > self.max_lifetime_sec
+            close = bool(conn.closed) or expired
+            if close:
+                self._created_at.pop(cid, None)
+                self._returned_at.pop(cid, None)
+                if expired:
+                    self._recycled += 1
+            else:
+                self._returned_at[cid] = now
+        self._holds.record(entry[1], (time.perf_counter() - entry[0]) * 1000.0)
+        try:
+            self._pool.putconn(conn, close=close)
+        except Exception as e:
+            logger.warning(f"Failed to return connection to pool '{self.name}': {e}")
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_use = len(self._checked_out)
+            data = {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'in_use': in_use,
+                'open': len(self._created_at),
+                'utilization': round(in_use / self.maxconn, 3) if self.maxconn else None,
+                'peak_in_use': self._peak_in_use,
+                'acquired': self._acquired,
+                'timeouts': self._timeouts,
+                'validated': self._validated,
+                'discarded': self._discarded,
+                'recycled': self._recycled,
+                'timeout_sec': self.timeout_sec,
+            }
+        # Per-caller (module) histograms, ms
+        data['wait'] = self._waits.snapshot()['stages']
+        data['hold'] = self._holds.snapshot()['stages']
+        return data
+
+
+def _get_connection_pool(name: str = DEFAULT_POOL) -> QdConnectionPool:
+    """Get or create the named connection pool"""
+    if name != DEFAULT_POOL and _pool_settings(name)['maxconn'] <= 0:
+        name = DEFAULT_POOL
+
+    existing = _connection_pools.get(name)
+    if existing is not None:
+        return existing
     
     with _pool_lock:
-        if _connection_pool is not None:
-            return _connection_pool
+        existing = _connection_pools.get(name)
+        if existing is not None:
+            return existing
         
         if not HAS_PSYCOPG2:
             raise RuntimeError("psycopg2 is not installed. Cannot use PostgreSQL.")
@@ -97,23 +454,41 @@ def _get_connection_pool():
         if not params:
             raise RuntimeError(f"Invalid DATABASE_URL format: {db_url}")
         
+        settings = _pool_settings(name)
         try:
-            _connection_pool = pool.ThreadedConnectionPool(
-                minconn=2,
-                maxconn=20,
+            created = QdConnectionPool(
+                name,
                 host=params.get('host', 'localhost'),
                 port=params.get('port', 5432),
                 user=params.get('user', 'quantdinger'),
                 password=params.get('password', ''),
                 dbname=params.get('dbname', 'quantdinger'),
                 connect_timeout=10,
+                connection_factory=_SessionConnection,
+                **settings,
+            )
+            logger.info(
+                f"PostgreSQL connection pool '{name}' created ({settings['minconn']}-{settings['maxconn']}): "
+                f"{params.get('host')}:{params.get('port')}/{params.get('dbname')}"
             )
-            logger.info(f"PostgreSQL connection pool created: {params.get('host')}:{params.get('port')}/{params.get('dbname')}")
         except Exception as e:
-            logger.error(f"Failed to create PostgreSQL connection pool: {e}")
+            logger.error(f"Failed to create PostgreSQL connection pool '{name}': {e}")
             raise
         
-        return _connection_pool
+        _connection_pools[name] = created
+        return created
+
+
+def _caller_name(depth: int) -> str:
+    try:
+        return sys._getframe(depth + 1).f_globals.get('__name__', '?')
+    except Exception:
+        return '?'
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Saturation metrics of every pool created in this process."""
+    return {name: p.stats() for name, p in list(_connection_pools.items())}
 
 
 class PostgresCursor:
@@ -128,29 +503,80 @@ class PostgresCursor:
         Convert ? placeholders to PostgreSQL %s for backward compatibility.
         Also handle some SQL syntax differences.
         """
-        # Replace ? -> %s
-        query = query.replace('?', '%s')
-        
-        # INSERT OR IGNORE -> PostgreSQL: INSERT ... ON CONFLICT DO NOTHING
-        query = query.replace('INSERT OR IGNORE', 'INSERT')
-        
-        return query
+        return _translate(query).converted
+    
+    def _record(self, sql: str, started: float, error: bool = False, prepared: bool = False) -> None:
+        ms = (time.perf_counter() - started) * 1000.0
+        if QUERY_STATS_ENABLED:
+            rows = 0
+            if not error:
+                try:
+                    rows = max(0, int(self._cursor.rowcount or 0))
+                except Exception:
+                    rows = 0
+            _query_stats.record(sql, ms, rows=rows, error=error, prepared=prepared)
+        if SLOW_QUERY_MS > 0 and ms >= SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({ms:.1f} ms): {' '.join(sql.split())[:500]}")
+    
+    def _use_prepared(self, stmt: _Statement, args) -> bool:
+        """Whether to run `stmt` as EXECUTE on this connection (PREPAREs it on first use)."""
+        if not PREPARED_STATEMENTS or not stmt.preparable or len(args) != stmt.param_count:
+            return False
+        stmt.hits += 1
+        conn = self._cursor.connection
+        prepared = getattr(conn, 'prepared_statements', None)
+        if prepared is None:
+            return False
+        state = prepared.get(stmt.name)
+        if state is not None:
+            return state
+        if stmt.hits < PREPARE_THRESHOLD:
+            return False
+        if conn.get_transaction_status() == pg_extensions.TRANSACTION_STATUS_INERROR:
+            return False
+        # A failed PREPARE must not abort the caller's transaction
+        try:
+            self._cursor.execute("SAVEPOINT qd_prepare")
+            self._cursor.execute(stmt.prepare_sql)
+            self._cursor.execute("RELEASE SAVEPOINT qd_prepare")
+            prepared[stmt.name] = True
+        except Exception as e:
+            try:
+                self._cursor.execute("ROLLBACK TO SAVEPOINT qd_prepare")
+                self._cursor.execute("RELEASE SAVEPOINT qd_prepare")
+            except Exception:
+                pass
+            prepared[stmt.name] = False
+            logger.debug(f"PREPARE failed, using plain execution: {e}")
+        return prepared[stmt.name]
     
     def execute(self, query: str, args: Any = None):
         """Execute SQL statement"""
-        query = self._convert_placeholders(query)
-        
-        # Check if this is an INSERT and add RETURNING id if not present
-        is_insert = query.strip().upper().startswith('INSERT')
-        if is_insert and 'RETURNING' not in query.upper():
-            query = query.rstrip(';').rstrip() + ' RETURNING id'
+        stmt = _translate(query)
+        is_insert = stmt.is_insert
         
-        if args:
-            if not isinstance(args, (tuple, list)):
-                args = (args,)
-            result = self._cursor.execute(query, args)
-        else:
-            result = self._cursor.execute(query)
+        started = time.perf_counter()
+        prepared = False
+        try:
+            if args:
+                if not isinstance(args, (tuple, list)):
+                    args = (args,)
+                prepared = self._use_prepared(stmt, args)
+                if prepared:
+                    started = time.perf_counter()
+                    result = self._cursor.execute(stmt.execute_sql, args)
+                else:
+                    result = self._cursor.execute(stmt.sql, args)
+            else:
+                result = self._cursor.execute(stmt.sql)
+        except Exception as e:
+            self._record(stmt.sql, started, error=True, prepared=prepared)
+            if prepared and getattr(e, 'pgcode', None) in _PREPARED_FAILURE_CODES:
+                # Fall back to plain execution for this statement from now on
+                stmt.preparable = False
+                logger.warning(f"Prepared statement {stmt.name} disabled after error {e.pgcode}: {e}")
+            raise
+        self._record(stmt.sql, started, prepared=prepared)
         
         # Capture last insert id for INSERT statements
         if is_insert:
@@ -163,6 +589,33 @@ class PostgresCursor:
         
         return result
     
+    def executemany(self, query: str, args_list: List[Any]):
+        """Execute the same SQL statement for each parameter tuple"""
+        query = self._convert_placeholders(query)
+        started = time.perf_counter()
+        try:
+            result = self._cursor.executemany(query, args_list)
+        except Exception:
+            self._record(query, started, error=True)
+            raise
+        self._record(query, started)
+        return result
+    
+    def execute_values(self, query: str, args_list: List[Any], template: str = None, page_size: int = 500):
+        """
+        Execute a multi-row statement (INSERT ... VALUES %s / UPDATE ... FROM (VALUES %s))
+        in batches of page_size rows per round trip via psycopg2.extras.execute_values.
+        """
+        from psycopg2.extras import execute_values
+        started = time.perf_counter()
+        try:
+            result = execute_values(self._cursor, query, args_list, template=template, page_size=page_size)
+        except Exception:
+            self._record(query, started, error=True)
+            raise
+        self._record(query, started)
+        return result
+    
     def fetchone(self) -> Optional[Dict[str, Any]]:
         """Fetch single row"""
         row = self._cursor.fetchone()
@@ -197,9 +650,9 @@ class PostgresCursor:
 class PostgresConnection:
     """PostgreSQL connection wrapper"""
     
-    def __init__(self, conn):
+    def __init__(self, conn, pool=None):
         self._conn = conn
-        self._pool = _get_connection_pool()
+        self._pool = pool or _get_connection_pool()
     
     def cursor(self) -> PostgresCursor:
         """Create cursor"""
@@ -223,15 +676,16 @@ class PostgresConnection:
 
 
 @contextmanager
-def get_pg_connection():
+def get_pg_connection(pool_name: str = DEFAULT_POOL):
     """
     Get PostgreSQL database connection (Context Manager)
     """
-    pool = _get_connection_pool()
+    pool = _get_connection_pool(pool_name)
     conn = None
     try:
-        conn = pool.getconn()
-        pg_conn = PostgresConnection(conn)
+        # Frames: this generator <- contextmanager.__enter__ <- caller
+        conn = pool.getconn(caller=_caller_name(2))
+        pg_conn = PostgresConnection(conn, pool)
         yield pg_conn
     except Exception as e:
         if conn:
@@ -252,13 +706,20 @@ def get_pg_connection():
                 pass
 
 
-def get_pg_connection_sync() -> PostgresConnection:
+def get_order_pg_connection():
+    """
+    Connection from the order queue pool (pending_orders enqueue / claim / status updates).
+    """
+    return get_pg_connection(ORDERS_POOL)
+
+
+def get_pg_connection_sync(pool_name: str = DEFAULT_POOL) -> PostgresConnection:
     """
     Get connection synchronously (caller must close)
     """
-    pool = _get_connection_pool()
-    conn = pool.getconn()
-    return PostgresConnection(conn)
+    pool = _get_connection_pool(pool_name)
+    conn = pool.getconn(caller=_caller_name(1))
+    return PostgresConnection(conn, pool)
 
 
 def execute_sql(sql: str, params: tuple = None) -> List[Dict[str, Any]]:
@@ -294,12 +755,13 @@ def is_postgres_available() -> bool:
 
 
 def close_pool():
-    """Close connection pool (call on app shutdown)"""
-    global _connection_pool
-    if _connection_pool:
+    """Close connection pools (call on app shutdown)"""
+    with _pool_lock:
+        pools = list(_connection_pools.items())
+        _connection_pools.clear()
+    for name, p in pools:
         try:
-            _connection_pool.closeall()
-            _connection_pool = None
-            logger.info("PostgreSQL connection pool closed")
+            p.closeall()
+            logger.info(f"PostgreSQL connection pool '{name}' closed")
         except Exception as e:
-            logger.warning(f"Error closing connection pool: {e}")
+            logger.warning(f"Error closing connection pool '{name}': {e}")
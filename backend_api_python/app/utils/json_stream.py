@@ -0,0 +1,82 @@
+"""
+Streaming JSON responses for large payloads (backtest results, trade lists).
+
+`jsonify` serializes the whole body into one string before sending; for a backtest with
+100k trades that is tens of MB held in the worker at once. `stream_json` encodes
+incrementally (json.JSONEncoder.iterencode) and yields ~JSON_STREAM_CHUNK_BYTES chunks, with
+optional on-the-fly gzip when the client accepts it.
+
+Settings:
+    JSON_STREAM_CHUNK_BYTES: flush size of the encoder buffer (default 65536)
+    JSON_RESPONSE_GZIP: gzip streamed bodies for clients sending Accept-Encoding: gzip
+                        (default false; the bundled nginx already compresses application/json)
+
+Usage:
+    return stream_json({'code': 1, 'msg': 'OK', 'data': row})
+"""
+import json
+import os
+import zlib
+from typing import Any, Iterator, Optional
+
+from flask import Response, current_app, request, stream_with_context
+
+CHUNK_BYTES = max(1024, int(os.getenv('JSON_STREAM_CHUNK_BYTES', '65536')))
+GZIP_ENABLED = os.getenv('JSON_RESPONSE_GZIP', 'false').lower() == 'true'
+
+
+def _default(obj: Any) -> Any:
+    # Same conversions as jsonify (datetime, Decimal, UUID, dataclasses, ...)
+    try:
+        return current_app.json.default(obj)
+    except RuntimeError:
+        return str(obj)
+
+
+def iter_json(payload: Any, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """Encode `payload` as UTF-8 JSON, yielding chunks of roughly `chunk_bytes`."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+    buf = []
+    size = 0
+    for piece in encoder.iterencode(payload):
+        buf.append(piece)
+        size += len(piece)
+        if size >= chunk_bytes:
+            yield ''.join(buf).encode('utf-8')
+            buf = []
+            size = 0
+    if buf:
+        yield ''.join(buf).encode('utf-8')
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # wbits=31: gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _client_accepts_gzip() -> bool:
+    return 'gzip' in (request.headers.get('Accept-Encoding') or '').lower()
+
+
+def stream_json(payload: Any, status: int = 200, gzip: Optional[bool] = None) -> Response:
+    """
+    Streamed JSON response.
+
+    Args:
+        payload: JSON-serializable object (encoded lazily while the response is sent)
+        gzip: force gzip on/off; None = JSON_RESPONSE_GZIP and the client's Accept-Encoding
+    """
+    use_gzip = (GZIP_ENABLED if gzip is None else gzip) and _client_accepts_gzip()
+    chunks = iter_json(payload)
+    if use_gzip:
+        chunks = _gzip(chunks)
+    resp = Response(stream_with_context(chunks), status=status, mimetype='application/json')
+    if use_gzip:
+        resp.headers['Content-Encoding'] = 'gzip'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
@@ -0,0 +1,161 @@
+"""
+Hot-path latency instrumentation (in-process).
+
+Stages of the trading pipeline are timed with `span(stage)` and aggregated into fixed-bucket
+histograms (count / sum / max + recent-sample percentiles), readable via `snapshot()`.
+
+A per-thread trace collects the stage timings of the current unit of work (one strategy tick,
+or one pending order in the worker) so they can be attached to the pending order row.
+
+Stages used by the trading pipeline:
+    fetch_price, kline_refresh, indicator_exec, signal_execute, enqueue   (TradingExecutor)
+    queue_wait, dispatch, exchange_rtt, fill_wait                        (PendingOrderWorker)
+
+Usage:
+    with span("fetch_price"):
+        price = fetch()
+
+    begin_trace()
+    ...
+    timings = current_trace()   # {"fetch_price": 12.3, ...} (ms)
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+# Histogram bucket upper bounds (ms); the last bucket is +Inf
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Recent samples kept per stage for percentiles
+SAMPLE_WINDOW = 512
+
+
+class _StageStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.samples.append(ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def _pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            idx = min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))
+            return round(ordered[idx], 3)
+
+        buckets = {}
+        cumulative = 0
+        for bound, n in zip(list(BUCKETS_MS) + ["+Inf"], self.buckets):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": _pct(0.50),
+            "p95_ms": _pct(0.95),
+            "p99_ms": _pct(0.99),
+            "buckets": buckets,  # cumulative counts, le=<bound>
+        }
+
+
+class LatencyRecorder:
+    """Thread-safe per-stage latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageStats] = {}
+        self._started_at = time.time()
+
+    def record(self, stage: str, ms: float) -> None:
+        ms = max(0.0, float(ms))
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.add(ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: s.to_dict() for name, s in sorted(self._stages.items())}
+        return {
+            "since": int(self._started_at),
+            "stages": stages,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages = {}
+            self._started_at = time.time()
+
+
+_recorder = LatencyRecorder()
+_local = threading.local()
+
+
+def get_recorder() -> LatencyRecorder:
+    return _recorder
+
+
+def begin_trace(initial: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Start a new trace for the current thread and return it."""
+    _local.trace = dict(initial or {})
+    return _local.trace
+
+
+def current_trace() -> Dict[str, float]:
+    """Stage timings (ms) collected on this thread since begin_trace()."""
+    return getattr(_local, "trace", None) or {}
+
+
+def record(stage: str, ms: float) -> None:
+    """Record a stage duration (ms) into the histograms and the current thread's trace."""
+    _recorder.record(stage, ms)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        # Same stage may run more than once per unit of work (e.g. limit + market fill wait)
+        trace[stage] = round(trace.get(stage, 0.0) + float(ms), 3)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` (recorded even if the block raises)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, (time.perf_counter() - t0) * 1000.0)
+
+
+def snapshot() -> Dict[str, Any]:
+    return _recorder.snapshot()
+
+
+def summarize_traces(traces: Iterable[Dict[str, float]]) -> Dict[str, Any]:
+    """Aggregate stored per-order traces (e.g. pending_orders.latency_json) into per-stage stats."""
+    stats: Dict[str, _StageStats] = {}
+    for trace in traces:
+        for stage, ms in (trace or {}).items():
+            try:
+                value = max(0.0, float(ms))
+            except (TypeError, ValueError):
+                continue
+            stats.setdefault(stage, _StageStats()).add(value)
+    return {name: st.to_dict() for name, st in sorted(stats.items())}
@@ -0,0 +1,107 @@
+"""
+Keyword search helpers (PostgreSQL pg_trgm).
+
+Substring keyword filters (`col ILIKE '%kw%'`) are served by trigram GIN indexes, and results are
+ranked by trigram word similarity. Works for any language (no tokenizer/dictionary needed), which
+matters for mixed Chinese/English indicator names.
+
+If pg_trgm cannot be installed (no privileges), filters still work as plain ILIKE scans and ranking
+falls back to "prefix match first".
+
+Usage:
+    ensure_search_indexes()
+    q = keyword_query(["i.name", "i.description"], keyword)
+    sql = f"SELECT ... WHERE {q.where_sql} ORDER BY {q.rank_sql} DESC"
+    cur.execute(sql, (*q.where_params, *q.rank_params))
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+from app.utils.db import get_db_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (index name, table, column) kept as trigram GIN indexes
+SEARCH_INDEXES = [
+    ("idx_polymarket_question_trgm", "qd_polymarket_markets", "question"),
+    ("idx_polymarket_slug_trgm", "qd_polymarket_markets", "slug"),
+    ("idx_indicator_codes_name_trgm", "qd_indicator_codes", "name"),
+    ("idx_indicator_codes_description_trgm", "qd_indicator_codes", "description"),
+]
+
+_lock = threading.Lock()
+_checked = False
+_trgm_available = False
+
+
+def ensure_search_indexes() -> bool:
+    """
+    Best-effort (once per process): enable pg_trgm and create the trigram indexes.
+
+    Returns:
+        True if pg_trgm is available (similarity ranking enabled)
+    """
+    global _checked, _trgm_available
+    if _checked:
+        return _trgm_available
+    with _lock:
+        if _checked:
+            return _trgm_available
+        _checked = True
+        try:
+            with get_db_connection() as db:
+                cur = db.cursor()
+                cur.execute("SELECT 1 AS ok FROM pg_extension WHERE extname = 'pg_trgm'")
+                if not cur.fetchone():
+                    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                for name, table, column in SEARCH_INDEXES:
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)")
+                db.commit()
+                cur.close()
+            _trgm_available = True
+        except Exception as e:
+            logger.warning(f"pg_trgm search indexes unavailable, falling back to plain ILIKE: {e}")
+            _trgm_available = False
+        return _trgm_available
+
+
+def escape_like(keyword: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class KeywordQuery:
+    """SQL fragments for a keyword search over one or more text columns."""
+    where_sql: str = "TRUE"
+    where_params: List = field(default_factory=list)
+    rank_sql: str = "0"
+    rank_params: List = field(default_factory=list)
+
+
+def keyword_query(columns: Sequence[str], keyword: str) -> KeywordQuery:
+    """
+    Build a substring filter over `columns` plus a relevance expression (higher = better).
+
+    Placeholders are '?' (converted by the cursor wrapper).
+    """
+    keyword = (keyword or "").strip()
+    if not keyword or not columns:
+        return KeywordQuery()
+
+    pattern = f"%{escape_like(keyword)}%"
+    where_sql = "(" + " OR ".join(f"{c} ILIKE ?" for c in columns) + ")"
+    where_params = [pattern] * len(columns)
+
+    if ensure_search_indexes():
+        # word_similarity: how well the keyword matches some part of the text (0..1)
+        rank_sql = "GREATEST(" + ", ".join(f"word_similarity(?, COALESCE({c}, ''))" for c in columns) + ")"
+        rank_params = [keyword] * len(columns)
+    else:
+        prefix = f"{escape_like(keyword)}%"
+        rank_sql = "(CASE WHEN " + " OR ".join(f"{c} ILIKE ?" for c in columns) + " THEN 1 ELSE 0 END)"
+        rank_params = [prefix] * len(columns)
+
+    return KeywordQuery(where_sql, where_params, rank_sql, rank_params)
@@ -11,7 +11,9 @@ backlog = 2048
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = "sync"
 worker_connections = 1000
-timeout = 600  # 10 minutes for long-running backtests
+# Backtests run in the backtest job pool; only the legacy synchronous POST /backtest
+# (without async=true) still holds a worker while waiting (BACKTEST_SYNC_WAIT_SEC).
+timeout = 600
 keepalive = 5
 
 # 日志
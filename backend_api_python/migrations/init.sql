@@ -198,13 +198,30 @@ CREATE TABLE IF NOT EXISTS qd_strategies_trading (
     decide_interval INTEGER DEFAULT 300,
     strategy_group_id VARCHAR(100) DEFAULT '',
     group_base_name VARCHAR(255) DEFAULT '',
+    indicator_id INTEGER,                      -- Denormalized from indicator_config.indicator_id
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Add indicator_id column and backfill it from indicator_config (if not exists)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'qd_strategies_trading' AND column_name = 'indicator_id'
+    ) THEN
+        ALTER TABLE qd_strategies_trading ADD COLUMN indicator_id INTEGER;
+        UPDATE qd_strategies_trading
+        SET indicator_id = substring(indicator_config from '"indicator_id"\s*:\s*"?(\d+)')::int
+        WHERE indicator_config ~ '"indicator_id"\s*:\s*"?\d+';
+        RAISE NOTICE 'Added indicator_id column to qd_strategies_trading';
+    END IF;
+END $$;
+
 CREATE INDEX IF NOT EXISTS idx_strategies_user_id ON qd_strategies_trading(user_id);
 CREATE INDEX IF NOT EXISTS idx_strategies_status ON qd_strategies_trading(status);
 CREATE INDEX IF NOT EXISTS idx_strategies_group_id ON qd_strategies_trading(strategy_group_id);
+CREATE INDEX IF NOT EXISTS idx_strategies_indicator_id ON qd_strategies_trading(indicator_id);
 
 -- Add last_rebalance_at column for cross-sectional strategies (if not exists)
 DO $$
@@ -237,12 +254,37 @@ CREATE TABLE IF NOT EXISTS qd_strategy_positions (
     pnl_percent DECIMAL(10,4) DEFAULT 0,
     equity DECIMAL(20,8) DEFAULT 0,
     updated_at TIMESTAMP DEFAULT NOW(),
+    marked_at TIMESTAMP,                      -- last mark-to-market (PositionMarker)
     UNIQUE(strategy_id, symbol, side)
 );
 
 CREATE INDEX IF NOT EXISTS idx_positions_user_id ON qd_strategy_positions(user_id);
 CREATE INDEX IF NOT EXISTS idx_positions_strategy_id ON qd_strategy_positions(strategy_id);
 
+-- Strategy runtime control channel (STRATEGY_RUNTIME_MODE=external, run_strategy_runtime.py)
+CREATE TABLE IF NOT EXISTS qd_strategy_runtime_commands (
+    id SERIAL PRIMARY KEY,
+    strategy_id INTEGER NOT NULL,               -- owning shard = strategy_id % shard_count
+    command VARCHAR(20) NOT NULL,               -- start / stop
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending / processing / done / failed
+    message TEXT DEFAULT '',
+    created_at TIMESTAMP DEFAULT NOW(),
+    processed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_strategy_runtime_commands_pending
+    ON qd_strategy_runtime_commands(id) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS qd_strategy_runtime_shards (
+    shard_index INTEGER PRIMARY KEY,
+    shard_count INTEGER NOT NULL,
+    pid INTEGER,
+    hostname VARCHAR(255) DEFAULT '',
+    running_json TEXT DEFAULT '[]',             -- strategy ids running in this shard
+    started_at TIMESTAMP DEFAULT NOW(),
+    heartbeat_at TIMESTAMP DEFAULT NOW()
+);
+
 -- =============================================================================
 -- 4. Strategy Trades
 -- =============================================================================
@@ -264,8 +306,19 @@ CREATE TABLE IF NOT EXISTS qd_strategy_trades (
 
 CREATE INDEX IF NOT EXISTS idx_trades_user_id ON qd_strategy_trades(user_id);
 CREATE INDEX IF NOT EXISTS idx_trades_strategy_id ON qd_strategy_trades(strategy_id);
+CREATE INDEX IF NOT EXISTS idx_trades_strategy_id_id ON qd_strategy_trades(strategy_id, id DESC);
 CREATE INDEX IF NOT EXISTS idx_trades_created_at ON qd_strategy_trades(created_at);
 
+-- Per-indicator live trading rollup (refreshed lazily by CommunityService)
+CREATE TABLE IF NOT EXISTS qd_indicator_live_stats (
+    indicator_id INTEGER PRIMARY KEY,
+    strategy_count INTEGER DEFAULT 0,
+    trade_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    total_profit DECIMAL(20,8) DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT NOW()
+);
+
 -- =============================================================================
 -- 5. Pending Orders Queue
 -- =============================================================================
@@ -298,9 +351,12 @@ CREATE TABLE IF NOT EXISTS pending_orders (
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
     processed_at TIMESTAMP,
-    sent_at TIMESTAMP
+    sent_at TIMESTAMP,
+    latency_json TEXT DEFAULT ''    -- per-stage timings (ms): fetch_price / indicator_exec / queue_wait / exchange_rtt / fill_wait ...
 );
 
+ALTER TABLE pending_orders ADD COLUMN IF NOT EXISTS latency_json TEXT DEFAULT '';
+
 CREATE INDEX IF NOT EXISTS idx_pending_orders_user_id ON pending_orders(user_id);
 CREATE INDEX IF NOT EXISTS idx_pending_orders_status ON pending_orders(status);
 CREATE INDEX IF NOT EXISTS idx_pending_orders_strategy_id ON pending_orders(strategy_id);
@@ -365,6 +421,11 @@ CREATE TABLE IF NOT EXISTS qd_indicator_codes (
 CREATE INDEX IF NOT EXISTS idx_indicator_codes_user_id ON qd_indicator_codes USING btree (user_id);
 CREATE INDEX IF NOT EXISTS idx_indicator_review_status ON qd_indicator_codes USING btree (review_status);
 
+-- Keyword search (ILIKE '%kw%' + similarity ranking) via trigram indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_indicator_codes_name_trgm ON qd_indicator_codes USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_indicator_codes_description_trgm ON qd_indicator_codes USING gin (description gin_trgm_ops);
+
 -- =============================================================================
 -- 8. AI Decisions
 -- =============================================================================
@@ -448,12 +509,64 @@ CREATE TABLE IF NOT EXISTS qd_backtest_runs (
     strategy_config TEXT DEFAULT '',
     status VARCHAR(20) DEFAULT 'success',
     error_message TEXT DEFAULT '',
-    result_json TEXT DEFAULT '',
+    result_json TEXT DEFAULT '',               -- Legacy full result (new rows: '')
+    total_return DOUBLE PRECISION,             -- Headline metrics extracted from the result
+    annual_return DOUBLE PRECISION,
+    max_drawdown DOUBLE PRECISION,
+    sharpe_ratio DOUBLE PRECISION,
+    win_rate DOUBLE PRECISION,
+    profit_factor DOUBLE PRECISION,
+    total_trades INTEGER,
+    total_profit DOUBLE PRECISION,
+    result_summary TEXT,                       -- Result JSON without equityCurve/trades
+    result_detail BYTEA,                       -- gzip(JSON {equityCurve, trades})
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Older databases: add metric / split-storage columns
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS total_return DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS annual_return DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS max_drawdown DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS sharpe_ratio DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS win_rate DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS profit_factor DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS total_trades INTEGER;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS total_profit DOUBLE PRECISION;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS result_summary TEXT;
+ALTER TABLE qd_backtest_runs ADD COLUMN IF NOT EXISTS result_detail BYTEA;
+
 CREATE INDEX IF NOT EXISTS idx_backtest_runs_user_id ON qd_backtest_runs(user_id);
 CREATE INDEX IF NOT EXISTS idx_backtest_runs_indicator_id ON qd_backtest_runs(indicator_id);
+CREATE INDEX IF NOT EXISTS idx_backtest_runs_indicator_metrics
+    ON qd_backtest_runs(indicator_id, status)
+    INCLUDE (total_return, win_rate, max_drawdown, total_trades);
+
+-- Backtest jobs (async queue; executed by the backtest worker pool)
+CREATE TABLE IF NOT EXISTS qd_backtest_jobs (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    job_key VARCHAR(64) NOT NULL,              -- sha256 of user + params + code (dedup of in-flight jobs)
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued / running / success / failed / cancelled
+    progress INTEGER DEFAULT 0,
+    message VARCHAR(255) DEFAULT '',
+    progress_detail TEXT DEFAULT '',           -- JSON: {phase, processed, total, trades, equity}
+    cancel_requested BOOLEAN DEFAULT FALSE,
+    kind VARCHAR(20) DEFAULT 'backtest',       -- backtest / robustness
+    tasks INTEGER DEFAULT 1,                   -- pool tasks occupied (robustness: windows + Monte Carlo)
+    params_json TEXT DEFAULT '',               -- request params without indicator code
+    run_id INTEGER,                            -- qd_backtest_runs.id when finished
+    result_json TEXT DEFAULT '',               -- robustness jobs: JSON result (distributions)
+    error_type VARCHAR(20) DEFAULT '',
+    error_message TEXT DEFAULT '',
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_backtest_jobs_active_key
+    ON qd_backtest_jobs(job_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_backtest_jobs_user ON qd_backtest_jobs(user_id, id DESC);
 
 -- =============================================================================
 -- 13. Exchange Credentials
@@ -685,6 +798,7 @@ CREATE TABLE IF NOT EXISTS qd_analysis_memory (
     risks JSONB,
     scores JSONB,
     indicators_snapshot JSONB,
+    feature_vector JSONB,                       -- {"v": version, "x": [...]} for similar-pattern search
     raw_result JSONB,                           -- Full analysis result for history replay
     created_at TIMESTAMP DEFAULT NOW(),
     validated_at TIMESTAMP,
@@ -692,7 +806,9 @@ CREATE TABLE IF NOT EXISTS qd_analysis_memory (
     actual_return_pct DECIMAL(10, 4),
     was_correct BOOLEAN,
     user_feedback VARCHAR(20),                  -- helpful/not_helpful
-    feedback_at TIMESTAMP
+    feedback_at TIMESTAMP,
+    validation_attempts INT DEFAULT 0,          -- runs that could not resolve an outcome price
+    validation_attempted_at TIMESTAMP
 );
 
 CREATE INDEX IF NOT EXISTS idx_analysis_memory_symbol ON qd_analysis_memory(market, symbol);
@@ -711,6 +827,14 @@ BEGIN
         CREATE INDEX IF NOT EXISTS idx_analysis_memory_user ON qd_analysis_memory(user_id);
         RAISE NOTICE 'Added user_id column to qd_analysis_memory';
     END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'qd_analysis_memory' AND column_name = 'feature_vector'
+    ) THEN
+        ALTER TABLE qd_analysis_memory ADD COLUMN feature_vector JSONB;
+        RAISE NOTICE 'Added feature_vector column to qd_analysis_memory';
+    END IF;
 END $$;
 
 -- =============================================================================
@@ -856,6 +980,8 @@ CREATE TABLE IF NOT EXISTS qd_polymarket_markets (
 CREATE INDEX IF NOT EXISTS idx_polymarket_category ON qd_polymarket_markets(category);
 CREATE INDEX IF NOT EXISTS idx_polymarket_status ON qd_polymarket_markets(status);
 CREATE INDEX IF NOT EXISTS idx_polymarket_updated ON qd_polymarket_markets(updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_polymarket_question_trgm ON qd_polymarket_markets USING gin (question gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_polymarket_slug_trgm ON qd_polymarket_markets USING gin (slug gin_trgm_ops);
 
 -- AI分析记录表
 CREATE TABLE IF NOT EXISTS qd_polymarket_ai_analysis (
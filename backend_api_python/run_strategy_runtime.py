@@ -0,0 +1,37 @@
+"""
+QuantDinger strategy runtime entrypoint.
+
+Runs live strategies outside the API process, sharded across worker processes
+(see app/services/strategy_runtime.py). Start the API with STRATEGY_RUNTIME_MODE=external
+so it sends start/stop commands here instead of running strategies itself.
+
+    python run_strategy_runtime.py [--workers N]
+"""
+import argparse
+import os
+import sys
+
+# UTF-8 console, local .env and proxy env vars (must run before importing app)
+import env_bootstrap  # noqa: F401
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuantDinger strategy runtime")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="shard processes (default: STRATEGY_RUNTIME_WORKERS or CPU count)")
+    args = parser.parse_args()
+
+    from app.utils.logger import get_logger, setup_logger
+    from app.services.strategy_runtime import StrategyRuntimeSupervisor, is_external_runtime
+
+    setup_logger()
+    logger = get_logger(__name__)
+    if not is_external_runtime():
+        logger.warning("STRATEGY_RUNTIME_MODE is not 'external'; the API will also run strategies in-process.")
+    StrategyRuntimeSupervisor(workers=args.workers).run_forever()
+
+
+if __name__ == '__main__':
+    main()
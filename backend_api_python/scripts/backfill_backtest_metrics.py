@@ -0,0 +1,57 @@
+"""
+把历史 qd_backtest_runs.result_json 迁移到新的存储结构。
+
+背景：
+- 新写入的回测记录把 totalReturn / winRate / maxDrawdown 等指标写入独立列，
+  equityCurve + trades 压缩存入 result_detail，result_json 置空。
+- 旧记录读取时仍可回退解析 result_json，但列表/排行聚合需要逐行解析大 JSON，
+  可用本脚本一次性迁移。
+
+使用：
+  python backend_api_python/scripts/backfill_backtest_metrics.py            # 只统计待迁移数量
+  python backend_api_python/scripts/backfill_backtest_metrics.py --apply
+  python backend_api_python/scripts/backfill_backtest_metrics.py --apply --batch-size 100 --max-batches 10
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.utils.db import get_db_connection
+from app.services.backtest_store import backfill_legacy_runs, ensure_backtest_run_schema
+
+
+def _count_legacy_runs() -> int:
+    with get_db_connection() as db:
+        cursor = db.cursor()
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS cnt FROM qd_backtest_runs
+            WHERE result_summary IS NULL AND result_json IS NOT NULL AND result_json != ''
+            """
+        )
+        row = cursor.fetchone() or {}
+        cursor.close()
+    return int(row.get("cnt") or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--max-batches", type=int, default=0, help="0 = until done")
+    parser.add_argument("--apply", action="store_true", help="actually migrate rows (default: dry-run)")
+    args = parser.parse_args()
+
+    ensure_backtest_run_schema()
+    pending = _count_legacy_runs()
+    print(f"[info] legacy runs pending={pending}")
+    if not args.apply or pending == 0:
+        print(f"[done] migrated=0 apply={args.apply}")
+        return
+
+    migrated = backfill_legacy_runs(batch_size=args.batch_size, max_batches=args.max_batches)
+    print(f"[done] migrated={migrated} remaining={_count_legacy_runs()} apply={args.apply}")
+
+
+if __name__ == "__main__":
+    main()
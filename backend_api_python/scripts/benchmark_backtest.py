@@ -0,0 +1,459 @@
+"""
+Offline benchmark for the backtest engine.
+
+Goal:
+- Replay deterministic OHLCV fixtures (synthetic, or CSVs saved with --record-fixtures) through
+  representative indicator scripts and strategy configs. No network / no database.
+- Cover BacktestService.run, run_multi_timeframe, _simulate_trading_new_format and
+  _simulate_trading_old_format.
+- Report candles/sec, peak memory (tracemalloc) and per-phase timings.
+- Save a local baseline and compare against it: flags slowdowns and any change in results
+  (a fingerprint of the backtest output), so engine speedups can prove they are behaviour-neutral.
+  No baseline is shipped with the repo: run --save-baseline on your machine (e.g. on the
+  commit before your change) before using --compare.
+
+Usage:
+  python backend_api_python/scripts/benchmark_backtest.py                        # run all cases
+  python backend_api_python/scripts/benchmark_backtest.py --case run_1h_sma --repeat 5
+  python backend_api_python/scripts/benchmark_backtest.py --save-baseline        # write local baseline
+  python backend_api_python/scripts/benchmark_backtest.py --compare              # exit 1 on regression
+                                                                                 # (needs a saved baseline)
+  python backend_api_python/scripts/benchmark_backtest.py --record-fixtures ./fixtures
+  python backend_api_python/scripts/benchmark_backtest.py --fixture-dir ./fixtures
+
+Notes:
+- Timings are machine dependent: save baselines on the machine you compare on.
+- Fixture CSV layout: <fixture-dir>/<SYMBOL>_<timeframe>.csv with columns time,open,high,low,close,volume
+  (time = unix seconds).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def _ensure_backend_on_syspath() -> None:
+    """
+    Ensure `backend_api_python/` is on sys.path so `import app...` works
+    no matter where the script is executed from.
+    """
+    backend_root = Path(__file__).resolve().parents[1]
+    p = str(backend_root)
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+
+_ensure_backend_on_syspath()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.services.backtest import BacktestService  # noqa: E402
+
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baselines.json"
+
+FIXTURE_START = datetime(2024, 1, 1)
+FIXTURE_SYMBOL = "BTC/USDT"
+
+# BacktestService methods timed as phases (inclusive wall time)
+PHASE_METHODS = (
+    "_fetch_kline_data",
+    "_execute_indicator",
+    "_simulate_trading",
+    "_simulate_trading_mtf",
+    "_simulate_trading_new_format",
+    "_simulate_trading_old_format",
+    "_calculate_metrics",
+    "_format_result",
+)
+
+
+# ---------------------------------------------------------------------------
+# Indicator scripts / strategy configs
+# ---------------------------------------------------------------------------
+
+SMA_CROSS_CODE = """
+fast = df['close'].rolling(10).mean()
+slow = df['close'].rolling(30).mean()
+df['buy'] = (fast > slow) & (fast.shift(1) <= slow.shift(1))
+df['sell'] = (fast < slow) & (fast.shift(1) >= slow.shift(1))
+"""
+
+RSI_4WAY_CODE = """
+delta = df['close'].diff()
+gain = delta.clip(lower=0).rolling(14).mean()
+loss = (-delta.clip(upper=0)).rolling(14).mean()
+rsi = 100 - 100 / (1 + gain / loss.replace(0, np.nan))
+df['open_long'] = (rsi < 30) & (rsi.shift(1) >= 30)
+df['close_long'] = (rsi > 55) & (rsi.shift(1) <= 55)
+df['open_short'] = (rsi > 70) & (rsi.shift(1) <= 70)
+df['close_short'] = (rsi < 45) & (rsi.shift(1) >= 45)
+"""
+
+RISK_CONFIG: Dict[str, Any] = {
+    "execution": {"signalTiming": "next_bar_open"},
+    "position": {"entryPct": 0.5},
+    "risk": {
+        "stopLossPct": 5,
+        "takeProfitPct": 12,
+        "trailing": {"enabled": True, "pct": 3, "activationPct": 6},
+    },
+    "scale": {
+        "trendAdd": {"enabled": True, "stepPct": 4, "sizePct": 20, "maxTimes": 3},
+        "trendReduce": {"enabled": True, "stepPct": 8, "sizePct": 30, "maxTimes": 2},
+    },
+}
+
+
+# Each case: which entry point, timeframes and date range, indicator + strategy config.
+CASES: Dict[str, Dict[str, Any]] = {
+    "run_1h_sma": {
+        "kind": "run", "timeframe": "1H", "days": 180,
+        "code": SMA_CROSS_CODE, "trade_direction": "both", "leverage": 1, "strategy_config": {},
+    },
+    "run_15m_rsi_risk": {
+        "kind": "run", "timeframe": "15m", "days": 60,
+        "code": RSI_4WAY_CODE, "trade_direction": "both", "leverage": 5, "strategy_config": RISK_CONFIG,
+    },
+    "mtf_1h_exec_1m": {
+        "kind": "mtf", "timeframe": "1H", "days": 14,
+        "code": SMA_CROSS_CODE, "trade_direction": "both", "leverage": 3, "strategy_config": RISK_CONFIG,
+    },
+    "mtf_4h_exec_5m": {
+        "kind": "mtf", "timeframe": "4H", "days": 90,
+        "code": SMA_CROSS_CODE, "trade_direction": "long", "leverage": 1, "strategy_config": {},
+    },
+    "sim_new_format_5m": {
+        "kind": "sim_new", "timeframe": "5m", "days": 60,
+        "code": RSI_4WAY_CODE, "trade_direction": "both", "leverage": 5, "strategy_config": RISK_CONFIG,
+    },
+    "sim_old_format_5m": {
+        "kind": "sim_old", "timeframe": "5m", "days": 60,
+        "code": SMA_CROSS_CODE, "trade_direction": "both", "leverage": 2, "strategy_config": {},
+    },
+}
+
+INITIAL_CAPITAL = 10000.0
+COMMISSION = 0.0005
+SLIPPAGE = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+_RESAMPLE_RULES = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min",
+                   "1H": "1h", "4H": "4h", "1D": "1D", "1W": "1W"}
+
+
+def synthetic_ohlcv(timeframe: str, days: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Deterministic OHLCV: geometric random walk with regime-switching drift/volatility,
+    so indicators produce both trends and ranges.
+    """
+    tf_sec = BacktestService.TIMEFRAME_SECONDS[timeframe]
+    n = int(days * 86400 // tf_sec)
+    rng = np.random.RandomState(seed)
+    scale = np.sqrt(tf_sec / 60.0)
+    regime = np.repeat(rng.choice([-1.0, 0.0, 1.0], size=n // 500 + 1), 500)[:n]
+    drift = regime * 0.00004 * scale * scale
+    vol = np.where(regime == 0.0, 0.0008, 0.0012) * scale
+    log_ret = drift + vol * rng.standard_normal(n)
+    close = 30000.0 * np.exp(np.cumsum(log_ret))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.standard_normal((2, n))) * vol * 0.5
+    high = np.maximum(open_, close) * (1.0 + wick[0])
+    low = np.minimum(open_, close) * (1.0 - wick[1])
+    volume = rng.gamma(2.0, 50.0, size=n)
+    index = pd.date_range(FIXTURE_START, periods=n, freq=pd.Timedelta(seconds=tf_sec))
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    out = df.resample(_RESAMPLE_RULES[timeframe], label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    return out.dropna()
+
+
+def _fixture_file(fixture_dir: Path, timeframe: str) -> Path:
+    return fixture_dir / f"{FIXTURE_SYMBOL.replace('/', '')}_{timeframe}.csv"
+
+
+def load_fixture_csv(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df.set_index("time")[["open", "high", "low", "close", "volume"]].astype(float)
+
+
+def save_fixture_csv(df: pd.DataFrame, path: Path) -> None:
+    out = df.copy()
+    out.insert(0, "time", (out.index.astype("int64") // 10**9).astype("int64"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(path, index=False)
+
+
+class FixtureFeed:
+    """
+    Serves candles for every timeframe a case asks for. The finest timeframe is the base series and
+    coarser ones are resampled from it, so signal and execution candles are consistent (as on an exchange).
+    """
+
+    def __init__(self, base_tf: str, days: int, fixture_dir: Optional[Path] = None):
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.fixture_dir = fixture_dir
+        self.base_tf = base_tf
+        base_path = _fixture_file(fixture_dir, base_tf) if fixture_dir else None
+        if base_path and base_path.exists():
+            self.frames[base_tf] = load_fixture_csv(base_path)
+        else:
+            self.frames[base_tf] = synthetic_ohlcv(base_tf, days)
+
+    def get(self, timeframe: str) -> pd.DataFrame:
+        if timeframe not in self.frames:
+            path = _fixture_file(self.fixture_dir, timeframe) if self.fixture_dir else None
+            if path and path.exists():
+                self.frames[timeframe] = load_fixture_csv(path)
+            else:
+                self.frames[timeframe] = resample_ohlcv(self.frames[self.base_tf], timeframe)
+        return self.frames[timeframe]
+
+    def fetch_kline_data(self, market: str, symbol: str, timeframe: str,
+                         start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Drop-in for BacktestService._fetch_kline_data (same filtering, no data source)."""
+        df = self.get(timeframe)
+        return df[(df.index >= start_date) & (df.index <= end_date)].copy()
+
+    def record(self, fixture_dir: Path) -> List[Path]:
+        written = []
+        for tf, df in self.frames.items():
+            path = _fixture_file(fixture_dir, tf)
+            save_fixture_csv(df, path)
+            written.append(path)
+        return written
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _instrument(svc: BacktestService, feed: FixtureFeed, phases: Dict[str, float]) -> None:
+    """Route kline fetches to the fixture feed and time each engine phase on this instance."""
+    svc._fetch_kline_data = feed.fetch_kline_data
+    for name in PHASE_METHODS:
+        orig = getattr(svc, name)
+
+        def timed(*args, _orig=orig, _name=name, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return _orig(*args, **kwargs)
+            finally:
+                phases[_name] = phases.get(_name, 0.0) + (time.perf_counter() - t0)
+
+        setattr(svc, name, timed)
+
+
+def _exec_timeframe(case: Dict[str, Any]) -> str:
+    if case["kind"] != "mtf":
+        return case["timeframe"]
+    svc = BacktestService()
+    start = FIXTURE_START
+    exec_tf, _info = svc.get_execution_timeframe(start, start + timedelta(days=case["days"]), "Crypto")
+    return exec_tf or case["timeframe"]
+
+
+def _run_case_once(case: Dict[str, Any], feed: FixtureFeed) -> Dict[str, Any]:
+    """Run a case on a fresh service; returns output, candle count and per-phase seconds."""
+    svc = BacktestService()
+    phases: Dict[str, float] = {}
+    _instrument(svc, feed, phases)
+
+    start = FIXTURE_START
+    end = start + timedelta(days=case["days"])
+    kind = case["kind"]
+    common = dict(
+        initial_capital=INITIAL_CAPITAL, commission=COMMISSION, slippage=SLIPPAGE,
+        leverage=case["leverage"], trade_direction=case["trade_direction"],
+        strategy_config=case["strategy_config"],
+    )
+
+    t0 = time.perf_counter()
+    if kind == "run":
+        output = svc.run(indicator_code=case["code"], market="Crypto", symbol=FIXTURE_SYMBOL,
+                         timeframe=case["timeframe"], start_date=start, end_date=end, **common)
+        candles = len(feed.fetch_kline_data("Crypto", FIXTURE_SYMBOL, case["timeframe"], start, end))
+    elif kind == "mtf":
+        output = svc.run_multi_timeframe(indicator_code=case["code"], market="Crypto", symbol=FIXTURE_SYMBOL,
+                                         timeframe=case["timeframe"], start_date=start, end_date=end, **common)
+        candles = int(output.get("execution_candles") or output.get("signal_candles") or 0)
+    else:
+        # Direct simulation: indicator runs outside the timed window so only the trading loop is measured.
+        df = feed.fetch_kline_data("Crypto", FIXTURE_SYMBOL, case["timeframe"], start, end)
+        signals = svc._execute_indicator(case["code"], df, {"leverage": case["leverage"]})
+        phases.clear()
+        t0 = time.perf_counter()
+        if kind == "sim_new":
+            output = svc._simulate_trading(df, signals, **common)
+        else:
+            legacy = pd.Series(0, index=df.index)
+            legacy[signals["buy"]] = 1
+            legacy[signals["sell"] & ~signals["buy"]] = -1
+            output = svc._simulate_trading_old_format(df, legacy, **common)
+        candles = len(df)
+    elapsed = time.perf_counter() - t0
+    return {"output": output, "candles": candles, "seconds": elapsed, "phases": phases}
+
+
+def result_fingerprint(output: Any) -> str:
+    """Stable hash of a backtest output; any change in trades/equity/metrics changes it."""
+    blob = json.dumps(output, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def run_case(name: str, repeat: int, measure_memory: bool, fixture_dir: Optional[Path],
+             record_dir: Optional[Path] = None) -> Dict[str, Any]:
+    case = CASES[name]
+    feed = FixtureFeed(_exec_timeframe(case), case["days"], fixture_dir=fixture_dir)
+
+    runs = [_run_case_once(case, feed) for _ in range(max(1, repeat))]
+    fingerprints = {result_fingerprint(r["output"]) for r in runs}
+    best = min(runs, key=lambda r: r["seconds"])
+    median_sec = statistics.median(r["seconds"] for r in runs)
+
+    peak_mb = None
+    if measure_memory:
+        # Separate traced run: tracemalloc slows execution, so it never feeds the timings.
+        tracemalloc.start()
+        try:
+            _run_case_once(case, feed)
+            _cur, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = round(peak / (1024 * 1024), 2)
+
+    if record_dir:
+        for path in feed.record(record_dir):
+            print(f"[fixture] wrote {path}")
+
+    candles = best["candles"]
+    return {
+        "candles": candles,
+        "median_sec": round(median_sec, 4),
+        "best_sec": round(best["seconds"], 4),
+        "candles_per_sec": round(candles / median_sec, 1) if median_sec > 0 else None,
+        "peak_mem_mb": peak_mb,
+        "phases_sec": {k: round(v, 4) for k, v in sorted(best["phases"].items())},
+        "fingerprint": fingerprints.pop() if len(fingerprints) == 1 else "nondeterministic",
+    }
+
+
+def _environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                        tolerance: float) -> List[str]:
+    """Return a list of regression messages (empty = OK)."""
+    problems = []
+    base_cases = baseline.get("cases") or {}
+    for name, res in results.items():
+        base = base_cases.get(name)
+        if not base:
+            print(f"[warn] {name}: no baseline")
+            continue
+        if res["fingerprint"] != base.get("fingerprint"):
+            problems.append(f"{name}: result changed (fingerprint {base.get('fingerprint')} -> {res['fingerprint']})")
+        base_sec = float(base.get("median_sec") or 0)
+        if base_sec > 0 and res["median_sec"] > base_sec * (1.0 + tolerance):
+            problems.append(
+                f"{name}: slower {base_sec:.3f}s -> {res['median_sec']:.3f}s "
+                f"(+{(res['median_sec'] / base_sec - 1) * 100:.1f}%, tolerance {tolerance * 100:.0f}%)"
+            )
+        base_mem = base.get("peak_mem_mb")
+        if base_mem and res.get("peak_mem_mb") and res["peak_mem_mb"] > base_mem * (1.0 + tolerance):
+            problems.append(f"{name}: peak memory {base_mem}MB -> {res['peak_mem_mb']}MB")
+    if baseline.get("environment") and baseline["environment"] != _environment():
+        print(f"[warn] baseline environment differs: {baseline['environment']}")
+    return problems
+
+
+def _print_result(name: str, res: Dict[str, Any]) -> None:
+    mem = f"{res['peak_mem_mb']}MB" if res["peak_mem_mb"] is not None else "-"
+    print(
+        f"{name:<22} candles={res['candles']:<7} median={res['median_sec']:.3f}s "
+        f"candles/s={res['candles_per_sec']} peak_mem={mem} fingerprint={res['fingerprint']}"
+    )
+    for phase, sec in res["phases_sec"].items():
+        print(f"    {phase:<30} {sec:.4f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--case", action="append", choices=sorted(CASES.keys()), help="repeatable; default: all cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--fixture-dir", type=Path, default=None, help="load saved OHLCV CSV fixtures from here")
+    parser.add_argument("--record-fixtures", type=Path, default=None, help="write the fixtures used to this dir")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="compare to baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown ratio (default 0.15)")
+    parser.add_argument("--json", type=Path, default=None, help="also write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep engine INFO logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+
+    names = args.case or list(CASES.keys())
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        res = run_case(name, args.repeat, not args.no_memory, args.fixture_dir, args.record_fixtures)
+        results[name] = res
+        _print_result(name, res)
+
+    report = {"environment": _environment(), "created_at": datetime.now().isoformat(timespec="seconds"), "cases": results}
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        existing = {}
+        if args.baseline.exists():
+            existing = json.loads(args.baseline.read_text(encoding="utf-8")).get("cases") or {}
+        existing.update(results)
+        report["cases"] = existing
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[done] baseline saved: {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"[error] baseline not found: {args.baseline} (run with --save-baseline first)")
+            sys.exit(2)
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        problems = compare_to_baseline(results, baseline, args.tolerance)
+        for p in problems:
+            print(f"[regression] {p}")
+        if problems:
+            sys.exit(1)
+        print("[done] no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+backtest_metrics: trade timing from the string timestamps the simulators emit.
+"""
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('flask')
+
+from app.services import backtest_metrics  # noqa: E402
+from app.services.backtest_equity import EquityCurve  # noqa: E402
+
+
+def _trade(time, kind, amount, profit=0.0):
+    return {'time': time, 'type': kind, 'price': 100.0, 'amount': amount, 'profit': profit, 'balance': 0.0}
+
+
+def test_trade_arrays_times_are_nanoseconds():
+    import pandas as pd
+
+    arrays = backtest_metrics.trade_arrays([_trade('2024-01-01 00:00', 'open_long', 1.0)])
+    assert int(arrays['time'][0]) == pd.Timestamp('2024-01-01').value
+
+
+def test_holding_periods_from_string_timestamps():
+    trades = [
+        _trade('2024-01-01 00:00', 'open_long', 1.0),
+        _trade('2024-01-04 00:00', 'close_long', 1.0, profit=10.0),
+        _trade('2024-01-05 00:00', 'open_short', 2.0),
+        _trade('2024-01-06 00:00', 'close_short', 2.0, profit=-5.0),
+    ]
+    arrays = backtest_metrics.trade_arrays(trades)
+    periods = backtest_metrics.holding_periods_sec(arrays['type'], arrays['time'], arrays['amount'])
+    assert list(periods / 3600.0) == [72.0, 24.0]
+
+
+def test_reduce_to_zero_closes_position():
+    trades = [
+        _trade('2024-01-01 00:00', 'open_long', 1.0),
+        _trade('2024-01-01 12:00', 'reduce_long', 0.5, profit=1.0),
+        _trade('2024-01-02 00:00', 'reduce_long', 0.5, profit=1.0),
+        _trade('2024-01-03 00:00', 'open_long', 1.0),
+        _trade('2024-01-03 06:00', 'close_long', 1.0, profit=1.0),
+    ]
+    arrays = backtest_metrics.trade_arrays(trades)
+    periods = backtest_metrics.holding_periods_sec(arrays['type'], arrays['time'], arrays['amount'])
+    assert list(periods / 3600.0) == [24.0, 6.0]
+
+
+def test_compute_metrics_holding_and_exposure():
+    curve = EquityCurve()
+    for day, value in enumerate([10000.0, 10010.0, 10020.0, 10015.0, 10005.0]):
+        curve.add(datetime(2024, 1, 1 + day), value)
+    trades = [
+        _trade('2024-01-01 00:00', 'open_long', 1.0),
+        _trade('2024-01-04 00:00', 'close_long', 1.0, profit=15.0),
+        _trade('2024-01-04 00:00', 'open_short', 1.0),
+        _trade('2024-01-05 00:00', 'close_short', 1.0, profit=-10.0),
+    ]
+    metrics = backtest_metrics.compute_metrics(
+        curve, trades, 10000.0, '1D', datetime(2024, 1, 1), datetime(2024, 1, 5)
+    )
+    assert metrics['avgHoldingHours'] == 48.0
+    assert metrics['exposure'] == 100.0
+    assert type(metrics['exposure']) is float
@@ -0,0 +1,56 @@
+"""
+CommunityService.get_market_indicators: keyword search binds every placeholder of the query.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('psycopg2')
+
+from app.services import community_service  # noqa: E402
+from app.utils import text_search  # noqa: E402
+
+
+class _RecordingCursor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def execute(self, sql, params=()):
+        self.calls.append((sql, tuple(params)))
+
+    def fetchone(self):
+        return {'count': 0}
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('trigram', [True, False])
+def test_keyword_search_with_default_relevance_sort(monkeypatch, trigram):
+    calls = []
+
+    class _Conn:
+        def cursor(self):
+            return _RecordingCursor(calls)
+
+    @contextmanager
+    def fake_connection():
+        yield _Conn()
+
+    monkeypatch.setattr(community_service, 'get_db_connection', fake_connection)
+    monkeypatch.setattr(text_search, 'ensure_search_indexes', lambda: trigram)
+
+    service = community_service.CommunityService.__new__(community_service.CommunityService)
+    # /api/community/indicators defaults to sort_by='relevance' when a keyword is given
+    service.get_market_indicators(page=1, page_size=12, keyword='macd', sort_by='relevance')
+
+    assert len(calls) == 2
+    for sql, params in calls:
+        assert sql.count('?') == len(params), sql
+    list_sql, list_params = calls[1]
+    assert 'ORDER BY' in list_sql
+    assert list_params[-2:] == (12, 0)
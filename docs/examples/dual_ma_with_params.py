@@ -14,6 +14,7 @@
 # === 参数声明 (会在前端表单中显示) ===
 # @param sma_short int 14 短期均线周期
 # @param sma_long int 28 长期均线周期
+# @lookback sma_long
 
 # === 获取参数 (带默认值作为后备) ===
 sma_short_period = params.get('sma_short', 14)